@@ -1,42 +1,38 @@
 
 import streamlit as st
 import pandas as pd
-import numpy as np
 import plotly.express as px
-import plotly.graph_objects as go
-from datetime import datetime
+from qrm import instrument
+from qrm.ingest import CACHE_DIR, file_digest
+from qrm.registry import shared, shared_table
+from qrm.incremental import open_store
+from qrm.cube import get_cube
+from qrm.schema import FIELDS, confirm, resolve
+from qrm.model import code_mask
+from qrm.quality import LIMITS, checked, describe, report
+from qrm.index import get_index
+from qrm.charts import cached_figure
+from qrm.resolution import RESOLUTIONS, UNITS, match_days, reduce
+from qrm.readiness import ALERT_Z, BASELINE_DAYS, ITEM_LABELS, daily_wellness, latest, zscores
+from qrm.peers import WINDOW_WEEKS, load_profiles, percentile_index
+from qrm.partitions import add_workbook, dataset_version, list_partitions, read_partitions
 
 # =============================
 # CONFIG + THEME (QRM)
 # =============================
 st.set_page_config(page_title="QRM — Tableau de bord GPS", layout="wide", page_icon=":soccer:")
+instrument.begin("app_qrm_dashboard_hid_hsr.py")   # actif avec QRM_PROFILE=1 ou ?debug=1
 QRM_RED    = "#D71920"
 QRM_YELLOW = "#FFD100"
 QRM_DARK   = "#0B132B"
 QRM_LIGHT  = "#F7F7F7"
 PALETTE    = [QRM_RED, QRM_YELLOW, "#2ca02c", "#1f77b4", "#9467bd", "#8c564b"]
+# historique propre à ce tableau de bord : un import exploratoire ne touche pas au magasin de app.py
+STORE_DIR = CACHE_DIR / "store-hid_hsr"
 
 # =============================
 # HELPERS
 # =============================
-def find_col(df, candidates):
-    cols = {c.lower(): c for c in df.columns}
-    for cand in candidates:
-        for c in cols:
-            if cand in c:
-                return cols[c]
-    return None
-
-def to_datetime_safe(series):
-    if series is None:
-        return None
-    if np.issubdtype(series.dtype, np.datetime64):
-        return series
-    try:
-        return pd.to_datetime(series, errors="coerce")
-    except:
-        return series
-
 def kpi(title, value, suffix=""):
     st.markdown(f"""
     <div style="background:white;border-left:8px solid {QRM_RED};padding:16px;border-radius:14px;box-shadow:0 2px 10px rgba(0,0,0,0.06)">
@@ -45,68 +41,153 @@ def kpi(title, value, suffix=""):
     </div>
     """, unsafe_allow_html=True)
 
-def line_card(title, data, x, y, color=QRM_RED, unit="", y_range=None):
-    fig = px.line(data, x=x, y=y, markers=True, color_discrete_sequence=[color])
-    fig.update_traces(line=dict(width=3), marker=dict(size=7))
-    fig.update_layout(margin=dict(l=10,r=10,t=45,b=10), title=title, template="plotly_white",
-                      title_font=dict(color=QRM_LIGHT), xaxis_title=None, yaxis_title=unit)
-    if y_range:
-        fig.update_yaxes(range=y_range)
-    st.plotly_chart(fig, use_container_width=True)
+def line_card(title, data, x, y, color=QRM_RED, unit="", y_range=None, state=None):
+    def build():
+        fig = px.line(data, x=x, y=y, markers=True, color_discrete_sequence=[color])
+        fig.update_traces(line=dict(width=3), marker=dict(size=7))
+        fig.update_layout(margin=dict(l=10,r=10,t=45,b=10), title=title, template="plotly_white",
+                          title_font=dict(color=QRM_LIGHT), xaxis_title=None, yaxis_title=unit)
+        if y_range:
+            fig.update_yaxes(range=y_range)
+        return fig
+    # figure réutilisée tant que (données, filtres) ne changent pas
+    fig = build() if state is None else cached_figure(("line_card", title, y), data_version, state, build)
+    show(title, fig)
+
+def show(name, fig):
+    # la sérialisation Plotly -> navigateur est mesurée à part de la construction
+    with instrument.stage(f"rendu:{name}"):
+        st.plotly_chart(fig, width="stretch")
 
 # =============================
 # SIDEBAR — CHARGEMENT & FILTRES
 # =============================
 st.sidebar.header("Chargement des données")
-up = st.sidebar.file_uploader("//Users//valentin//Desktop//QRM//gps//DATA BRUTES.xlsx", type=["csv","xlsx","xls"])
-if up is None:
-    st.info("Charge un fichier pour commencer. Le tableau détecte automatiquement Joueur, Équipe, Date, Distance, HID (Zone4), HSR (Zone5), etc.")
-    st.stop()
+source = st.sidebar.radio("Source", ["Fichier importé", "Historique partitionné"], horizontal=True)
+pick_teams, d1, d2 = None, None, None
+pushed = source == "Historique partitionné"
 
 def load(file):
-    if file.name.lower().endswith(".csv"):
-        return pd.read_csv(file)
-    xls = pd.ExcelFile(file)
-    return pd.concat([pd.read_excel(file, sheet_name=s) for s in xls.sheet_names], ignore_index=True)
-
-df = load(up)
-
-# Colonnes
-col_player = find_col(df, ["joueur","player","athlete","nom","name"])
-col_team   = find_col(df, ["equipe","team","squad","category","groupe"])
-col_date   = find_col(df, ["date","jour","day"])
-col_distance = find_col(df, ["distance","total distance","km"])
-col_hid = find_col(df, ["hid","zone 4","z4","high intensity distance"])
-col_hsr = find_col(df, ["hsr","zone 5","z5","high speed running"])
-col_vmax = find_col(df, ["vmax","vitesse max","max speed"])
-col_accel = find_col(df, ["accel","accelerations"])
-col_decel = find_col(df, ["decel","decelerations"])
-col_sprint = find_col(df, ["sprint"])
+    # toutes les feuilles concaténées ; le cache Parquet évite de reparser le classeur à chaque rerun
+    if incremental:
+        store = open_store(STORE_DIR)
+        try:
+            store.ingest(file, sheet_name=None)
+            return store.table().copy(deep=False)
+        except KeyError as e:
+            st.sidebar.warning(f"Ingestion incrémentale impossible : {e}")
+    # parse partagé par toutes les sessions qui importent le même fichier
+    return shared_table(file, sheet_name=None)
+
+if pushed:
+    # saisons / équipes / mois : les filtres équipe et période sont poussés dans la lecture
+    with st.sidebar.expander("Ajouter un classeur à l'historique"):
+        new = st.file_uploader("Classeur GPS", type=["csv","xlsx","xls"], key="add_partition")
+        new_team = st.text_input("Équipe (si absente du fichier)", value="Pro")
+        if new is not None and st.button("Ajouter"):
+            st.success(f"{add_workbook(new, team=new_team)} lignes ajoutées.")
+    parts = list_partitions()
+    if parts.empty:
+        st.info("Aucun historique partitionné. Ajoute un classeur avec : python -m qrm.partitions --team Pro \"DATA BRUTES.xlsx\"")
+        st.stop()
+    teams = sorted(parts["team"].unique())
+    pick_teams = st.sidebar.multiselect("Équipe / Groupe", teams, default=teams[:1])
+    months = parts.loc[parts["team"].isin(pick_teams) if pick_teams else slice(None), "month"]
+    dmin = pd.Timestamp(months.min() + "-01")
+    dmax = pd.Timestamp(months.max() + "-01") + pd.offsets.MonthEnd(0)
+    d1, d2 = st.sidebar.date_input("Période", value=(dmin.date(), dmax.date()))
+    with instrument.stage("lecture partitions") as s:
+        df = read_partitions(teams=pick_teams, start=d1, end=d2)
+        s["rows_out"] = len(df)
+    if df.empty:
+        st.warning("Aucune donnée pour cette sélection."); st.stop()
+    data_version = (dataset_version(), tuple(pick_teams), d1, d2)
+else:
+    up = st.sidebar.file_uploader("//Users//valentin//Desktop//QRM//gps//DATA BRUTES.xlsx", type=["csv","xlsx","xls"])
+    incremental = st.sidebar.checkbox("Fusionner avec l'historique (ingestion incrémentale)", value=False)
+    if up is None:
+        st.info("Charge un fichier pour commencer. Le tableau détecte automatiquement Joueur, Équipe, Date, Distance, HID (Zone4), HSR (Zone5), etc.")
+        st.stop()
+    with instrument.stage("ingestion") as s:
+        df = load(up)
+        s["rows_out"] = len(df)
+    data_version = (file_digest(up), open_store(STORE_DIR).version if incremental else None)
+
+# Colonnes (résolues en un seul passage, mémorisées par signature d'en-têtes)
+provider = st.sidebar.text_input("Fournisseur de données", value="", placeholder="ex. Catapult")
+with instrument.stage("mapping colonnes"):
+    cols = resolve(df.columns, provider=provider or None)
+with st.sidebar.expander("Colonnes détectées"):
+    options = ["—"] + [str(c) for c in df.columns]
+    signature = hash(tuple(options))   # un choix manuel ne survit pas à un changement d'en-têtes
+    for f in FIELDS:
+        pick = st.selectbox(f, options, index=options.index(cols[f]) if f in cols else 0, key=f"map_{f}_{signature}")
+        if pick == "—":
+            cols.pop(f, None)
+        else:
+            cols[f] = pick
+    if provider and st.button("Confirmer ce mapping"):
+        confirm(provider, df.columns, cols)
+        st.success(f"Mapping enregistré pour « {provider} ».")
+# un autre mapping donne d'autres tables et figures : il fait partie de la version des données
+data_version = (data_version, tuple(sorted(cols.items())))
+
+col_player = cols.get("player")
+col_team   = cols.get("team")
+col_date   = cols.get("date")
+col_distance = cols.get("distance")
+col_hid = cols.get("hid")
+col_hsr = cols.get("hsr")
+col_vmax = cols.get("vmax")
+col_accel = cols.get("accel")
+col_decel = cols.get("decel")
+col_sprint = cols.get("sprint")
 
 # Etat de forme et RPE
-col_sleep   = find_col(df, ["sommeil","sleep"])
-col_fatigue = find_col(df, ["fatigue"])
-col_pain    = find_col(df, ["douleur","pain"])
-col_motiv   = find_col(df, ["motivation"])
-col_stress  = find_col(df, ["stress"])
-col_rpe     = find_col(df, ["rpe","session rpe","srpe"])
-
-# Dates
-if col_date:
-    df[col_date] = to_datetime_safe(df[col_date])
-
-# Filtres
-if col_team:
-    teams = sorted(df[col_team].dropna().astype(str).unique())
+col_sleep   = cols.get("sleep")
+col_fatigue = cols.get("fatigue")
+col_pain    = cols.get("pain")
+col_motiv   = cols.get("motivation")
+col_stress  = cols.get("stress")
+col_rpe     = cols.get("rpe")
+
+with instrument.stage("types (dates, compact)", rows_in=len(df)):
+    # contrôle qualité (dates illisibles, doublons, valeurs impossibles écartés avec leur motif), puis
+    # types compacts : joueur/équipe en category (filtres sur codes entiers), métriques float32/Int16/Int8.
+    # Table partagée entre sessions, par version (données, mapping)
+    raw = df
+    df, quarantine = checked("hid_hsr", data_version, lambda: raw, cols)
+with st.sidebar.expander("Contrôle qualité"):
+    st.caption(describe(quarantine, len(raw)))
+    if not quarantine.empty:
+        st.dataframe(report(quarantine), width="stretch", hide_index=True)
+        st.dataframe(quarantine, width="stretch", hide_index=True)
+
+# Cube d'agrégats (joueur, équipe, jour) et index trié (équipe, joueur, date), une fois par version des données
+cube = get_cube(df, data_version, cols) if col_player and col_date else None
+index = get_index(df, data_version, cols) if col_player and col_date else None
+
+# Filtres (listes et bornes lues dans l'index ; la sélection se fait par recherche binaire)
+if col_team and not pushed:
+    teams = index.teams() if index is not None else sorted(df[col_team].dropna().unique())
     pick_teams = st.sidebar.multiselect("Équipe / Groupe", teams, default=teams[:1] if teams else [])
-    if pick_teams:
-        df = df[df[col_team].astype(str).isin(pick_teams)]
+    if pick_teams and index is None:
+        df = df[code_mask(df[col_team], pick_teams)]
 
-players = sorted(df[col_player].dropna().astype(str).unique() if col_player else ["—"])
+if index is not None:
+    players = index.players(teams=pick_teams)
+else:
+    players = sorted(df[col_player].dropna().unique() if col_player else ["—"])
 pick_players = st.sidebar.multiselect("Joueurs (pour comparaison)", players, default=players[:1] if players else [])
 player_main = pick_players[0] if pick_players else (players[0] if players else "—")
 
-if col_date and df[col_date].notna().any():
+if pushed:
+    pass   # période déjà appliquée à la lecture des partitions
+elif index is not None:
+    dmin, dmax = index.date_range(teams=pick_teams)
+    if dmin is not None:
+        d1, d2 = st.sidebar.date_input("Période", value=(dmin.date(), dmax.date()))
+elif col_date and df[col_date].notna().any():
     dmin, dmax = df[col_date].min(), df[col_date].max()
     d1, d2 = st.sidebar.date_input("Période", value=(dmin.date(), dmax.date()))
     df = df[(df[col_date] >= pd.to_datetime(d1)) & (df[col_date] <= pd.to_datetime(d2))]
@@ -117,17 +198,29 @@ if col_date and df[col_date].notna().any():
 st.markdown(f"<h1 style='color:{QRM_RED};margin-bottom:0'>Tableau de bord GPS — QRM</h1>", unsafe_allow_html=True)
 st.markdown(f"<p style='color:{QRM_LIGHT};font-size:18px'>Joueur : <b>{player_main}</b></p>", unsafe_allow_html=True)
 
-dplayer = df[df[col_player].astype(str)==str(player_main)] if col_player else df.copy()
+with instrument.stage("filtre joueur / période", rows_in=len(df)) as s:
+    if index is not None:
+        dplayer = index.select(players=[player_main], teams=pick_teams, start=d1, end=d2)
+    else:
+        dplayer = df[code_mask(df[col_player], [player_main])] if col_player else df.copy()
+    s["rows_out"] = len(dplayer)
+sel = dict(teams=pick_teams, start=d1, end=d2)
+# résolution des courbes (jour / semaine / microcycle) : taille des figures bornée quelle que soit la période
+resolution = st.sidebar.selectbox("Résolution des graphiques", list(RESOLUTIONS), format_func=RESOLUTIONS.get)
+matches = match_days(df[col_date], df[cols["session"]]) if col_date and cols.get("session") else ()
+state = (player_main, tuple(pick_teams or ()), d1, d2, resolution)
 
 cK = st.columns(7)
-to_m = lambda s: int(s.sum()) if pd.api.types.is_numeric_dtype(s) else "—"
-with cK[0]: kpi("Distance totale", to_m(dplayer[col_distance]) if col_distance else "—", "m")
-with cK[1]: kpi("Distance HID", to_m(dplayer[col_hid]) if col_hid else "—", "m")
-with cK[2]: kpi("Distance HSR", to_m(dplayer[col_hsr]) if col_hsr else "—", "m")
-with cK[3]: kpi("Vitesse max", round(dplayer[col_vmax].max(),2) if col_vmax else "—", "km/h")
-with cK[4]: kpi("Accélérations", int(dplayer[col_accel].sum()) if col_accel else "—")
-with cK[5]: kpi("Décélérations", int(dplayer[col_decel].sum()) if col_decel else "—")
-with cK[6]: kpi("Sprints", int(dplayer[col_sprint].sum()) if col_sprint else "—")
+with instrument.stage("agrégats KPIs"):
+    tot = cube.totals(players=[player_main], **sel) if cube is not None else pd.Series(dtype=float)
+to_m = lambda m, stat="sum": int(tot[f"{m}_{stat}"]) if f"{m}_{stat}" in tot and pd.notna(tot[f"{m}_{stat}"]) else "—"
+with cK[0]: kpi("Distance totale", to_m("distance"), "m")
+with cK[1]: kpi("Distance HID", to_m("hid"), "m")
+with cK[2]: kpi("Distance HSR", to_m("hsr"), "m")
+with cK[3]: kpi("Vitesse max", round(tot["vmax_max"],2) if "vmax_max" in tot else "—", "km/h")
+with cK[4]: kpi("Accélérations", to_m("accel"))
+with cK[5]: kpi("Décélérations", to_m("decel"))
+with cK[6]: kpi("Sprints", to_m("sprint"))
 
 st.markdown("---")
 
@@ -135,20 +228,20 @@ st.markdown("---")
 # SUIVI JOURNALIER
 # =============================
 st.subheader("📊 Suivi journalier")
-if col_date:
-    dday = dplayer.copy()
-    dday["__jour__"] = dday[col_date].dt.date
+if cube is not None:
+    with instrument.stage("agrégats journaliers") as s:
+        g = cube.rollup(["day"], players=[player_main], **sel).reset_index()
+        how = {c: "sum" for c in ("distance_sum", "hid_sum", "hsr_sum") if c in g}
+        g, res = reduce(g, "day", how, resolution, d1, d2, matches=matches) if how else (g, "jour")
+        s["rows_out"] = len(g)
 
     row1 = st.columns(3)
-    if col_distance:
-        g = dday.groupby("__jour__")[col_distance].sum().reset_index()
-        with row1[0]: line_card("Distance totale (m/jour)", g, "__jour__", col_distance, color=QRM_RED, unit="m")
-    if col_hid:
-        g = dday.groupby("__jour__")[col_hid].sum().reset_index()
-        with row1[1]: line_card("Distance HID (m/jour)", g, "__jour__", col_hid, color=QRM_RED, unit="m")
-    if col_hsr:
-        g = dday.groupby("__jour__")[col_hsr].sum().reset_index()
-        with row1[2]: line_card("Distance HSR (m/jour)", g, "__jour__", col_hsr, color=QRM_YELLOW, unit="m")
+    if "distance" in cube.measures:
+        with row1[0]: line_card(f"Distance totale (m/{UNITS[res]})", g, "day", "distance_sum", color=QRM_RED, unit="m", state=state)
+    if "hid" in cube.measures:
+        with row1[1]: line_card(f"Distance HID (m/{UNITS[res]})", g, "day", "hid_sum", color=QRM_RED, unit="m", state=state)
+    if "hsr" in cube.measures:
+        with row1[2]: line_card(f"Distance HSR (m/{UNITS[res]})", g, "day", "hsr_sum", color=QRM_YELLOW, unit="m", state=state)
 
 st.markdown("---")
 
@@ -158,23 +251,57 @@ st.markdown("---")
 st.subheader("💤 État de forme (Sommeil, Fatigue, Douleurs, Motivation, Stress)")
 well_cols = [("Sommeil", col_sleep), ("Fatigue", col_fatigue), ("Douleurs", col_pain), ("Motivation", col_motiv), ("Stress", col_stress)]
 w_present = [(lbl, c) for lbl,c in well_cols if c is not None and pd.api.types.is_numeric_dtype(dplayer[c])]
-if col_date and w_present:
+def wellness_figure():
     wdf = dplayer[[col_date] + [c for _,c in w_present]].dropna().copy()
     wdf = wdf.rename(columns={c:lbl for lbl,c in w_present}).sort_values(col_date)
+    wdf, _ = reduce(wdf, col_date, {lbl: "mean" for lbl,_ in w_present}, resolution, d1, d2, matches=matches)
     m = wdf.melt(id_vars=[col_date], var_name="Item", value_name="Score")
-    m["Score"] = m["Score"].clip(0, 10)
+    # valeurs hors échelle déjà effacées par le contrôle qualité : plus de clip ici
+    lo, hi, _ = LIMITS["sleep"]
     fig = px.line(m, x=col_date, y="Score", color="Item", markers=True, color_discrete_sequence=PALETTE)
-    fig.update_layout(title="Wellness (échelle 0–10)", yaxis=dict(range=[0,10]))
-    st.plotly_chart(fig, use_container_width=True)
+    fig.update_layout(title=f"Wellness (échelle {lo}–{hi})", yaxis=dict(range=[0,hi]))
+    return fig
+
+def readiness_figure(zr):
+    z = zr[zr["player"] == str(player_main)]
+    if d1 is not None:
+        z = z[(z["day"] >= pd.Timestamp(d1)) & (z["day"] <= pd.Timestamp(d2))]
+    m = z.rename(columns={f"z_{f}": lbl for f, lbl in ITEM_LABELS.items()}).melt(
+        id_vars=["day"], value_vars=[lbl for f, lbl in ITEM_LABELS.items() if f"z_{f}" in z], var_name="Item", value_name="z")
+    fig = px.line(m.dropna(), x="day", y="z", color="Item", markers=True, color_discrete_sequence=PALETTE)
+    fig.add_scatter(x=z["day"], y=z["readiness"], name="Indice de forme", line=dict(color=QRM_DARK, width=4))
+    fig.add_hline(y=ALERT_Z, line_dash="dot", line_color=QRM_RED)
+    fig.update_layout(title=f"Écarts à la référence du joueur ({BASELINE_DAYS} jours, positif = mieux)",
+                      yaxis=dict(range=[-3,3]), xaxis_title=None)
+    return fig
+
+if col_date and w_present:
+    if col_player and st.toggle("Écarts à la référence du joueur (z-scores)", value=False):
+        # z-scores de tout l'historique chargé, une fois par (données, mapping)
+        zr = shared("hid_hsr:readiness", data_version, lambda: zscores(daily_wellness(df, cols)))
+        show("readiness", cached_figure("readiness", data_version, state, lambda: readiness_figure(zr)))
+        with st.expander("Forme de l'effectif (dernier questionnaire de chaque joueur)"):
+            squad = latest(zr[zr["player"].isin([str(p) for p in players])])
+            st.dataframe(squad.rename(columns={"player": "Joueur", "day": "Date", "readiness_index": "Indice de forme",
+                                               **{f"z_{f}": f"z {lbl}" for f, lbl in ITEM_LABELS.items()}})
+                         .drop(columns=[f for f in ITEM_LABELS if f in squad] + ["readiness"])
+                         .round({"Indice de forme": 2, **{f"z {lbl}": 2 for lbl in ITEM_LABELS.values()}}),
+                         width="stretch", hide_index=True)
+    else:
+        show("wellness", cached_figure("wellness", data_version, state, wellness_figure))
 else:
     st.info("Pas de données d'état de forme.")
 
 st.subheader("🔥 RPE (Perception de l'effort)")
-if col_date and col_rpe and pd.api.types.is_numeric_dtype(dplayer[col_rpe]):
+def rpe_figure():
     r = dplayer[[col_date, col_rpe]].dropna().copy().sort_values(col_date).rename(columns={col_rpe:"RPE"})
+    r, res = reduce(r, col_date, {"RPE": "mean"}, resolution, d1, d2, matches=matches)
     fig = px.bar(r, x=col_date, y="RPE", color_discrete_sequence=[QRM_RED])
-    fig.update_layout(title="RPE par jour (0–10)", yaxis=dict(range=[0,10]))
-    st.plotly_chart(fig, use_container_width=True)
+    fig.update_layout(title=f"RPE moyen par {UNITS[res]} (0–10)", yaxis=dict(range=[0,10]))
+    return fig
+
+if col_date and col_rpe and pd.api.types.is_numeric_dtype(dplayer[col_rpe]):
+    show("rpe", cached_figure("rpe", data_version, state, rpe_figure))
 else:
     st.info("Pas de données RPE.")
 
@@ -184,18 +311,33 @@ st.markdown("---")
 # COMPARAISON MULTI-JOUEURS
 # =============================
 st.subheader("👥 Comparaison multi‑joueurs")
-if pick_players:
-    cmp = df[df[col_player].astype(str).isin(pick_players)] if col_player else df.copy()
-    agg = {}
-    if col_distance: agg["Distance (m)"] = cmp.groupby(col_player)[col_distance].sum()
-    if col_hid: agg["HID (m)"] = cmp.groupby(col_player)[col_hid].sum()
-    if col_hsr: agg["HSR (m)"] = cmp.groupby(col_player)[col_hsr].sum()
-    if col_vmax: agg["Vitesse max"] = cmp.groupby(col_player)[col_vmax].max()
-    cmp_df = pd.DataFrame(agg).reset_index().rename(columns={col_player:"Joueur"})
-    st.plotly_chart(px.bar(cmp_df.melt(id_vars="Joueur", var_name="Indicateur", value_name="Valeur"),
-                           x="Joueur", y="Valeur", color="Indicateur",
-                           color_discrete_sequence=PALETTE, barmode="group",
-                           title="Comparaison entre joueurs"),
-                    use_container_width=True)
+def comparison_figure():
+    cmp = cube.rollup(["player"], players=pick_players, **sel)
+    labels = {"distance_sum": "Distance (m)", "hid_sum": "HID (m)", "hsr_sum": "HSR (m)", "vmax_max": "Vitesse max"}
+    cmp_df = cmp[[c for c in labels if c in cmp.columns]].rename(columns=labels)
+    cmp_df = cmp_df.rename_axis("Joueur").reset_index()
+    return px.bar(cmp_df.melt(id_vars="Joueur", var_name="Indicateur", value_name="Valeur"),
+                  x="Joueur", y="Valeur", color="Indicateur",
+                  color_discrete_sequence=PALETTE, barmode="group",
+                  title="Comparaison entre joueurs")
+
+if pick_players and cube is not None:
+    show("comparison", cached_figure("comparison", data_version, state + (tuple(pick_players),), comparison_figure))
 else:
     st.info("Sélectionne au moins un joueur.")
+
+if cube is not None:
+    # repères précalculés sur tout l'effectif (toutes saisons) : centiles par recherche binaire, profils proches
+    pct, profiles = percentile_index(cube, data_version), load_profiles(cube, data_version)
+    with st.expander("Centiles dans l'effectif et profils de charge proches"):
+        with instrument.stage("centiles"):
+            ranks = pct.table(players=pick_players or None, start=d1, end=d2)
+        ranks = ranks[[c for c in ranks.columns if c.endswith("_pct") or c.endswith("_pct_poste")]]
+        st.dataframe(ranks.rename_axis("Joueur").round(0), width="stretch")
+        st.caption("Moyenne par séance sur la période, en centile de toutes les séances de l'effectif (ou du poste).")
+        with instrument.stage("profils proches"):
+            near = profiles.similar(player_main, k=5, end=d2)
+        st.write(f"Joueurs dont les {WINDOW_WEEKS} semaines se rapprochent le plus de celles de {player_main} :")
+        st.dataframe(near.round({"distance": 2}), width="stretch", hide_index=True)
+
+instrument.debug_panel()
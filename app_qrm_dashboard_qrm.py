@@ -3,20 +3,25 @@
 # -*- coding: utf-8 -*-
 import streamlit as st
 import pandas as pd
-import plotly.graph_objects as go
 import base64
+from qrm import instrument
+from qrm.ingest import CACHE_DIR, file_digest
+from qrm.registry import shared, shared_table
+from qrm.incremental import open_store
+from qrm.cube import get_cube
+from qrm.index import get_index
+from qrm.dashboard import INTERNAL, SUM_COLS, WELLNESS_COLS, internal, kpi_values
+from qrm.quality import checked, describe, report
+from qrm.charts import (QRM_RED, QRM_GOLD, cached_figure, detailed_distance_chart, dual_bar,
+                        peak_demands_chart, readiness_bar, sprint_vmax_chart, svg_donut, svg_gauge, wellness_bar)
+from qrm.peaks import PEAK_METRICS, best_peaks, load_peaks, peaks_version
+from qrm.resolution import RESOLUTIONS, UNITS, match_days, reduce
+from qrm.readiness import BASELINE_DAYS, ITEM_LABELS, ITEMS, daily_wellness, zscores
 
 st.set_page_config(page_title="QRM Performance Dashboard", page_icon="⚽", layout="wide")
-
-# -----------------------
-# 🎨 QRM Identity
-# -----------------------
-QRM_RED = "#D60000"
-QRM_GOLD = "#F9B400"
-PRIMARY_GREEN = "#2ECC71"
-PRIMARY_RED = "#E74C3C"
-PRIMARY_BLUE = "#3498DB"
-PRIMARY_GREY = "#BDC3C7"
+instrument.begin("app_qrm_dashboard_qrm.py")   # actif avec QRM_PROFILE=1 ou ?debug=1
+# historique propre à ce tableau de bord : un import exploratoire ne touche pas au magasin de app.py
+STORE_DIR = CACHE_DIR / "store-qrm"
 
 def load_logo_base64():
     logo_file = "Logo QRM.png"
@@ -54,98 +59,6 @@ def header_fixed():
             unsafe_allow_html=True
         )
 
-def kpi_gauge(label, value, suffix="", min_val=0, max_val=100, color=PRIMARY_BLUE):
-    fig = go.Figure()
-    fig.add_trace(go.Bar(
-        x=[value], y=[label], orientation="h",
-        marker=dict(color=color),
-        text=[f"{value:,.0f}{suffix}"], textposition="inside"
-    ))
-    fig.add_trace(go.Bar(
-        x=[max(max_val - value, 0)], y=[label], orientation="h",
-        marker=dict(color=PRIMARY_GREY), showlegend=False
-    ))
-    fig.update_layout(
-        barmode="stack", height=80, margin=dict(l=10,r=10,t=10,b=10),
-        xaxis=dict(range=[min_val, max_val], visible=False),
-        yaxis=dict(visible=False),
-        plot_bgcolor="rgba(0,0,0,0)", paper_bgcolor="rgba(0,0,0,0)",
-        showlegend=False
-    )
-    return fig
-
-def donut(value, total, title, colors=(QRM_GOLD, PRIMARY_GREY)):
-    val = float(value) if value is not None else 0.0
-    # si total absent ou nul, on prend val (ou 1) pour éviter division par zéro
-    tot = float(total) if total not in (None, 0) else (val if val > 0 else 1.0)
-    other = tot - val
-    # si complètement égal, garde une petite part visible pour le second segment
-    if other <= 0:
-        other = max(tot * 0.0001, 0.0001)
-        val = tot - other
-    # construit le donut en s'assurant que les couleurs soient bien passées
-    fig = go.Figure(go.Pie(
-        values=[val, other],
-        labels=[title, ""],
-        hole=0.7,
-        sort=False,
-        direction="clockwise",
-        marker_colors=[colors[0], colors[1]],
-        textinfo="none",
-        hoverinfo="label+value+percent",
-    ))
-    # annotation centrée
-    fig.add_annotation(
-        x=0.5, y=0.5,
-        text=f"<b>{val:,.0f}</b>",
-        showarrow=False,
-        font=dict(size=20, color="#111"),
-        xanchor="center", yanchor="middle"
-    )
-    fig.update_layout(
-        margin=dict(l=5, r=5, t=40, b=5),
-        showlegend=False,
-        height=240,
-        autosize=True,
-        plot_bgcolor="rgba(0,0,0,0)",
-        paper_bgcolor="rgba(0,0,0,0)"
-    )
-    return fig
-
-def dual_bar(x, y1, y2, name1="Accélérations", name2="Décélérations"):
-    fig = go.Figure()
-    fig.add_trace(go.Bar(name=name1, x=x, y=y1, marker_color=PRIMARY_GREEN))
-    fig.add_trace(go.Bar(name=name2, x=x, y=y2, marker_color=PRIMARY_RED))
-    fig.update_layout(barmode="group", height=320, margin=dict(l=10,r=10,t=40,b=10),
-                      plot_bgcolor="rgba(0,0,0,0)", paper_bgcolor="rgba(0,0,0,0)",
-                      legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1))
-    return fig
-
-def wellness_bar(values: dict):
-    items = list(values.keys())
-    vals = [values[k] for k in items]
-    colors = [PRIMARY_GREEN if k in ["Sommeil 1-5","Motivation 1-5"]
-              else PRIMARY_RED if k in ["Fatigue 1-5","Douleurs 1-5","Stress 1-5"]
-              else QRM_GOLD for k in items]
-    fig = go.Figure(go.Bar(
-        x=items, y=vals, marker_color=colors,
-        text=[f"{v:.1f}" for v in vals], textposition="outside"
-    ))
-    fig.update_yaxes(range=[0,5], title="Score /5")
-    fig.update_layout(height=320, margin=dict(l=10,r=10,t=40,b=10),
-                      title="Wellness (scores 1 à 5)")
-    return fig
-
-def rpe_gauge(rpe_value: float):
-    fig = kpi_gauge("RPE", float(rpe_value), suffix=" /10", min_val=0, max_val=10, color=QRM_GOLD)
-    fig.update_layout(
-        title=dict(text="RPE", x=0.5, xanchor="center", y=0.9, yanchor="top", font=dict(size=14)),
-        margin=dict(l=10, r=10, t=40, b=10),
-        height=120,
-        plot_bgcolor="rgba(0,0,0,0)", paper_bgcolor="rgba(0,0,0,0)"
-    )
-    return fig
-
 # ---------- UI ----------
 header_fixed()
 
@@ -153,185 +66,129 @@ with st.sidebar:
     st.subheader("📥 Données")
     uploaded = st.file_uploader("Importer 'DATA BRUTES.xlsx'", type=["xlsx"])
     st.caption("Feuille lue : **DATA (2)**. Les colonnes sont mappées automatiquement.")
+    incremental = st.checkbox("Fusionner avec l'historique (ingestion incrémentale)", value=False)
 
 # Load data
 if uploaded is None:
     st.info("Importe le fichier Excel pour afficher le dashboard.")
     st.stop()
 
-df = pd.read_excel(uploaded, sheet_name="DATA (2)")
-
-# Rename columns to internal names
-df = df.rename(columns={
-    "Player Display Name": "Joueur",
-    "Total Distance": "Distance_Totale",
-    "Distance Zone 4 (Absolute)": "Zone4_Dist",
-    "Distance Zone 5 (Absolute)": "Zone5_Dist",
-    "Accelerations (Absolute)": "Accels",
-    "Decelerations (Absolute)": "Decels",
-    "Max Speed": "Vitesse_Max"
-})
-
-# Ensure Date is datetime
-if "Date" in df.columns:
-    df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
-else:
-    st.error("La colonne 'Date' est manquante."); st.stop()
+with instrument.stage("ingestion") as s:
+    if incremental:
+        store = open_store(STORE_DIR)
+        store.ingest(uploaded, sheet_name="DATA (2)")
+        df = store.table().copy(deep=False)
+    else:
+        # parse partagé par toutes les sessions qui importent le même fichier
+        df = shared_table(uploaded, sheet_name="DATA (2)")
+    s["rows_out"] = len(df)
+
+# Rename columns to internal names (mapping résolu par qrm.schema), contrôle qualité, dates et types compacts
+data_version = (file_digest(uploaded), open_store(STORE_DIR).version if incremental else None)
+try:
+    with instrument.stage("mapping + types", rows_in=len(df)):
+        raw = df
+        df, quarantine = checked("qrm", data_version, lambda: internal(raw), INTERNAL)
+except KeyError as e:
+    st.error(e.args[0]); st.stop()
+with st.sidebar.expander("🧪 Contrôle qualité"):
+    st.caption(describe(quarantine, len(raw)))
+    if not quarantine.empty:
+        st.dataframe(report(quarantine), width="stretch", hide_index=True)
+        st.dataframe(quarantine, width="stretch", hide_index=True)
+
+# Cube d'agrégats et index trié (joueur, date) construits une fois par version des données
+cube = get_cube(df, data_version, INTERNAL)
+index = get_index(df, data_version, INTERNAL)
 
 
 # Sidebar filters (ajout d'un sélecteur de période)
 with st.sidebar:
-    # filtre période
-    col_date = "Date"
-    if col_date in df.columns and df[col_date].notna().any():
-        dmin, dmax = df[col_date].min().date(), df[col_date].max().date()
+    # filtre période (bornes lues dans l'index, sans balayer la colonne Date)
+    sd, ed = None, None
+    dmin, dmax = index.date_range()
+    if dmin is not None:
+        dmin, dmax = dmin.date(), dmax.date()
         start_date, end_date = st.date_input("Période", value=(dmin, dmax), min_value=dmin, max_value=dmax)
-        # filtrer inclusif sur la colonne Date (datetime)
-        df = df[(df[col_date].dt.date >= pd.to_datetime(start_date).date()) & (df[col_date].dt.date <= pd.to_datetime(end_date).date())]
+        sd, ed = min(start_date, end_date), max(start_date, end_date)
 
-    joueurs = sorted(df["Joueur"].dropna().unique().tolist())
+    joueurs = index.players(start=sd, end=ed)
     joueur = st.selectbox("👤 Joueur", joueurs, index=0)
+    resolution = st.selectbox("Résolution des graphiques", list(RESOLUTIONS), format_func=RESOLUTIONS.get)
 
-# Filtrer par joueur
-pdf = df[df["Joueur"] == joueur].copy()
-if pdf.empty:
-    st.warning("Aucune donnée pour ce joueur.")
-    st.stop()
-
-# Appliquer le filtre de période (défini dans la sidebar) — sécurité et conversion date
-if 'start_date' in locals() and 'end_date' in locals():
-    sd = pd.to_datetime(start_date).date()
-    ed = pd.to_datetime(end_date).date()
-    if ed < sd:
-        sd, ed = ed, sd
-    pdf = pdf[(pdf["Date"].dt.date >= sd) & (pdf["Date"].dt.date <= ed)]
-
-# fdf = données finales filtrées (identique à pdf ici)
-fdf = pdf.copy()
+# Joueur + période : tranche de l'index trié (recherche binaire, bornes incluses)
+with instrument.stage("filtre joueur / période", rows_in=len(df)) as s:
+    fdf = index.select(players=[joueur], start=sd, end=ed)
+    s["rows_out"] = len(fdf)
 if fdf.empty:
     st.warning("Aucune donnée pour cette sélection.")
     st.stop()
 
-# Aggregation rules
-sum_cols = ["Distance_Totale","Zone4_Dist","Zone5_Dist","Sprints","Accels","Decels"]
-avg_cols = ["Vitesse_Max","RPE 1-10","Sommeil 1-5","Fatigue 1-5","Stress 1-5","Douleurs 1-5","Motivation 1-5"]
-
-agg = {}
-for c in sum_cols:
-    if c in fdf.columns:
-        agg[c] = float(fdf[c].sum(skipna=True))
-for c in avg_cols:
-    if c in fdf.columns:
-        agg[c] = float(fdf[c].mean(skipna=True))
+# Aggregation rules (lues dans le cube, sans rebalayer les lignes)
+with instrument.stage("agrégats KPIs"):
+    agg = kpi_values(cube, joueur, sd, ed)
 
 # --------- Layout ---------
-# Row 1 KPIs
+# figures réutilisées tant que (données, joueur, période) ne changent pas
+state = (joueur, sd, ed, resolution)
+def plot(kind, build, version=None):
+    fig = cached_figure(kind, data_version if version is None else version, state, build)
+    with instrument.stage(f"rendu:{kind}"):
+        st.plotly_chart(fig, width="stretch")
+
+# Row 1 KPIs (HTML/SVG : pas de figure Plotly pour un seul nombre)
 c1, c2, c3 = st.columns(3)
 with c1:
-    st.plotly_chart(donut(agg.get("Distance_Totale",0), agg.get("Distance_Totale",1), "Distance Totale (m)"),
-                    use_container_width=True)
+    st.markdown(svg_donut(agg.get("Distance_Totale",0), agg.get("Distance_Totale",1), "Distance Totale (m)"),
+                unsafe_allow_html=True)
     st.metric("Distance totale (m)", f"{agg.get('Distance_Totale',0):.0f}")
 
 with c2:
     hid_val = agg.get("Zone4_Dist",0)
-    st.plotly_chart(kpi_gauge("HID (Zone 4)", hid_val, " m",
-                              0, max(2000, hid_val*1.2 if hid_val else 2000), QRM_GOLD),
-                    use_container_width=True)
+    st.markdown(svg_gauge("HID (Zone 4)", hid_val, " m",
+                          0, max(2000, hid_val*1.2 if hid_val else 2000), QRM_GOLD),
+                unsafe_allow_html=True)
     st.metric("HID (m)", f"{hid_val:.0f}")
 
 with c3:
     hsr_val = agg.get("Zone5_Dist",0)
-    st.plotly_chart(kpi_gauge("HSR (Zone 5)", hsr_val, " m",
-                              0, max(1200, hsr_val*1.2 if hsr_val else 1200), QRM_RED),
-                    use_container_width=True)
+    st.markdown(svg_gauge("HSR (Zone 5)", hsr_val, " m",
+                          0, max(1200, hsr_val*1.2 if hsr_val else 1200), QRM_RED),
+                unsafe_allow_html=True)
     st.metric("HSR (m)", f"{hsr_val:.0f}")
 
 st.divider()
 
+# Séries jour / semaine / microcycle selon la période (volumes sommés, vitesse max au maximum)
+with instrument.stage("résolution des séries", rows_in=len(fdf)) as s:
+    matches = match_days(df["Date"], df["Session"]) if "Session" in df else ()
+    how = {c: "sum" for c in SUM_COLS if c in fdf}
+    if "Vitesse_Max" in fdf:
+        how["Vitesse_Max"] = "max"
+    fdays, res = reduce(fdf.sort_values("Date"), "Date", how, resolution, sd, ed, matches=matches)
+    s["rows_out"] = len(fdays)
+
 # Row 2: Sprints/Vmax and Acc/Dec
 c4, c5 = st.columns([1.2,1])
 with c4:
-    fig = go.Figure()
-    # x-axis depends on view
-    if sd == "Journalier":
-        x = fdf["Date"]
-    else:
-        x = fdf["Date"]  # keep daily points within selected week
-    fig.add_trace(go.Bar(x=x, y=fdf["Sprints"], name="Sprints", marker_color=QRM_RED))
-    if "Vitesse_Max" in fdf.columns:
-        fig.add_trace(go.Scatter(x=x, y=fdf["Vitesse_Max"], name="Vitesse max (km/h)",
-                                 mode="lines+markers", yaxis="y2", line=dict(color=QRM_GOLD)))
-    fig.update_layout(
-        title="Sprints & Vitesse maximale",
-        yaxis=dict(title="Sprints"),
-        yaxis2=dict(title="Vitesse max (km/h)", overlaying="y", side="right"),
-        height=360, margin=dict(l=10,r=10,t=40,b=10),
-        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
-        plot_bgcolor="rgba(0,0,0,0)", paper_bgcolor="rgba(0,0,0,0)",
-    )
-    st.plotly_chart(fig, use_container_width=True)
+    plot("sprint_vmax", lambda: sprint_vmax_chart(fdays))
 
 with c5:
-    fig = dual_bar(fdf["Date"], fdf.get("Accels",0), fdf.get("Decels",0))
-    fig.update_layout(title="Accélérations & Décélérations")
-    st.plotly_chart(fig, use_container_width=True)
+    plot("acc_dec", lambda: dual_bar(fdays["Date"], fdays.get("Accels",0), fdays.get("Decels",0),
+                                     title=f"Accélérations & Décélérations (par {UNITS[res]})"))
 
 st.divider()
 
 # === Nouveau graphique détaillé : Distance Totale / HID / HSR (jour par jour) ===
 # affiché en pleine largeur sous Row 2
-def detailed_distance_chart(df_days):
-    x = pd.to_datetime(df_days["Date"])
-    fig = go.Figure()
-
-    # Barres : Distance Totale / HID / HSR
-    if "Distance_Totale" in df_days.columns:
-        fig.add_trace(go.Bar(
-            x=x,
-            y=df_days["Distance_Totale"].fillna(0),
-            name="Distance Totale (m)",
-            marker_color=QRM_GOLD
-        ))
-
-    if "Zone4_Dist" in df_days.columns:
-        fig.add_trace(go.Bar(
-            x=x,
-            y=df_days["Zone4_Dist"].fillna(0),
-            name="HID - Zone 4 (m)",
-            marker_color=QRM_RED
-        ))
-
-    if "Zone5_Dist" in df_days.columns:
-        fig.add_trace(go.Bar(
-            x=x,
-            y=df_days["Zone5_Dist"].fillna(0),
-            name="HSR - Zone 5 (m)",
-            marker_color=PRIMARY_BLUE
-        ))
-
-    # Mise en forme
-    fig.update_layout(
-        title="Distance Totale, HID et HSR (jour par jour)",
-        barmode="group",  # groupé (barres côte à côte)
-        xaxis=dict(title="Date"),
-        yaxis=dict(title="Distance (m)", showgrid=False),
-        legend=dict(
-            orientation="h",
-            yanchor="bottom",
-            y=1.02,
-            xanchor="right",
-            x=1
-        ),
-        margin=dict(l=10, r=60, t=40, b=40),
-        height=420,
-        plot_bgcolor="rgba(0,0,0,0)",
-        paper_bgcolor="rgba(0,0,0,0)"
-    )
-
-    return fig
-
-# Affichage du graphique
-st.plotly_chart(detailed_distance_chart(fdf.sort_values("Date")), use_container_width=True)
+plot("distance_detail", lambda: detailed_distance_chart(fdays))
+
+# Pics d'intensité 1/3/5 min, calculés depuis les traces brutes (python -m qrm.traces --store)
+pv = peaks_version()
+if pv:
+    best = best_peaks(load_peaks(), [joueur], sd, ed)
+    if not best.empty:
+        plot("peaks", lambda: peak_demands_chart(best, PEAK_METRICS), version=(data_version, pv))
 
 st.divider()
 
@@ -339,14 +196,29 @@ st.divider()
 # Row 3: Wellness & RPE
 c6, c7 = st.columns([1.4,0.8])
 with c6:
-    w_cols = ["Sommeil 1-5","Fatigue 1-5","Stress 1-5","Douleurs 1-5","Motivation 1-5"]
-    w_vals = {c: float(fdf[c].mean()) for c in w_cols if c in fdf.columns}
-    st.plotly_chart(wellness_bar(w_vals), use_container_width=True)
+    if st.toggle("Écarts à la référence du joueur (z-scores)", value=False):
+        # z-scores de tout l'historique, calculés une fois par version des données
+        zr = shared("qrm:readiness", data_version, lambda: zscores(daily_wellness(df, INTERNAL)))
+        upto = pd.Timestamp(ed) if ed else zr["day"].max()
+        last = zr[(zr["player"] == str(joueur)) & (zr["day"] <= upto)].tail(1)
+        if last.empty:
+            st.info("Pas de questionnaire pour ce joueur sur la période.")
+        else:
+            r = last.iloc[0]
+            z_vals = {ITEM_LABELS[f]: r[f"z_{f}"] for f in ITEMS if f"z_{f}" in r}
+            plot("readiness", lambda: readiness_bar(z_vals, r["readiness_index"]))
+            st.caption(f"Dernier questionnaire : {r['day']:%d/%m/%Y} — référence : {BASELINE_DAYS} jours précédents.")
+    else:
+        w_vals = {c: agg[c] for c in WELLNESS_COLS if c in agg}
+        plot("wellness", lambda: wellness_bar(w_vals))
 
 with c7:
-    rpe_val = float(fdf["RPE 1-10"].mean()) if "RPE 1-10" in fdf.columns else 0.0
-    st.plotly_chart(rpe_gauge(rpe_val), use_container_width=True)
+    rpe_val = agg.get("RPE 1-10", 0.0)
+    st.markdown(svg_gauge("RPE", rpe_val if pd.notna(rpe_val) else 0.0, " /10", 0, 10, QRM_GOLD),
+                unsafe_allow_html=True)
 
 st.divider()
 st.subheader("Données sélectionnées")
 st.dataframe(fdf.reset_index(drop=True))
+
+instrument.debug_panel()
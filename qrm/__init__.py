@@ -0,0 +1 @@
+"""Couche données partagée par les tableaux de bord QRM (app.py et app_qrm_dashboard_*.py)."""
@@ -0,0 +1,260 @@
+# -*- coding: utf-8 -*-
+"""Moteur d'alertes déclaratif : règles dans RULES_FILE, évaluées en bloc sur la table des séances.
+
+Une règle porte sur un champ logique (qrm.schema : hsr, hid, vmax, rpe,
+pain…) et compare chaque séance à un seuil :
+
+- "threshold" : valeur <op> seuil (ex. douleurs >= 4) ;
+- "relative"  : valeur <op> seuil × référence du joueur, la référence étant
+  sa moyenne ("mean"), son record ("max") ou la moyenne de ses `window`
+  séances précédentes ("rolling") — baisse de HSR, de vitesse max, pic de RPE ;
+- "acwr"      : dernier ACWR EWMA du joueur (qrm.workload) <op> seuil.
+
+Le seuil peut être précisé par poste ("by_position", postes des joueurs
+dans "positions") puis par joueur ("by_player"). Chaque règle est une
+comparaison vectorisée sur des tableaux numpy (un seuil par ligne), toutes
+les règles dans le même passage.
+
+AlertEngine est incrémental : seules les séances nouvelles ou modifiées
+(hash de la ligne) passent les seuils fixes et les fenêtres "rolling" (qui
+ne dépendent que du passé), avec les références du joueur tenues à jour
+(sommes, effectifs, records). Une moyenne ou un record qui bouge change le
+verdict des séances déjà vues : les règles "mean" / "max" sont réévaluées
+sur tout l'historique des joueurs du lot, si bien que le résultat ne dépend
+ni de l'ordre d'arrivée des séances ni de la durée de vie du processus.
+"""
+import json
+import operator
+import os
+import threading
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from qrm.instrument import stage
+
+RULES_FILE = Path(os.environ.get("QRM_ALERTS_FILE", "alertes.json"))
+KINDS = ("threshold", "relative", "acwr")
+BASELINES = ("mean", "max", "rolling")
+OPS = {"<": operator.lt, "<=": operator.le, ">": operator.gt, ">=": operator.ge}
+SEVERITIES = ("alerte", "attention", "info")
+COLUMNS = ["date", "player", "session", "rule", "label", "severity", "value", "limit"]
+
+_engines = {}
+_engines_lock = threading.Lock()
+
+
+def load_rules(path=None):
+    """Configuration validée ({"positions": {...}, "rules": [...]}) ; ValueError si une règle est invalide."""
+    path = Path(path or RULES_FILE)
+    config = json.loads(path.read_text(encoding="utf-8")) if path.exists() else {"rules": []}
+    config.setdefault("positions", {})
+    for rule in config.setdefault("rules", []):
+        rid = rule.get("id", "?")
+        if rule.get("kind") not in KINDS:
+            raise ValueError(f"Règle {rid} : type {rule.get('kind')!r} inconnu ({', '.join(KINDS)}).")
+        if rule.get("op") not in OPS:
+            raise ValueError(f"Règle {rid} : opérateur {rule.get('op')!r} inconnu ({', '.join(OPS)}).")
+        if rule["kind"] == "relative" and rule.get("baseline") not in BASELINES:
+            raise ValueError(f"Règle {rid} : référence {rule.get('baseline')!r} inconnue ({', '.join(BASELINES)}).")
+        rule.setdefault("label", rid)
+        rule.setdefault("severity", "attention")
+        rule.setdefault("window", 5)
+    return config
+
+def thresholds(rule, names, positions):
+    """Seuil par joueur de `names` : défaut, puis poste, puis joueur."""
+    by_position, by_player = rule.get("by_position", {}), rule.get("by_player", {})
+    return np.array([by_player.get(p, by_position.get(positions.get(p), rule["threshold"])) for p in names],
+                    dtype="float64")
+
+def _on_stats(rule):
+    """Règle dont la référence (moyenne, record) porte sur tout l'historique du joueur."""
+    return rule["kind"] == "relative" and rule["baseline"] in ("mean", "max")
+
+def _hits(parts, rules):
+    """(table règle / libellé / gravité / valeur / limite, positions des lignes) des règles déclenchées."""
+    which = np.concatenate([np.full(len(pos), k) for k, pos, _, _ in parts])
+    meta = np.array([(r["id"], r["label"], r["severity"]) for r in rules], dtype=object)[which]
+    out = pd.DataFrame({"rule": meta[:, 0], "label": meta[:, 1], "severity": meta[:, 2],
+                        "value": np.concatenate([v for _, _, v, _ in parts]),
+                        "limit": np.concatenate([lim for _, _, _, lim in parts])})
+    return out, np.concatenate([pos for _, pos, _, _ in parts])
+
+
+class AlertEngine:
+    def __init__(self, config):
+        self.config = config
+        self.rules = [r for r in config["rules"] if r["kind"] != "acwr"]
+        self.fields = sorted({r["field"] for r in self.rules})
+        self._index = None        # clé de séance (hash) -> hash de ligne, joueur, date, valeurs des champs
+        self._stats = None        # joueur -> <champ>__sum / __count / __max
+        self._alerts = pd.DataFrame(columns=["__key__"] + COLUMNS)
+        self.skipped = []         # règles dont le champ est absent des données
+        self.version = None
+        self.lock = threading.Lock()
+
+    @property
+    def alerts(self):
+        return self._alerts[COLUMNS].sort_values(["date", "player"], ascending=[False, True]).reset_index(drop=True)
+
+    # ---------- références par joueur ----------
+    def _accumulate(self, rows, sign):
+        g = rows.groupby("player", observed=True)[self._present]
+        agg = pd.concat([g.sum().add_suffix("__sum"), g.count().add_suffix("__count")], axis=1) * sign
+        self._stats = agg if self._stats is None else self._stats.add(agg, fill_value=0)
+
+    def _update_max(self, rows, replaced_players):
+        best = rows.groupby("player", observed=True)[self._present].max().add_suffix("__max")
+        if len(replaced_players):
+            # un record corrigé ne se retire pas d'un max : on le recalcule pour ces joueurs
+            mine = self._index[self._index["player"].isin(replaced_players)]
+            exact = mine.groupby("player", observed=True)[self._present].max().add_suffix("__max")
+            self._stats.loc[exact.index, exact.columns] = exact
+        for c in best.columns.difference(self._stats.columns):
+            self._stats[c] = np.nan
+        cur = self._stats.loc[best.index, best.columns]
+        self._stats.loc[best.index, best.columns] = np.fmax(cur.to_numpy("float64"), best.to_numpy("float64"))
+
+    def _baseline(self, rule, rows, stats, codes):
+        f = rule["field"]
+        if rule["baseline"] == "rolling":
+            return self._previous_mean(f, rule["window"], rows)
+        if rule["baseline"] == "max":
+            return stats[f"{f}__max"].to_numpy("float64")[codes]
+        count = stats[f"{f}__count"].to_numpy("float64")
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(count > 0, stats[f"{f}__sum"].to_numpy("float64") / count, np.nan)[codes]
+
+    def _previous_mean(self, f, window, rows):
+        """Moyenne des `window` séances précédentes (toutes renseignées), aux seules lignes `rows`.
+
+        Historique des joueurs concernés trié par (joueur, date), sommes cumulées :
+        fenêtre = cs[i] - cs[i - window], valide si elle reste dans le joueur.
+        """
+        mine = self._index[self._index["player"].isin(rows["player"].unique())]
+        order = np.lexsort((mine["date"].to_numpy(), mine["player"].to_numpy()))
+        player, v = mine["player"].to_numpy()[order], mine[f].to_numpy("float64")[order]
+        cs = np.concatenate([[0.0], np.cumsum(np.nan_to_num(v))])
+        cn = np.concatenate([[0], np.cumsum(~np.isnan(v))])
+        first = np.flatnonzero(np.r_[True, player[1:] != player[:-1]])
+        start = first[np.searchsorted(first, np.arange(len(v)), side="right") - 1]
+        i = pd.Index(mine.index[order]).get_indexer(rows.index)
+        lo = i - window
+        ok = (lo >= start[i]) & (cn[i] - cn[np.maximum(lo, 0)] == window)
+        return np.where(ok, (cs[i] - cs[np.maximum(lo, 0)]) / window, np.nan)
+
+    # ---------- évaluation ----------
+    def evaluate(self, rows, which=None):
+        """Alertes des lignes `rows` (colonnes player, date, session + champs), règles retenues par `which`."""
+        names, codes = np.unique(rows["player"].to_numpy(str), return_inverse=True)
+        stats = self._stats.reindex(names)
+        parts = []
+        for k, rule in enumerate(self.rules):
+            if rule["field"] not in rows or (which is not None and not which(rule)):
+                continue
+            value = rows[rule["field"]].to_numpy("float64")
+            limit = thresholds(rule, names, self.config["positions"])[codes]
+            if rule["kind"] == "relative":
+                limit = limit * self._baseline(rule, rows, stats, codes)
+            with np.errstate(invalid="ignore"):
+                hit = np.flatnonzero(OPS[rule["op"]](value, limit) & ~np.isnan(value) & ~np.isnan(limit))
+            if len(hit):
+                parts.append((k, hit, value[hit], limit[hit]))
+        if not parts:
+            return self._alerts.iloc[:0]
+        out, pos = _hits(parts, self.rules)
+        out.insert(0, "session", rows["session"].to_numpy()[pos])
+        out.insert(0, "player", rows["player"].to_numpy()[pos])
+        out.insert(0, "date", rows["date"].to_numpy()[pos])
+        out.insert(0, "__key__", rows.index.to_numpy()[pos])
+        return out
+
+    def update(self, df, columns):
+        """Évalue les séances nouvelles ou modifiées de `df` ; retourne leur nombre."""
+        self._present = [f for f in self.fields if columns.get(f) in df.columns]
+        self.skipped = [r["id"] for r in self.rules if r["field"] not in self._present]
+        rows = pd.DataFrame({"player": df[columns["player"]].astype(str).to_numpy(),
+                             "date": df[columns["date"]].to_numpy("datetime64[ns]"),
+                             "session": (df[columns["session"]].astype(str).to_numpy() if "session" in columns
+                                         else "")})
+        for f in self._present:
+            rows[f] = pd.to_numeric(df[columns[f]], errors="coerce").astype("float64").to_numpy()
+        keys = pd.util.hash_pandas_object(rows[["player", "date", "session"]], index=False).to_numpy(np.uint64)
+        rows["__row__"] = pd.util.hash_pandas_object(rows, index=False).to_numpy(np.uint64)
+        rows.index = pd.Index(keys, name="__key__")
+        rows = rows[~rows.index.duplicated(keep="last")]
+
+        with self.lock:
+            replaced = None
+            if self._index is not None:
+                pos = self._index.index.get_indexer(rows.index)
+                known = pos >= 0
+                changed = ~known
+                changed[known] = self._index["__row__"].to_numpy()[pos[known]] != rows["__row__"].to_numpy()[known]
+                rows = rows[changed]
+                replaced = self._index.iloc[pos[changed & known]]
+            if rows.empty:
+                return 0
+            if replaced is not None and len(replaced):
+                self._accumulate(replaced, -1)
+                self._index = self._index.drop(replaced.index)
+                self._alerts = self._alerts[~self._alerts["__key__"].isin(replaced.index)]
+            self._index = rows if self._index is None else pd.concat([self._index, rows])
+            self._accumulate(rows, 1)
+            self._update_max(rows, replaced["player"].unique() if replaced is not None else [])
+            fresh = [self.evaluate(rows, lambda r: not _on_stats(r))]
+            # moyennes et records des joueurs du lot ont bougé : toutes leurs séances repassent ces règles
+            players = rows["player"].unique()
+            stale = self._alerts["player"].isin(players) & self._alerts["rule"].isin(
+                [r["id"] for r in self.rules if _on_stats(r)])
+            fresh.append(self.evaluate(self._index[self._index["player"].isin(players)], _on_stats))
+            kept = [f for f in [self._alerts[~stale]] + fresh if len(f)]
+            self._alerts = pd.concat(kept, ignore_index=True) if kept else self._alerts.iloc[:0]
+        return len(rows)
+
+    def workload_alerts(self, wl):
+        """Règles "acwr" sur le dernier ACWR EWMA de chaque (joueur, indicateur) de compute_workload."""
+        from qrm.workload import latest
+
+        last = latest(wl)
+        rules = [r for r in self.config["rules"] if r["kind"] == "acwr"]
+        names, codes = np.unique(last["player"].to_numpy(str), return_inverse=True)
+        metric = last["metric"].to_numpy()
+        value = last["ewma_acwr"].to_numpy("float64")
+        parts = []
+        for k, rule in enumerate(rules):
+            limit = thresholds(rule, names, self.config["positions"])[codes]
+            with np.errstate(invalid="ignore"):
+                hit = np.flatnonzero((metric == rule["field"]) & OPS[rule["op"]](value, limit) & ~np.isnan(value))
+            if len(hit):
+                parts.append((k, hit, value[hit], limit[hit]))
+        if not parts:
+            return pd.DataFrame(columns=COLUMNS)
+        out, pos = _hits(parts, rules)
+        out.insert(0, "session", "")
+        out.insert(0, "player", last["player"].to_numpy()[pos])
+        out.insert(0, "date", last["day"].to_numpy()[pos])
+        return out
+
+
+def alert_engine(name="app", path=None):
+    """Moteur partagé par le processus ; recréé si le fichier de règles a changé."""
+    path = Path(path or RULES_FILE)
+    stamp = path.stat().st_mtime_ns if path.exists() else None
+    with _engines_lock:
+        engine = _engines.get(name)
+        if engine is None or engine.stamp != stamp:
+            engine = _engines[name] = AlertEngine(load_rules(path))
+            engine.stamp = stamp
+        return engine
+
+def squad_alerts(name, version, df, columns, path=None):
+    """Alertes de séance, réévaluées seulement si la version des données a changé (nouvelles séances seules)."""
+    engine = alert_engine(name, path)
+    if engine.version != version:
+        with stage("alertes : évaluation", rows_in=len(df)) as s:
+            s["rows_out"] = engine.update(df, columns)
+        engine.version = version
+    return engine
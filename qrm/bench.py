@@ -0,0 +1,277 @@
+# -*- coding: utf-8 -*-
+"""Banc d'essai des chaînes de données des trois applications.
+
+Génère un effectif synthétique (qrm.synthetic) de la taille demandée, l'écrit
+au format du classeur, puis rejoue pour chaque application les étapes de son
+script : chargement (à froid puis depuis le cache Parquet), mapping des
+colonnes, index / cube, filtres de la barre latérale, agrégats (KPIs, alertes,
+charge) et construction des figures. Chaque étape est chronométrée (meilleur
+de `repeat` passages), puis rejouée une fois sous tracemalloc pour le pic
+mémoire Python.
+
+Les résultats sont ajoutés à BENCH_FILE (une ligne JSON par étape, avec la
+révision git et la taille) et comparés au dernier passage de même taille
+d'une autre révision : une étape 20 % plus lente est signalée.
+
+    python -m qrm.bench --players 25 --sessions 120 --seasons 3
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import pandas as pd
+
+from qrm.ingest import CACHE_DIR
+
+BENCH_FILE = Path(os.environ.get("QRM_BENCH_FILE", CACHE_DIR / "bench.jsonl"))
+OUTPUT = "bench_output.txt"
+REGRESSION = 1.2
+
+
+def revision():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True)
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "inconnue"
+
+
+# =============================
+# MESURE
+# =============================
+def measure(fn, repeat=3):
+    """(meilleur temps en s, pic mémoire Python en Mo, résultat)."""
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    tracemalloc.start()
+    try:
+        out = fn()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return best, peak / 2**20, out
+
+
+# =============================
+# ÉTAPES PAR APPLICATION
+# =============================
+def _app_stages(path, tmp):
+    """app.py : magasin incrémental, page Données GPS, Alertes, ACWR."""
+    import plotly.express as px
+
+    from qrm.cube import build_cube
+    from qrm.incremental import IncrementalStore
+    from qrm.model import compact
+    from qrm.schema import resolve
+    from qrm.workload import compute_workload
+
+    state = {}
+    def load():
+        store = IncrementalStore(Path(tempfile.mkdtemp(dir=tmp)))
+        store.ingest(path, sheet_name=0)
+        table = store.table()
+        state["store"] = store
+        state["df"] = compact(table, resolve(table.columns))
+        return state["df"]
+    def filter_():
+        df, C = state["df"], resolve(state["df"].columns)
+        players = list(df[C["player"]].cat.categories[:3])
+        return df[df[C["player"]].isin(players)]
+    def alerts():
+        df, C = state["df"], resolve(state["df"].columns)
+        mean = df[C["player"]].map(state["store"].player_means()[C["hsr"]]).astype("float64")
+        return df[df[C["hsr"]] < 0.8 * mean]
+    def workload():
+        df = state["df"]
+        state["wl"] = compute_workload(build_cube(df, resolve(df.columns)))
+        return state["wl"]
+    def figures():
+        df, C = state["df"], resolve(state["df"].columns)
+        data = filter_()
+        wl = state["wl"]
+        return (px.bar(data, x=C["session"], y=[C["distance"], C["hid"], C["hsr"]], barmode="group"),
+                px.line(wl[wl["metric"] == "hsr"], x="day", y="ewma_acwr", color="player"))
+    return [("chargement (magasin)", load), ("filtres", filter_), ("agrégats (alertes)", alerts),
+            ("agrégats (ACWR)", workload), ("figures", figures)]
+
+def _hid_hsr_stages(path, tmp):
+    """app_qrm_dashboard_hid_hsr.py : mapping, cube + index, tranche joueur, KPIs, figures."""
+    import plotly.express as px
+
+    from qrm.cube import build_cube
+    from qrm.index import SessionIndex
+    from qrm.ingest import ensure_cached, parse_source, read_table
+    from qrm.model import compact
+    from qrm.schema import _resolve_headers, resolve
+
+    ensure_cached(path, sheet_name=None)   # « chargement (cache) » mesure la lecture Parquet seule
+    state = {}
+    def load_cold():
+        return parse_source(path, sheet_name=None)
+    def load_cached():
+        state["raw"] = read_table(path, sheet_name=None)
+        return state["raw"]
+    def mapping():
+        _resolve_headers.cache_clear()
+        state["cols"] = resolve(state["raw"].columns)
+        return state["cols"]
+    def model():
+        df, cols = state["raw"].copy(), state["cols"]
+        df[cols["date"]] = pd.to_datetime(df[cols["date"]], errors="coerce")
+        df = compact(df, cols)
+        state["cube"], state["index"] = build_cube(df, cols), SessionIndex(df, cols)
+        return df
+    def filter_():
+        index = state["index"]
+        player = index.players()[0]
+        start, end = index.date_range()
+        state["sel"] = dict(players=[player], start=end - pd.Timedelta(days=60), end=end)
+        state["dplayer"] = index.select(**state["sel"])
+        return state["dplayer"]
+    def aggregate():
+        cube = state["cube"]
+        return cube.totals(**state["sel"]), cube.rollup(["player"], start=state["sel"]["start"])
+    def figures():
+        d, cols = state["dplayer"], state["cols"]
+        return (px.line(d, x=cols["date"], y=cols["distance"], markers=True),
+                px.bar(d.dropna(subset=[cols["rpe"]]), x=cols["date"], y=cols["rpe"]))
+    return [("chargement à froid", load_cold), ("chargement (cache)", load_cached), ("mapping colonnes", mapping),
+            ("cube + index", model), ("filtres", filter_), ("agrégats", aggregate), ("figures", figures)]
+
+def _qrm_stages(path, tmp):
+    """app_qrm_dashboard_qrm.py : préparation, cube + index, tranche joueur, kpi_values, figures."""
+    from qrm.charts import detailed_distance_chart, dual_bar, sprint_vmax_chart, wellness_bar
+    from qrm.cube import build_cube
+    from qrm.dashboard import INTERNAL, WELLNESS_COLS, kpi_values, prepare
+    from qrm.index import SessionIndex
+    from qrm.ingest import ensure_cached, read_table
+
+    ensure_cached(path, sheet_name=None)
+    state = {}
+    def load():
+        state["df"] = prepare(read_table(path, sheet_name=None))
+        return state["df"]
+    def model():
+        df = state["df"]
+        state["cube"], state["index"] = build_cube(df, INTERNAL), SessionIndex(df, INTERNAL)
+    def filter_():
+        index = state["index"]
+        state["player"] = index.players()[0]
+        state["period"] = index.date_range()
+        state["fdf"] = index.select(players=[state["player"]], start=state["period"][0], end=state["period"][1])
+        return state["fdf"]
+    def aggregate():
+        state["agg"] = kpi_values(state["cube"], state["player"], *state["period"])
+        return state["agg"]
+    def figures():
+        fdf, agg = state["fdf"], state["agg"]
+        return (sprint_vmax_chart(fdf), dual_bar(fdf["Date"], fdf["Accels"], fdf["Decels"]),
+                detailed_distance_chart(fdf.sort_values("Date")),
+                wellness_bar({c: agg[c] for c in WELLNESS_COLS if c in agg}))
+    return [("chargement (cache)", load), ("cube + index", model), ("filtres", filter_),
+            ("agrégats", aggregate), ("figures", figures)]
+
+APPS = {"app.py": _app_stages, "app_qrm_dashboard_hid_hsr.py": _hid_hsr_stages,
+        "app_qrm_dashboard_qrm.py": _qrm_stages}
+
+
+# =============================
+# PASSAGE COMPLET
+# =============================
+def run(players=25, sessions=120, seasons=1, repeat=3, fmt="xlsx", apps=None):
+    """Mesure toutes les étapes ; retourne un DataFrame (une ligne par application / étape)."""
+    from qrm.synthetic import synthetic_squad, write_workbook
+
+    df = synthetic_squad(players, sessions, seasons)
+    meta = {"revision": revision(), "date": pd.Timestamp.now().isoformat(timespec="seconds"),
+            "players": players, "sessions": sessions, "seasons": seasons, "rows": len(df), "format": fmt,
+            "python": platform.python_version(), "pandas": pd.__version__}
+    rows = []
+    import qrm.ingest
+    saved = qrm.ingest.CACHE_DIR
+    with tempfile.TemporaryDirectory() as tmp:
+        # cache Parquet isolé : le classeur synthétique ne pollue pas .cache/qrm
+        qrm.ingest.CACHE_DIR = Path(tmp)
+        try:
+            path = write_workbook(df, str(Path(tmp) / f"synthetique.{fmt}"))
+            for app in apps or APPS:
+                for stage, fn in APPS[app](path, tmp):
+                    seconds, peak_mb, _ = measure(fn, repeat)
+                    rows.append({**meta, "app": app, "stage": stage, "seconds": seconds, "peak_mb": peak_mb})
+        finally:
+            qrm.ingest.CACHE_DIR = saved
+    return pd.DataFrame(rows)
+
+def save(results, path=BENCH_FILE):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("a", encoding="utf-8") as fh:
+        for rec in results.to_dict("records"):
+            fh.write(json.dumps(rec, ensure_ascii=False) + "\n")
+
+def history(path=BENCH_FILE):
+    path = Path(path)
+    if not path.exists():
+        return pd.DataFrame()
+    return pd.read_json(path, lines=True, dtype={"revision": str})
+
+def compare(results, past):
+    """Ajoute le temps du dernier passage de même taille (autre révision) et le ratio."""
+    size = ["players", "sessions", "seasons", "format"]
+    out = results.copy()
+    out["précédent"] = float("nan")
+    if past.empty:
+        return out.assign(ratio=float("nan"), régression=False)
+    same = past.merge(results[size].drop_duplicates(), on=size)
+    same = same[same["revision"] != results["revision"].iloc[0]]
+    if not same.empty:
+        last = same[same["date"] == same["date"].max()].set_index(["app", "stage"])["seconds"]
+        out["précédent"] = out.set_index(["app", "stage"]).index.map(last)
+    out["ratio"] = out["seconds"] / out["précédent"]
+    out["régression"] = out["ratio"] > REGRESSION
+    return out
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Banc d'essai des chaînes de données QRM (données synthétiques).")
+    parser.add_argument("--players", type=int, default=25)
+    parser.add_argument("--sessions", type=int, default=120, help="séances par saison")
+    parser.add_argument("--seasons", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--format", choices=["xlsx", "csv"], default="xlsx")
+    parser.add_argument("--app", action="append", choices=list(APPS), help="limiter à une application (répétable)")
+    parser.add_argument("--no-save", action="store_true", help="ne pas ajouter les résultats à l'historique")
+    args = parser.parse_args(argv)
+
+    results = run(args.players, args.sessions, args.seasons, args.repeat, args.format, args.app)
+    table = compare(results, history())
+    if not args.no_save:
+        save(results)
+    meta = results.iloc[0]
+    lines = [f"révision {meta['revision']} — {meta['rows']} lignes "
+             f"({args.players} joueurs × {args.sessions} séances × {args.seasons} saisons, {args.format})", ""]
+    show = table[["app", "stage", "seconds", "peak_mb", "précédent", "ratio"]].copy()
+    show["seconds"] = (show["seconds"] * 1000).round(1)
+    show["précédent"] = (show["précédent"] * 1000).round(1)
+    show = show.rename(columns={"seconds": "ms", "précédent": "ms précédent", "peak_mb": "pic Mo"})
+    lines.append(show.round({"pic Mo": 1, "ratio": 2}).to_string(index=False))
+    slow = table[table["régression"]]
+    if len(slow):
+        lines += ["", "Régressions (> {:.0%} plus lent) :".format(REGRESSION - 1)]
+        lines += [f"  {r.app} / {r.stage} : x{r.ratio:.2f}" for r in slow.itertuples()]
+    text = "\n".join(lines)
+    print(text)
+    Path(OUTPUT).write_text(text + "\n", encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,288 @@
+# -*- coding: utf-8 -*-
+"""Graphiques du tableau de bord QRM, sans dépendance à Streamlit.
+
+Les constructeurs Plotly (donut, kpi_gauge, dual_bar, wellness_bar, rpe_gauge,
+sprint_vmax_chart, detailed_distance_chart, peak_demands_chart) sont partagés par l'app et les
+rapports hors ligne. cached_figure() réutilise une figure tant que
+(type, version des données, filtres) ne change pas ; les figures en cache sont
+partagées entre sessions et ne doivent plus être modifiées après coup.
+Pour un KPI scalaire, svg_gauge / svg_donut rendent quelques centaines
+d'octets de HTML au lieu d'une figure Plotly complète.
+"""
+from collections import OrderedDict
+import threading
+
+import pandas as pd
+import plotly.graph_objects as go
+
+from qrm.instrument import cache_event, stage
+
+# -----------------------
+# 🎨 QRM Identity
+# -----------------------
+QRM_RED = "#D60000"
+QRM_GOLD = "#F9B400"
+PRIMARY_GREEN = "#2ECC71"
+PRIMARY_RED = "#E74C3C"
+PRIMARY_BLUE = "#3498DB"
+PRIMARY_GREY = "#BDC3C7"
+
+FIGURE_CACHE_SIZE = 128
+_figures = OrderedDict()
+_figures_lock = threading.Lock()
+stats = {"hits": 0, "misses": 0}
+
+
+def cached_figure(kind, version, state, build):
+    """Figure mémorisée par (type, version des données, état des filtres) ; `build` n'est appelé qu'en cas d'absence."""
+    key = (kind, version, state)
+    with _figures_lock:
+        if key in _figures:
+            _figures.move_to_end(key)
+            stats["hits"] += 1
+            cache_event("figure", True)
+            return _figures[key]
+    cache_event("figure", False)
+    with stage(f"figure:{kind if isinstance(kind, str) else kind[0]}"):
+        fig = build()
+    with _figures_lock:
+        stats["misses"] += 1
+        _figures[key] = fig
+        if len(_figures) > FIGURE_CACHE_SIZE:
+            _figures.popitem(last=False)
+    return fig
+
+
+# -----------------------
+# KPIs légers (HTML / SVG)
+# -----------------------
+def svg_gauge(label, value, suffix="", min_val=0, max_val=100, color=PRIMARY_BLUE):
+    span = (max_val - min_val) or 1
+    pct = min(max((float(value) - min_val) / span, 0.0), 1.0) * 100
+    return f"""
+    <div style="margin:6px 0 10px 0">
+      <div style="font-size:0.85rem;color:#555">{label}</div>
+      <svg viewBox="0 0 100 10" preserveAspectRatio="none" style="width:100%;height:28px">
+        <rect x="0" y="0" width="100" height="10" fill="{PRIMARY_GREY}"/>
+        <rect x="0" y="0" width="{pct:.2f}" height="10" fill="{color}"/>
+      </svg>
+      <div style="font-weight:700;color:#111">{float(value):,.0f}{suffix}</div>
+    </div>"""
+
+def svg_donut(value, total, title, colors=(QRM_GOLD, PRIMARY_GREY)):
+    val = float(value) if value is not None else 0.0
+    tot = float(total) if total not in (None, 0) else (val if val > 0 else 1.0)
+    pct = min(max(val / tot, 0.0), 1.0) * 100
+    return f"""
+    <div style="text-align:center">
+      <div style="font-size:0.85rem;color:#555">{title}</div>
+      <svg viewBox="0 0 42 42" style="width:180px;height:180px">
+        <circle cx="21" cy="21" r="15.915" fill="none" stroke="{colors[1]}" stroke-width="5"/>
+        <circle cx="21" cy="21" r="15.915" fill="none" stroke="{colors[0]}" stroke-width="5"
+                stroke-dasharray="{pct:.2f} {100 - pct:.2f}" stroke-dashoffset="25"/>
+        <text x="21" y="23" text-anchor="middle" font-size="6" font-weight="700" fill="#111">{val:,.0f}</text>
+      </svg>
+    </div>"""
+
+
+# -----------------------
+# Figures Plotly
+# -----------------------
+def kpi_gauge(label, value, suffix="", min_val=0, max_val=100, color=PRIMARY_BLUE):
+    fig = go.Figure()
+    fig.add_trace(go.Bar(
+        x=[value], y=[label], orientation="h",
+        marker=dict(color=color),
+        text=[f"{value:,.0f}{suffix}"], textposition="inside"
+    ))
+    fig.add_trace(go.Bar(
+        x=[max(max_val - value, 0)], y=[label], orientation="h",
+        marker=dict(color=PRIMARY_GREY), showlegend=False
+    ))
+    fig.update_layout(
+        barmode="stack", height=80, margin=dict(l=10,r=10,t=10,b=10),
+        xaxis=dict(range=[min_val, max_val], visible=False),
+        yaxis=dict(visible=False),
+        plot_bgcolor="rgba(0,0,0,0)", paper_bgcolor="rgba(0,0,0,0)",
+        showlegend=False
+    )
+    return fig
+
+def donut(value, total, title, colors=(QRM_GOLD, PRIMARY_GREY)):
+    val = float(value) if value is not None else 0.0
+    # si total absent ou nul, on prend val (ou 1) pour éviter division par zéro
+    tot = float(total) if total not in (None, 0) else (val if val > 0 else 1.0)
+    other = tot - val
+    # si complètement égal, garde une petite part visible pour le second segment
+    if other <= 0:
+        other = max(tot * 0.0001, 0.0001)
+        val = tot - other
+    # construit le donut en s'assurant que les couleurs soient bien passées
+    fig = go.Figure(go.Pie(
+        values=[val, other],
+        labels=[title, ""],
+        hole=0.7,
+        sort=False,
+        direction="clockwise",
+        marker_colors=[colors[0], colors[1]],
+        textinfo="none",
+        hoverinfo="label+value+percent",
+    ))
+    # annotation centrée
+    fig.add_annotation(
+        x=0.5, y=0.5,
+        text=f"<b>{val:,.0f}</b>",
+        showarrow=False,
+        font=dict(size=20, color="#111"),
+        xanchor="center", yanchor="middle"
+    )
+    fig.update_layout(
+        margin=dict(l=5, r=5, t=40, b=5),
+        showlegend=False,
+        height=240,
+        autosize=True,
+        plot_bgcolor="rgba(0,0,0,0)",
+        paper_bgcolor="rgba(0,0,0,0)"
+    )
+    return fig
+
+def dual_bar(x, y1, y2, name1="Accélérations", name2="Décélérations", title=None):
+    fig = go.Figure()
+    fig.add_trace(go.Bar(name=name1, x=x, y=y1, marker_color=PRIMARY_GREEN))
+    fig.add_trace(go.Bar(name=name2, x=x, y=y2, marker_color=PRIMARY_RED))
+    fig.update_layout(barmode="group", height=320, margin=dict(l=10,r=10,t=40,b=10),
+                      plot_bgcolor="rgba(0,0,0,0)", paper_bgcolor="rgba(0,0,0,0)",
+                      legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1))
+    if title:
+        fig.update_layout(title=title)
+    return fig
+
+def wellness_bar(values: dict):
+    items = list(values.keys())
+    vals = [values[k] for k in items]
+    colors = [PRIMARY_GREEN if k in ["Sommeil 1-5","Motivation 1-5"]
+              else PRIMARY_RED if k in ["Fatigue 1-5","Douleurs 1-5","Stress 1-5"]
+              else QRM_GOLD for k in items]
+    fig = go.Figure(go.Bar(
+        x=items, y=vals, marker_color=colors,
+        text=[f"{v:.1f}" for v in vals], textposition="outside"
+    ))
+    fig.update_yaxes(range=[0,5], title="Score /5")
+    fig.update_layout(height=320, margin=dict(l=10,r=10,t=40,b=10),
+                      title="Wellness (scores 1 à 5)")
+    return fig
+
+def readiness_bar(z: dict, index=None):
+    """z-scores orientés (positif = mieux que d'habitude) par item, depuis qrm.readiness."""
+    items = list(z.keys())
+    vals = [0.0 if pd.isna(z[k]) else float(z[k]) for k in items]
+    colors = [PRIMARY_RED if v <= -1 else PRIMARY_GREEN if v >= 0 else QRM_GOLD for v in vals]
+    fig = go.Figure(go.Bar(
+        x=items, y=vals, marker_color=colors,
+        text=["—" if pd.isna(z[k]) else f"{z[k]:+.1f}" for k in items], textposition="outside"
+    ))
+    fig.add_hline(y=0, line_color=PRIMARY_GREY)
+    fig.update_yaxes(range=[-3, 3], title="z (référence du joueur)")
+    title = "Wellness vs référence du joueur"
+    if index is not None and pd.notna(index):
+        title += f" — indice de forme {index:.0f}"
+    fig.update_layout(height=320, margin=dict(l=10,r=10,t=40,b=10), title=title)
+    return fig
+
+def rpe_gauge(rpe_value: float):
+    fig = kpi_gauge("RPE", float(rpe_value), suffix=" /10", min_val=0, max_val=10, color=QRM_GOLD)
+    fig.update_layout(
+        title=dict(text="RPE", x=0.5, xanchor="center", y=0.9, yanchor="top", font=dict(size=14)),
+        margin=dict(l=10, r=10, t=40, b=10),
+        height=120,
+        plot_bgcolor="rgba(0,0,0,0)", paper_bgcolor="rgba(0,0,0,0)"
+    )
+    return fig
+
+def sprint_vmax_chart(df_days):
+    x = df_days["Date"]
+    fig = go.Figure()
+    fig.add_trace(go.Bar(x=x, y=df_days["Sprints"], name="Sprints", marker_color=QRM_RED))
+    if "Vitesse_Max" in df_days.columns:
+        fig.add_trace(go.Scatter(x=x, y=df_days["Vitesse_Max"], name="Vitesse max (km/h)",
+                                 mode="lines+markers", yaxis="y2", line=dict(color=QRM_GOLD)))
+    fig.update_layout(
+        title="Sprints & Vitesse maximale",
+        yaxis=dict(title="Sprints"),
+        yaxis2=dict(title="Vitesse max (km/h)", overlaying="y", side="right"),
+        height=360, margin=dict(l=10,r=10,t=40,b=10),
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
+        plot_bgcolor="rgba(0,0,0,0)", paper_bgcolor="rgba(0,0,0,0)",
+    )
+    return fig
+
+def peak_demands_chart(best, labels):
+    """Pics d'intensité 1/3/5 min (qrm.peaks.best_peaks) : un panneau par métrique, une couleur par joueur."""
+    from plotly.subplots import make_subplots
+
+    metrics = [m for m in labels if m in set(best["metric"])]
+    fig = make_subplots(rows=1, cols=max(len(metrics), 1), subplot_titles=[labels[m] for m in metrics])
+    colors = [QRM_RED, QRM_GOLD, PRIMARY_BLUE, PRIMARY_GREEN, PRIMARY_GREY]
+    for i, (player, rows) in enumerate(best.groupby("Player Display Name", observed=True, sort=True)):
+        for j, m in enumerate(metrics):
+            r = rows[rows["metric"] == m].sort_values("window_s")
+            fig.add_trace(go.Bar(x=[f"{w // 60} min" for w in r["window_s"]], y=r["rate"].round(1),
+                                 name=str(player), legendgroup=str(player), showlegend=j == 0,
+                                 marker_color=colors[i % len(colors)]), row=1, col=j + 1)
+    fig.update_layout(
+        title="Pics d'intensité (meilleure fenêtre glissante)",
+        barmode="group", height=380, margin=dict(l=10, r=10, t=70, b=10),
+        legend=dict(orientation="h", yanchor="bottom", y=1.08, xanchor="right", x=1),
+        plot_bgcolor="rgba(0,0,0,0)", paper_bgcolor="rgba(0,0,0,0)",
+    )
+    return fig
+
+def detailed_distance_chart(df_days):
+    x = pd.to_datetime(df_days["Date"])
+    fig = go.Figure()
+
+    # Barres : Distance Totale / HID / HSR
+    if "Distance_Totale" in df_days.columns:
+        fig.add_trace(go.Bar(
+            x=x,
+            y=df_days["Distance_Totale"].fillna(0),
+            name="Distance Totale (m)",
+            marker_color=QRM_GOLD
+        ))
+
+    if "Zone4_Dist" in df_days.columns:
+        fig.add_trace(go.Bar(
+            x=x,
+            y=df_days["Zone4_Dist"].fillna(0),
+            name="HID - Zone 4 (m)",
+            marker_color=QRM_RED
+        ))
+
+    if "Zone5_Dist" in df_days.columns:
+        fig.add_trace(go.Bar(
+            x=x,
+            y=df_days["Zone5_Dist"].fillna(0),
+            name="HSR - Zone 5 (m)",
+            marker_color=PRIMARY_BLUE
+        ))
+
+    # Mise en forme
+    fig.update_layout(
+        title="Distance Totale, HID et HSR (jour par jour)",
+        barmode="group",  # groupé (barres côte à côte)
+        xaxis=dict(title="Date"),
+        yaxis=dict(title="Distance (m)", showgrid=False),
+        legend=dict(
+            orientation="h",
+            yanchor="bottom",
+            y=1.02,
+            xanchor="right",
+            x=1
+        ),
+        margin=dict(l=10, r=60, t=40, b=40),
+        height=420,
+        plot_bgcolor="rgba(0,0,0,0)",
+        paper_bgcolor="rgba(0,0,0,0)"
+    )
+
+    return fig
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""Cube d'agrégats (joueur, équipe, jour, semaine) partagé par les pages.
+
+Construit en un seul groupby par version des données ; les KPIs et graphiques
+découpent ensuite le cube (quelques centaines de lignes) au lieu de rebalayer
+la table brute à chaque rerun. Chaque mesure est stockée en somme, effectif
+et max par jour, ce qui permet de recalculer sommes / moyennes / max à
+n'importe quel niveau (semaine, période, joueur).
+"""
+from collections import OrderedDict
+
+import pandas as pd
+
+from qrm.instrument import cache_event, stage
+
+# noms logiques -> colonnes du classeur "DATA BRUTES.xlsx"
+RAW_COLUMNS = {
+    "player": "Player Display Name",
+    "team": None,
+    "date": "Date",
+    "distance": "Total Distance",
+    "hid": "Distance Zone 4 (Absolute)",
+    "hsr": "Distance Zone 5 (Absolute)",
+    "accel": "Accelerations (Absolute)",
+    "decel": "Decelerations (Absolute)",
+    "sprint": "Sprints",
+    "vmax": "Max Speed",
+    "rpe": "RPE 1-10",
+    "duration": None,
+    "sleep": "Sommeil 1-5",
+    "fatigue": "Fatigue 1-5",
+    "stress": "Stress 1-5",
+    "pain": "Douleurs 1-5",
+    "motivation": "Motivation 1-5",
+}
+DIMENSIONS = ["player", "team", "day", "week"]
+MEASURES = ["distance", "hid", "hsr", "accel", "decel", "sprint", "vmax", "rpe", "duration",
+            "sleep", "fatigue", "stress", "pain", "motivation"]
+
+_CACHE_SIZE = 8
+_cubes = OrderedDict()
+
+
+class AggregateCube:
+    def __init__(self, daily, measures):
+        self.daily = daily
+        self.measures = measures
+
+    def slice(self, players=None, teams=None, start=None, end=None):
+        """Lignes journalières du cube pour les joueurs / équipes / période donnés (bornes incluses)."""
+        d = self.daily
+        mask = pd.Series(True, index=d.index)
+        if players is not None:
+            mask &= d["player"].isin([str(p) for p in players])
+        if teams:
+            mask &= d["team"].isin([str(t) for t in teams])
+        if start is not None:
+            mask &= d["day"] >= pd.Timestamp(start)
+        if end is not None:
+            mask &= d["day"] <= pd.Timestamp(end)
+        return d[mask]
+
+    def rollup(self, by, **filters):
+        """Agrège le cube par `by` (sous-ensemble de DIMENSIONS) : colonnes <m>_sum, <m>_mean, <m>_max, <m>_count."""
+        part = self.slice(**filters)
+        cols = [f"{m}_{s}" for m in self.measures for s in ("sum", "count", "max")]
+        how = {c: ("max" if c.endswith("_max") else "sum") for c in cols}
+        out = part.groupby(by, observed=True, sort=True).agg(how)
+        return self._with_means(out)
+
+    def totals(self, **filters):
+        """Une seule ligne : agrégats de toute la sélection."""
+        part = self.slice(**filters)
+        out = pd.DataFrame({c: [part[c].max() if c.endswith("_max") else part[c].sum()]
+                            for m in self.measures for c in (f"{m}_sum", f"{m}_count", f"{m}_max")})
+        return self._with_means(out).iloc[0]
+
+    def _with_means(self, out):
+        for m in self.measures:
+            out[f"{m}_mean"] = out[f"{m}_sum"] / out[f"{m}_count"].where(out[f"{m}_count"] > 0)
+        return out
+
+
+def build_cube(df, columns=RAW_COLUMNS):
+    """Construit le cube journalier en un seul passage vectorisé sur la table brute."""
+    player, team, date = columns.get("player"), columns.get("team"), columns.get("date")
+    measures = [m for m in MEASURES
+                if columns.get(m) in df.columns and pd.api.types.is_numeric_dtype(df[columns[m]])]
+    day = pd.to_datetime(df[date], errors="coerce").dt.normalize()
+    frame = pd.DataFrame({
+        "player": df[player].astype(str) if player else "—",
+        "team": df[team].astype(str) if team else "—",
+        "day": day,
+    })
+    for m in measures:
+        frame[m] = df[columns[m]]
+    # sRPE = RPE x durée, calculée à la ligne (la somme des produits ≠ produit des sommes)
+    if "rpe" in measures and "duration" in measures:
+        frame["srpe"] = frame["rpe"] * frame["duration"]
+        measures.append("srpe")
+    keep = frame["day"].notna()
+    if player:
+        keep &= df[player].notna()
+    frame = frame[keep]
+
+    spec = {}
+    for m in measures:
+        spec[f"{m}_sum"] = (m, "sum")
+        spec[f"{m}_count"] = (m, "count")
+        spec[f"{m}_max"] = (m, "max")
+    daily = frame.groupby(["player", "team", "day"], sort=True).agg(**spec).reset_index()
+    daily["week"] = daily["day"] - pd.to_timedelta(daily["day"].dt.dayofweek, unit="D")
+    return AggregateCube(daily, measures)
+
+
+def get_cube(df, version, columns=RAW_COLUMNS):
+    """Cube mémorisé par (version des données, mapping) : reconstruit seulement quand les données changent."""
+    key = (version, tuple(sorted((k, v) for k, v in columns.items() if v)))
+    if key in _cubes:
+        _cubes.move_to_end(key)
+        cache_event("cube", True)
+        return _cubes[key]
+    cache_event("cube", False)
+    with stage("cube", rows_in=len(df)) as s:
+        cube = build_cube(df, columns)
+        s["rows_out"] = len(cube.daily)
+    _cubes[key] = cube
+    if len(_cubes) > _CACHE_SIZE:
+        _cubes.popitem(last=False)
+    return cube
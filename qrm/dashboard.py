@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""Préparation des données et KPIs du tableau de bord QRM, sans Streamlit.
+
+Partagé par app_qrm_dashboard_qrm.py et par les rapports hors ligne
+(qrm.report) pour que les chiffres affichés soient identiques.
+"""
+from qrm.model import compact
+from qrm.quality import validate
+from qrm.schema import resolve
+
+# champ logique -> nom interne utilisé par les graphiques (qrm.charts)
+INTERNAL = {"player": "Joueur", "date": "Date", "distance": "Distance_Totale", "hid": "Zone4_Dist",
+            "hsr": "Zone5_Dist", "sprint": "Sprints", "accel": "Accels", "decel": "Decels",
+            "vmax": "Vitesse_Max", "rpe": "RPE 1-10", "sleep": "Sommeil 1-5", "fatigue": "Fatigue 1-5",
+            "stress": "Stress 1-5", "pain": "Douleurs 1-5", "motivation": "Motivation 1-5"}
+
+# Aggregation rules
+SUM_COLS = ["Distance_Totale","Zone4_Dist","Zone5_Dist","Sprints","Accels","Decels"]
+AVG_COLS = ["Vitesse_Max","RPE 1-10","Sommeil 1-5","Fatigue 1-5","Stress 1-5","Douleurs 1-5","Motivation 1-5"]
+WELLNESS_COLS = ["Sommeil 1-5","Fatigue 1-5","Stress 1-5","Douleurs 1-5","Motivation 1-5"]
+
+
+def internal(df):
+    """Renomme vers les noms internes (mapping qrm.schema).
+
+    Lève KeyError si aucune colonne date n'est trouvée.
+    """
+    mapping = resolve(df.columns)
+    df = df.rename(columns={mapping[f]: name for f, name in INTERNAL.items() if f in mapping})
+    if "Date" not in df.columns:
+        raise KeyError("La colonne 'Date' est manquante.")
+    return df
+
+def prepare(df):
+    """internal(), contrôle qualité (qrm.quality, lignes douteuses écartées) et types compacts."""
+    return compact(validate(internal(df), INTERNAL)[0], INTERNAL)
+
+
+def kpi_values(cube, player, start=None, end=None):
+    """Sommes et moyennes du joueur sur la période, lues dans le cube (sans rebalayer les lignes)."""
+    measure_of = {c: m for m, c in INTERNAL.items()}
+    tot = cube.totals(players=[player], start=start, end=end)
+    agg = {}
+    for c in SUM_COLS:
+        if f"{measure_of[c]}_sum" in tot:
+            agg[c] = float(tot[f"{measure_of[c]}_sum"])
+    for c in AVG_COLS:
+        if f"{measure_of[c]}_mean" in tot:
+            agg[c] = float(tot[f"{measure_of[c]}_mean"])
+    return agg
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+"""Export des séances filtrées, produit à la demande et par blocs.
+
+Rien n'est construit tant que l'utilisateur ne clique pas sur « Télécharger »
+(st.download_button accepte une fonction, appelée au clic). Le fichier est
+alors écrit bloc par bloc (CHUNK_ROWS lignes) dans un fichier temporaire qui
+reste en mémoire tant qu'il est petit et bascule sur disque au-delà : la table
+n'est jamais dupliquée en entier sous forme de texte. Les lignes exportées sont
+données par leurs positions (filtres actifs) et seules les colonnes choisies
+sont copiées, bloc par bloc.
+"""
+import gzip
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+CHUNK_ROWS = 50_000
+SPOOL_BYTES = 32 * 1024 * 1024
+EXCEL_MAX_ROWS = 1_048_575   # + la ligne d'en-tête
+
+# libellé -> (extension, type MIME)
+FORMATS = {
+    "CSV": ("csv", "text/csv"),
+    "CSV compressé (gzip)": ("csv.gz", "application/gzip"),
+    "Parquet": ("parquet", "application/vnd.apache.parquet"),
+    "Excel": ("xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+}
+
+
+def chunks(df, rows=None, columns=None, size=CHUNK_ROWS):
+    """Blocs de `df` limités aux positions `rows` et aux colonnes `columns` (None = tout)."""
+    rows = np.arange(len(df)) if rows is None else np.asarray(rows)
+    columns = list(df.columns) if columns is None else list(columns)
+    if not len(rows):
+        yield df.iloc[:0][columns]
+        return
+    for i in range(0, len(rows), size):
+        yield df.iloc[rows[i:i + size]][columns]
+
+
+# =============================
+# ÉCRITURE PAR FORMAT
+# =============================
+def write_csv(blocks, fh, compress=False):
+    out = gzip.GzipFile(fileobj=fh, mode="wb", mtime=0) if compress else fh
+    for i, block in enumerate(blocks):
+        out.write(block.to_csv(index=False, header=i == 0).encode("utf-8"))
+    if compress:
+        out.close()   # écrit la fin du flux gzip, sans fermer `fh`
+
+def write_parquet(blocks, fh):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer = None
+    for block in blocks:
+        # un groupe de lignes Parquet par bloc
+        table = pa.Table.from_pandas(block, preserve_index=False,
+                                     schema=writer.schema if writer else None)
+        if writer is None:
+            writer = pq.ParquetWriter(fh, table.schema, compression="zstd")
+        writer.write_table(table)
+    writer.close()
+
+def write_excel(blocks, fh):
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)   # lignes écrites au fil de l'eau, pas de feuille en mémoire
+    ws = wb.create_sheet("Export")
+    n = 0
+    for i, block in enumerate(blocks):
+        n += len(block)
+        if n > EXCEL_MAX_ROWS:
+            raise ValueError(f"Excel est limité à {EXCEL_MAX_ROWS} lignes : choisissez CSV ou Parquet.")
+        if i == 0:
+            ws.append([str(c) for c in block.columns])
+        values = block.astype(object).where(block.notna(), None)
+        for row in values.itertuples(index=False, name=None):
+            ws.append([v.to_pydatetime() if isinstance(v, pd.Timestamp) else v for v in row])
+    wb.save(fh)
+
+
+def export_file(df, fmt, rows=None, columns=None):
+    """Fichier temporaire (positionné au début) contenant l'export au format `fmt` (clé de FORMATS)."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Format d'export inconnu : {fmt}")
+    fh = tempfile.SpooledTemporaryFile(max_size=SPOOL_BYTES)
+    blocks = chunks(df, rows, columns)
+    if fmt == "Parquet":
+        write_parquet(blocks, fh)
+    elif fmt == "Excel":
+        write_excel(blocks, fh)
+    else:
+        write_csv(blocks, fh, compress=fmt != "CSV")
+    fh.seek(0)
+    return fh
+
+
+# =============================
+# AFFICHAGE PAGINÉ
+# =============================
+def page_count(n_rows, page_size):
+    return max(1, -(-n_rows // page_size))
+
+def page_rows(df, number, page_size, rows=None, columns=None):
+    """Page `number` (à partir de 1) : seules ces lignes sont copiées et envoyées au navigateur."""
+    rows = np.arange(len(df)) if rows is None else np.asarray(rows)
+    start = (number - 1) * page_size
+    return next(chunks(df, rows[start:start + page_size], columns, size=page_size))
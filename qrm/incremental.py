@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+"""Ingestion incrémentale : on ne fusionne que les lignes nouvelles ou modifiées.
+
+Le magasin persiste dans `root` :
+- parts/part-XXXXX.parquet : un fichier par ingestion, ne contenant que le delta ;
+- index.parquet : une ligne par clé (joueur, date, séance) -> hash de la ligne
+  et valeurs des métriques suivies (pour corriger les agrégats d'un delta) ;
+- aggregates.parquet : sommes / effectifs par joueur des métriques suivies ;
+- manifest.json : parts, hash des fichiers déjà ingérés et colonnes hashées.
+
+Le hash d'une ligne porte sur les colonnes connues à la première ingestion
+(clés et métriques suivies comprises) : un classeur qui gagne une colonne ne
+fait pas passer toute la saison pour « modifiée ».
+
+Une ingestion coûte O(lignes reçues) ; les lignes supprimées du classeur ne
+sont pas retirées du magasin.
+"""
+import json
+import os
+import threading
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from qrm.ingest import CACHE_DIR, file_digest, read_table
+
+KEY = ["Player Display Name", "Date", "Session"]
+TRACKED = ["Total Distance", "Distance Zone 4 (Absolute)", "Distance Zone 5 (Absolute)"]
+COMPACT_AFTER = 64   # nombre de parts au-delà duquel on réécrit le magasin en une seule part
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def _write_parquet(df, path):
+    tmp = path.with_suffix(f".{os.getpid()}.tmp")
+    df.to_parquet(tmp, index=False)
+    os.replace(tmp, path)
+
+def _normalize(df, key):
+    df = df.copy()
+    if "Date" in key:
+        df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
+    # entiers et flottants hashés pareil : un CSV relu en float ne doit pas paraître « modifié »
+    for c in df.columns:
+        if pd.api.types.is_numeric_dtype(df[c]) and not pd.api.types.is_bool_dtype(df[c]):
+            df[c] = df[c].astype("float64")
+    return df.dropna(subset=key).drop_duplicates(subset=key, keep="last")
+
+def _hash_rows(df, cols):
+    return pd.util.hash_pandas_object(df[cols], index=False).to_numpy(np.uint64)
+
+
+class IncrementalStore:
+    def __init__(self, root=CACHE_DIR / "store", key=KEY, tracked=TRACKED):
+        self.root = Path(root)
+        self.key = list(key)
+        self.tracked = list(tracked)
+        self.lock = threading.Lock()
+        self._table = None
+        self._load_state()
+
+    # ---------- état persistant ----------
+    def _load_state(self):
+        mf = self.root / "manifest.json"
+        self.manifest = json.loads(mf.read_text()) if mf.exists() else {"parts": [], "digests": []}
+        self._stamp = mf.stat().st_mtime_ns if mf.exists() else 0
+        idx = self.root / "index.parquet"
+        self.index = pd.read_parquet(idx).set_index("__key__") if idx.exists() else None
+        agg = self.root / "aggregates.parquet"
+        self.aggregates = pd.read_parquet(agg).set_index(self.key[0]) if agg.exists() else None
+
+    def _save_state(self):
+        (self.root / "parts").mkdir(parents=True, exist_ok=True)
+        if self.index is not None:
+            _write_parquet(self.index.reset_index(), self.root / "index.parquet")
+            _write_parquet(self.aggregates.reset_index(), self.root / "aggregates.parquet")
+        tmp = self.root / "manifest.json.tmp"
+        tmp.write_text(json.dumps(self.manifest))
+        os.replace(tmp, self.root / "manifest.json")
+        self._stamp = (self.root / "manifest.json").stat().st_mtime_ns
+
+    def refresh(self):
+        """Recharge l'état si un autre processus (ex. python -m qrm.traces --store) a écrit dans le magasin."""
+        mf = self.root / "manifest.json"
+        with self.lock:
+            if (mf.stat().st_mtime_ns if mf.exists() else 0) != self._stamp:
+                self._load_state()
+                self._table = None
+
+    @property
+    def version(self):
+        return len(self.manifest["parts"]), len(self.index) if self.index is not None else 0
+
+    # ---------- ingestion ----------
+    def ingest(self, src, sheet_name=0):
+        """Fusionne un classeur / CSV / DataFrame ; retourne uniquement les lignes nouvelles ou modifiées."""
+        digest = None
+        if not isinstance(src, pd.DataFrame):
+            digest = f"{file_digest(src)}:{sheet_name}"
+            with self.lock:
+                if digest in self.manifest["digests"]:
+                    return pd.DataFrame()
+            src = read_table(src, sheet_name=sheet_name)
+        missing = [c for c in self.key if c not in src.columns]
+        if missing:
+            raise KeyError(f"Colonnes clés absentes : {missing}")
+
+        with self.lock:
+            # revérifié sous le verrou : un autre thread a pu ingérer le même fichier pendant la lecture
+            if digest in self.manifest["digests"]:
+                return pd.DataFrame()
+            df = _normalize(src, self.key)
+            tracked = [c for c in self.tracked if c in df.columns]
+            keys = _hash_rows(df, self.key)
+            known = self.manifest.setdefault("columns", sorted(set(df.columns) | set(self.key) | set(tracked)))
+            rows = _hash_rows(df.reindex(columns=known), known)
+
+            if self.index is None:
+                pos = np.full(len(df), -1)
+            else:
+                pos = self.index.index.get_indexer(keys)
+            known = pos >= 0
+            changed = ~known
+            if known.any():
+                changed[known] = self.index["__row__"].to_numpy()[pos[known]] != rows[known]
+            delta = df[changed]
+            if digest:
+                self.manifest["digests"].append(digest)
+            if delta.empty:
+                self._save_state()
+                return delta
+
+            replaced = pos[changed & known]
+            old = self.index.iloc[replaced] if len(replaced) else None
+            self._update_aggregates(delta, old, tracked)
+
+            new_idx = pd.DataFrame({"__row__": rows[changed]}, index=pd.Index(keys[changed], name="__key__"))
+            new_idx[self.key[0]] = delta[self.key[0]].to_numpy()
+            for c in tracked:
+                new_idx[c] = delta[c].to_numpy()
+            if self.index is None:
+                self.index = new_idx
+            else:
+                keep = np.ones(len(self.index), dtype=bool)
+                keep[replaced] = False
+                self.index = pd.concat([self.index[keep], new_idx])
+
+            (self.root / "parts").mkdir(parents=True, exist_ok=True)
+            part = f"part-{len(self.manifest['parts']):05d}.parquet"
+            _write_parquet(delta, self.root / "parts" / part)
+            self.manifest["parts"].append(part)
+            self._table = None
+            if len(self.manifest["parts"]) > COMPACT_AFTER:
+                self._compact()
+            self._save_state()
+            return delta
+
+    def _update_aggregates(self, delta, old, tracked):
+        player = self.key[0]
+        new_vals = delta[[player] + tracked]
+        # ajout des nouvelles valeurs
+        add = new_vals.groupby(player).agg(["sum", "count"])
+        add.columns = [f"{c}__{s}" for c, s in add.columns]
+        # retrait des anciennes valeurs des lignes modifiées
+        if old is not None:
+            sub = old.reindex(columns=[player] + tracked).groupby(player).agg(["sum", "count"])
+            sub.columns = [f"{c}__{s}" for c, s in sub.columns]
+            add = add.sub(sub, fill_value=0)
+        if self.aggregates is None:
+            self.aggregates = add
+        else:
+            self.aggregates = self.aggregates.add(add, fill_value=0)
+
+    def _compact(self):
+        table = self._read()
+        for p in self.manifest["parts"]:
+            (self.root / "parts" / p).unlink(missing_ok=True)
+        self.manifest["parts"] = ["part-00000.parquet"]
+        _write_parquet(table, self.root / "parts" / "part-00000.parquet")
+
+    # ---------- lecture ----------
+    def _read(self):
+        """Relit toutes les parts (verrou tenu : une compaction ne peut pas les supprimer pendant la lecture)."""
+        parts = [pd.read_parquet(self.root / "parts" / p) for p in self.manifest["parts"]]
+        if not parts:
+            return pd.DataFrame(columns=self.key)
+        table = pd.concat(parts, ignore_index=True)
+        return table.drop_duplicates(subset=self.key, keep="last").reset_index(drop=True)
+
+    def table(self):
+        """Table complète (dernière version de chaque clé), mémorisée jusqu'à la prochaine ingestion."""
+        with self.lock:
+            if self._table is None:
+                self._table = self._read()
+            return self._table
+
+    def player_means(self):
+        """Moyenne par joueur des métriques suivies, tenue à jour à partir des deltas."""
+        if self.aggregates is None:
+            return pd.DataFrame()
+        out = {}
+        for c in self.tracked:
+            if f"{c}__sum" in self.aggregates.columns:
+                cnt = self.aggregates[f"{c}__count"].replace(0, np.nan)
+                out[c] = self.aggregates[f"{c}__sum"] / cnt
+        return pd.DataFrame(out)
+
+
+def open_store(root=CACHE_DIR / "store"):
+    """Magasin partagé par le processus (un seul par répertoire)."""
+    root = Path(root)
+    with _stores_lock:
+        if root not in _stores:
+            _stores[root] = IncrementalStore(root)
+        else:
+            _stores[root].refresh()
+        return _stores[root]
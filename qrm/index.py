@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+"""Index trié (équipe, joueur, date) pour les filtres de la barre latérale.
+
+La table est triée une fois par version des données. Chaque ligne reçoit une
+clé entière groupe * M + rang de la date (groupe = couple équipe/joueur), donc
+croissante sur tout le tableau : une sélection joueur(s) + période devient une
+paire de np.searchsorted par groupe, vectorisée, puis une tranche. Aucun
+masque sur toute la table, aucune matérialisation de `datetime.date`.
+"""
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from qrm.instrument import cache_event, stage
+
+_CACHE_SIZE = 8
+_indexes = OrderedDict()
+
+
+def _categorical(s):
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        return s
+    return s.where(s.isna(), s.astype(str)).astype("category")
+
+def _codes(categories, values):
+    codes = categories.get_indexer([str(v) for v in values])
+    return codes[codes >= 0]
+
+def _ns(value):
+    return pd.Timestamp(value).value
+
+
+class SessionIndex:
+    def __init__(self, df, columns):
+        player = _categorical(df[columns["player"]])
+        team = _categorical(df[columns["team"]]) if columns.get("team") else None
+        dates = pd.to_datetime(df[columns["date"]], errors="coerce")
+
+        pc = player.cat.codes.to_numpy()
+        tc = team.cat.codes.to_numpy() if team is not None else np.zeros(len(df), dtype=np.int8)
+        valid = (pc >= 0) & dates.notna().to_numpy()
+        d = dates.to_numpy("datetime64[ns]").view("int64")
+
+        order = np.lexsort((d, pc, tc))
+        order = order[valid[order]]
+        self.frame = df.iloc[order].reset_index(drop=True)
+        self.dates = d[order]
+        pc, tc = pc[order], tc[order]
+        self.players_cat = player.cat.categories
+        self.teams_cat = team.cat.categories if team is not None else pd.Index([])
+
+        n = len(order)
+        change = np.ones(n, dtype=bool)
+        change[1:] = (pc[1:] != pc[:-1]) | (tc[1:] != tc[:-1])
+        self.starts = np.flatnonzero(change)
+        self.ends = np.append(self.starts[1:], n)
+        self.g_player, self.g_team = pc[self.starts], tc[self.starts]
+
+        # clé composite croissante : groupe * M + rang de date
+        self.days = np.unique(self.dates)
+        self.M = len(self.days) + 1
+        group = np.cumsum(change) - 1
+        self.key = group.astype(np.int64) * self.M + np.searchsorted(self.days, self.dates)
+
+    def __len__(self):
+        return len(self.frame)
+
+    # ---------- sélection ----------
+    def _groups(self, players=None, teams=None):
+        mask = np.ones(len(self.starts), dtype=bool)
+        if players is not None:
+            mask &= np.isin(self.g_player, _codes(self.players_cat, players))
+        if teams:
+            mask &= np.isin(self.g_team, _codes(self.teams_cat, teams))
+        return np.flatnonzero(mask)
+
+    def _bounds(self, groups, start=None, end=None):
+        lo = 0 if start is None else np.searchsorted(self.days, _ns(start), "left")
+        # borne de fin inclusive sur toute la journée
+        hi = self.M - 1 if end is None else np.searchsorted(
+            self.days, _ns(pd.Timestamp(end).normalize() + pd.Timedelta(days=1)), "left")
+        base = groups.astype(np.int64) * self.M
+        return np.searchsorted(self.key, base + lo, "left"), np.searchsorted(self.key, base + hi, "left")
+
+    def positions(self, players=None, teams=None, start=None, end=None):
+        a, b = self._bounds(self._groups(players, teams), start, end)
+        lengths = np.maximum(b - a, 0)
+        if not lengths.sum():
+            return np.empty(0, dtype=np.int64)
+        # concaténation vectorisée des plages [a, b)
+        offsets = np.repeat(a - np.cumsum(np.r_[0, lengths[:-1]]), lengths)
+        return np.arange(lengths.sum()) + offsets
+
+    def select(self, players=None, teams=None, start=None, end=None):
+        """Lignes des joueurs / équipes sur la période (bornes incluses), triées par date dans chaque groupe."""
+        return self.frame.iloc[self.positions(players, teams, start, end)]
+
+    # ---------- listes pour la barre latérale ----------
+    def teams(self):
+        return sorted(self.teams_cat[np.unique(self.g_team[self.g_team >= 0])]) if len(self.teams_cat) else []
+
+    def players(self, teams=None, start=None, end=None):
+        """Joueurs ayant au moins une séance dans la sélection."""
+        groups = self._groups(None, teams)
+        a, b = self._bounds(groups, start, end)
+        return sorted(self.players_cat[np.unique(self.g_player[groups[b > a]])])
+
+    def date_range(self, teams=None):
+        groups = self._groups(None, teams)
+        if not len(groups):
+            return None, None
+        first = self.dates[self.starts[groups]].min()
+        last = self.dates[self.ends[groups] - 1].max()
+        return pd.Timestamp(first), pd.Timestamp(last)
+
+
+def get_index(df, version, columns):
+    """Index mémorisé par (version des données, mapping)."""
+    key = (version, tuple(sorted((k, v) for k, v in columns.items() if v)))
+    if key in _indexes:
+        _indexes.move_to_end(key)
+        cache_event("index", True)
+        return _indexes[key]
+    cache_event("index", False)
+    with stage("index", rows_in=len(df)) as s:
+        index = SessionIndex(df, columns)
+        s["rows_out"] = len(index)
+    _indexes[key] = index
+    if len(_indexes) > _CACHE_SIZE:
+        _indexes.popitem(last=False)
+    return index
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""Ingestion du classeur GPS avec cache Parquet.
+
+Le classeur (ou le CSV) n'est parsé qu'une fois par contenu : le résultat est
+écrit en Parquet dans CACHE_DIR sous une clé (hash du contenu, feuille). Les
+lectures suivantes passent par pyarrow (memory-map + projection de colonnes).
+"""
+import hashlib
+import io
+import os
+import re
+import threading
+from pathlib import Path
+
+import pandas as pd
+
+CACHE_DIR = Path(os.environ.get("QRM_CACHE_DIR", ".cache/qrm"))
+DATA_FILE = "DATA BRUTES.xlsx"
+
+_CHUNK = 1 << 20
+_path_digests = {}   # (chemin, mtime_ns, taille) -> hash, évite de relire un fichier inchangé
+
+
+# =============================
+# HASH DU CONTENU
+# =============================
+def _is_path(src):
+    return isinstance(src, (str, os.PathLike))
+
+def _source_name(src):
+    if _is_path(src):
+        return str(src)
+    return getattr(src, "name", "") or ""
+
+def _source_bytes(src):
+    # UploadedFile (Streamlit), BytesIO ou bytes bruts
+    if isinstance(src, (bytes, bytearray)):
+        return bytes(src)
+    if hasattr(src, "getvalue"):
+        return src.getvalue()
+    pos = src.tell()
+    src.seek(0)
+    data = src.read()
+    src.seek(pos)
+    return data
+
+def file_digest(src):
+    """Hash (blake2b) du contenu d'un chemin, d'un upload Streamlit ou de bytes."""
+    if _is_path(src):
+        st_ = os.stat(src)
+        key = (os.fspath(src), st_.st_mtime_ns, st_.st_size)
+        if key not in _path_digests:
+            h = hashlib.blake2b(digest_size=16)
+            with open(src, "rb") as f:
+                for block in iter(lambda: f.read(_CHUNK), b""):
+                    h.update(block)
+            _path_digests[key] = h.hexdigest()
+        return _path_digests[key]
+    return hashlib.blake2b(_source_bytes(src), digest_size=16).hexdigest()
+
+
+# =============================
+# PARSING (UNE SEULE FOIS PAR VERSION)
+# =============================
+def _sheet_key(sheet_name):
+    if sheet_name is None:
+        return "all"
+    return re.sub(r"[^0-9A-Za-z_-]+", "_", str(sheet_name))
+
+def _arrow_safe(df):
+    # les colonnes object à types mélangés (ex. Session = "J-3" et 1) ne passent pas en Arrow
+    for c in df.columns:
+        if df[c].dtype == object and pd.api.types.infer_dtype(df[c], skipna=True) not in ("string", "empty"):
+            df[c] = df[c].where(df[c].isna(), df[c].astype(str))
+    df.columns = [str(c) for c in df.columns]
+    return df
+
+def parse_source(src, sheet_name=0):
+    """Parse brut (sans cache) : CSV, une feuille, ou toutes les feuilles concaténées (sheet_name=None)."""
+    name = _source_name(src).lower()
+    buf = src if _is_path(src) else io.BytesIO(_source_bytes(src))
+    if name.endswith(".csv"):
+        return pd.read_csv(buf)
+    if sheet_name is None:
+        xls = pd.ExcelFile(buf)
+        return pd.concat([pd.read_excel(xls, sheet_name=s) for s in xls.sheet_names], ignore_index=True)
+    return pd.read_excel(buf, sheet_name=sheet_name)
+
+def cache_path(digest, sheet_name=0):
+    return CACHE_DIR / f"{digest}-{_sheet_key(sheet_name)}.parquet"
+
+def ensure_cached(src, sheet_name=0):
+    """Retourne le chemin Parquet de (src, feuille), en le construisant si le hash est nouveau."""
+    path = cache_path(file_digest(src), sheet_name)
+    if not path.exists():
+        df = _arrow_safe(parse_source(src, sheet_name))
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # un nom par processus et par thread (watcher et sessions Streamlit peuvent construire le même cache)
+        tmp = path.with_suffix(f".{os.getpid()}-{threading.get_ident()}.tmp")
+        df.to_parquet(tmp, index=False)
+        os.replace(tmp, path)   # écriture atomique : un lecteur concurrent ne voit jamais un fichier partiel
+    return path
+
+
+# =============================
+# LECTURE
+# =============================
+def cached_columns(path):
+    import pyarrow.parquet as pq
+    return pq.read_schema(path).names
+
+def read_table(src=DATA_FILE, sheet_name=0, columns=None):
+    """Lit la table de séances depuis le cache Parquet (reparse Excel seulement si le contenu change).
+
+    `columns` projette la lecture ; les colonnes absentes du fichier sont ignorées.
+    """
+    path = ensure_cached(src, sheet_name)
+    if columns is not None:
+        present = set(cached_columns(path))
+        columns = [c for c in columns if c in present]
+    return pd.read_parquet(path, columns=columns, memory_map=True)
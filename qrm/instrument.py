@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""Instrumentation optionnelle des reruns : étapes chronométrées, lignes, caches.
+
+Désactivée par défaut (coût nul : stage() renvoie un contexte vide). Activée
+par la variable d'environnement QRM_PROFILE=1 ou, dans une app, par
+l'URL ?debug=1. Pour chaque rerun on enregistre :
+
+- les étapes nommées (ingestion, mapping, filtres, agrégats, chaque figure)
+  avec durée, lignes en entrée et en sortie ;
+- les succès / défauts des caches (st.cache_data, cube, index, figures).
+
+Le rerun s'affiche dans un panneau repliable (debug_panel) et est ajouté à
+LOG_FILE, une ligne JSON par rerun, à analyser hors ligne :
+
+    pd.read_json(".cache/qrm/profile.jsonl", lines=True)
+"""
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+
+from qrm.ingest import CACHE_DIR
+
+LOG_FILE = Path(os.environ.get("QRM_PROFILE_LOG", CACHE_DIR / "profile.jsonl"))
+_local = threading.local()
+_log_lock = threading.Lock()
+
+
+def enabled_by_env():
+    return os.environ.get("QRM_PROFILE", "") not in ("", "0")
+
+def current():
+    """Rerun en cours dans ce thread (None si l'instrumentation est inactive)."""
+    return getattr(_local, "run", None)
+
+
+# =============================
+# ENREGISTREMENT
+# =============================
+def start(app, enabled=True):
+    _local.run = {"app": app, "run_id": uuid.uuid4().hex[:12], "start": time.time(),
+                  "t0": time.perf_counter(), "stages": [], "cache": {}, "_misses": set()} if enabled else None
+    return _local.run
+
+@contextmanager
+def stage(name, rows_in=None):
+    """Chronomètre une étape ; le dict produit accepte rows_out (ex. s["rows_out"] = len(df))."""
+    run = current()
+    if run is None:
+        yield {}
+        return
+    rec = {"stage": name, "rows_in": rows_in, "rows_out": None}
+    t0 = time.perf_counter()
+    try:
+        yield rec
+    finally:
+        rec["ms"] = (time.perf_counter() - t0) * 1000
+        run["stages"].append(rec)
+
+def cache_event(name, hit):
+    run = current()
+    if run is not None:
+        counts = run["cache"].setdefault(name, {"hits": 0, "misses": 0})
+        counts["hits" if hit else "misses"] += 1
+
+def miss(name):
+    """À appeler dans le corps d'une fonction st.cache_data : il ne s'exécute qu'en cas de défaut."""
+    run = current()
+    if run is not None:
+        run["_misses"].add(name)
+
+def cached_call(name, fn, *args, **kwargs):
+    """Appelle une fonction st.cache_data dans une étape et compte succès / défaut (voir miss)."""
+    run = current()
+    if run is None:
+        return fn(*args, **kwargs)
+    run["_misses"].discard(name)
+    with stage(name) as s:
+        out = fn(*args, **kwargs)
+        if hasattr(out, "__len__"):
+            s["rows_out"] = len(out)
+    cache_event(name, name not in run["_misses"])
+    return out
+
+def finish(path=LOG_FILE):
+    """Clôt le rerun, l'ajoute au journal et le retourne (None si inactif)."""
+    run = current()
+    if run is None:
+        return None
+    _local.run = None
+    record = {"app": run["app"], "run_id": run["run_id"],
+              "time": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(run["start"])),
+              "total_ms": (time.perf_counter() - run["t0"]) * 1000,
+              "stages": run["stages"], "cache": run["cache"]}
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with _log_lock, path.open("a", encoding="utf-8") as fh:
+        fh.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+    return record
+
+
+# =============================
+# STREAMLIT
+# =============================
+def begin(app):
+    """Démarre l'instrumentation du rerun si QRM_PROFILE=1 ou ?debug=1."""
+    import streamlit as st
+    return start(app, enabled_by_env() or st.query_params.get("debug") == "1")
+
+def debug_panel():
+    """Termine le rerun et l'affiche dans un panneau repliable (rien si inactif)."""
+    import pandas as pd
+    import streamlit as st
+
+    record = finish()
+    if record is None:
+        return
+    with st.expander(f"🐞 Instrumentation — {record['total_ms']:.0f} ms", expanded=False):
+        stages = pd.DataFrame(record["stages"], columns=["stage", "ms", "rows_in", "rows_out"])
+        st.dataframe(stages.round({"ms": 1}), width="stretch", hide_index=True)
+        if record["cache"]:
+            st.dataframe(pd.DataFrame(record["cache"]).T.rename_axis("cache"), width="stretch")
+        from qrm.registry import registry
+        reg = registry()
+        st.caption(f"Registre partagé : {len(reg)} table(s), {reg.nbytes / 2**20:.1f} / {reg.max_bytes / 2**20:.0f} Mo, "
+                   f"{reg.stats['evictions']} éviction(s)")
+        st.caption(f"Rerun {record['run_id']} ajouté à {LOG_FILE}")
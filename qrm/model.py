@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""Représentation compacte de la table de séances.
+
+Après lecture, tout est en object / float64. compact() convertit une fois pour
+toutes : joueur / équipe / séance en category, dates en datetime64, métriques
+en float32, compteurs (accélérations, décélérations, sprints) en Int16 et
+wellness 1-5 en Int8 (nullables : les questionnaires manquants restent <NA>).
+Les filtres comparent ensuite des codes entiers (code_mask) au lieu de
+refaire un .astype(str) de la colonne à chaque rerun.
+"""
+import numpy as np
+import pandas as pd
+
+CATEGORICAL = ["player", "team", "session"]
+COUNTS = ["accel", "decel", "sprint"]
+WELLNESS = ["sleep", "fatigue", "stress", "pain", "motivation"]
+
+
+def _integral(s, lo, hi):
+    v = s.dropna()
+    return v.empty or (bool((v == np.round(v)).all()) and v.min() >= lo and v.max() <= hi)
+
+
+def compact(df, columns):
+    """Copie typée de `df` ; `columns` est le mapping champ logique -> colonne (qrm.schema.resolve)."""
+    out = df.copy()
+    typed = set()
+    for f in CATEGORICAL:
+        c = columns.get(f)
+        if c in out.columns:
+            s = out[c]
+            out[c] = s.where(s.isna(), s.astype(str)).astype("category")
+            typed.add(c)
+    c = columns.get("date")
+    if c in out.columns:
+        out[c] = pd.to_datetime(out[c], errors="coerce")
+        typed.add(c)
+    for fields, dtype, lo, hi in ((COUNTS, "Int16", -2**15, 2**15 - 1), (WELLNESS, "Int8", -128, 127)):
+        for f in fields:
+            c = columns.get(f)
+            if c in out.columns and pd.api.types.is_numeric_dtype(out[c]):
+                # une valeur non entière (ex. 2.5 en wellness) garde un float32 plutôt que d'être tronquée
+                out[c] = out[c].astype(dtype if _integral(out[c], lo, hi) else "float32")
+                typed.add(c)
+    for c in out.columns:
+        if c not in typed and pd.api.types.is_float_dtype(out[c]):
+            out[c] = out[c].astype("float32")
+        elif c not in typed and pd.api.types.is_integer_dtype(out[c]):
+            out[c] = pd.to_numeric(out[c], downcast="integer")
+    return out
+
+
+def code_mask(s, values):
+    """Masque booléen `s in values` par comparaison de codes entiers (s catégorielle)."""
+    if not isinstance(s.dtype, pd.CategoricalDtype):
+        return s.astype(str).isin([str(v) for v in values]).to_numpy()
+    codes = s.cat.categories.get_indexer([str(v) for v in values])
+    return np.isin(s.cat.codes.to_numpy(), codes[codes >= 0])
@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+"""Dataset partitionné saison / équipe / mois, construit depuis les classeurs GPS.
+
+Arborescence (partitionnement Hive, lisible par pyarrow / DuckDB) :
+
+    DATASET_DIR/season=2025-2026/team=Pro/month=2025-10/<hash>-0.parquet
+
+Chaque classeur importé (une équipe, une ou plusieurs saisons) écrit ses
+propres fichiers (préfixe = hash du contenu) à côté de ceux déjà présents :
+l'export de la semaine n'efface pas le reste du mois. Chaque ligne porte
+l'instant de son import ; à la lecture, une séance (joueur, date, séance)
+présente dans plusieurs classeurs garde la version importée en dernier.
+Les filtres équipe et période de la barre latérale sont poussés dans
+pyarrow : seules les partitions concernées sont ouvertes, puis la date est
+filtrée ligne à ligne dans les fichiers lus.
+
+Construction en ligne de commande :
+
+    python -m qrm.partitions --team Pro "DATA BRUTES.xlsx"
+"""
+import argparse
+import os
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from qrm.ingest import CACHE_DIR, file_digest, read_table
+from qrm.schema import resolve
+
+DATASET_DIR = Path(os.environ.get("QRM_DATASET_DIR", CACHE_DIR / "dataset"))
+PARTITION_KEYS = ["season", "team", "month"]
+IMPORTED = "__import__"   # instant de l'import (ns) : la version la plus récente d'une séance l'emporte
+
+
+def _partitioning():
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    return ds.partitioning(pa.schema([(k, pa.string()) for k in PARTITION_KEYS]), flavor="hive")
+
+def season_of(dates):
+    """Saison football (juillet -> juin) : 2025-10-19 -> "2025-2026"."""
+    y = dates.dt.year - (dates.dt.month < 7)
+    return y.astype("Int64").astype(str) + "-" + (y + 1).astype("Int64").astype(str)
+
+def _month(value):
+    return pd.Timestamp(value).strftime("%Y-%m")
+
+
+# =============================
+# ÉCRITURE
+# =============================
+def add_workbook(src, team=None, sheet_name=None, root=DATASET_DIR):
+    """Ajoute un classeur / CSV au dataset. `team` sert si le fichier n'a pas de colonne équipe."""
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    df = read_table(src, sheet_name=sheet_name)
+    cols = resolve(df.columns)
+    if "date" not in cols:
+        raise KeyError("Colonne date introuvable : impossible de partitionner par mois.")
+    dates = pd.to_datetime(df[cols["date"]], errors="coerce")
+    df = df[dates.notna()].copy()
+    dates = dates[dates.notna()]
+    df[cols["date"]] = dates
+    if "team" in cols:
+        df["team"] = df.pop(cols["team"]).astype(str)
+    else:
+        df["team"] = str(team or "Equipe")
+    df["season"] = season_of(dates)
+    df["month"] = dates.dt.strftime("%Y-%m")
+    df[IMPORTED] = time.time_ns()
+
+    ds.write_dataset(
+        pa.Table.from_pandas(df, preserve_index=False), root, format="parquet",
+        partitioning=_partitioning(),
+        # un jeu de fichiers par classeur : les autres séances du mois restent ; réimporter le même
+        # classeur réécrit seulement ses propres fichiers
+        basename_template=f"{file_digest(src)[:12]}-{{i}}.parquet",
+        existing_data_behavior="overwrite_or_ignore",
+    )
+    return len(df)
+
+
+# =============================
+# LECTURE AVEC PUSHDOWN
+# =============================
+def list_partitions(root=DATASET_DIR):
+    """Partitions présentes, lues depuis l'arborescence (aucun fichier de données ouvert)."""
+    rows = []
+    for path in Path(root).glob("season=*/team=*/month=*/*.parquet"):
+        parts = dict(p.split("=", 1) for p in path.relative_to(root).parts[:-1])
+        rows.append({**parts, "path": str(path), "mtime": path.stat().st_mtime_ns})
+    return pd.DataFrame(rows, columns=PARTITION_KEYS + ["path", "mtime"])
+
+def dataset_version(root=DATASET_DIR):
+    parts = list_partitions(root)
+    return len(parts), int(parts["mtime"].max()) if len(parts) else 0
+
+def read_partitions(root=DATASET_DIR, teams=None, start=None, end=None, columns=None):
+    """Lit uniquement les partitions des équipes / mois demandés, puis filtre la date (bornes incluses)."""
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    if list_partitions(root).empty:
+        return pd.DataFrame()
+    dataset = ds.dataset(root, format="parquet", partitioning=_partitioning())
+    names = resolve([n for n in dataset.schema.names if n not in PARTITION_KEYS + [IMPORTED]])
+    date_col = names.get("date")
+    key = [names[f] for f in ("player", "date", "session") if f in names]
+    flt = None
+    def _and(expr):
+        return expr if flt is None else flt & expr
+    if teams:
+        flt = _and(ds.field("team").isin([str(t) for t in teams]))
+    if start is not None:
+        flt = _and(ds.field("month") >= _month(start))
+        if date_col:
+            flt = _and(ds.field(date_col) >= pa.scalar(pd.Timestamp(start)))
+    if end is not None:
+        flt = _and(ds.field("month") <= _month(end))
+        if date_col:
+            # fin inclusive sur toute la journée
+            stop = pd.Timestamp(end).normalize() + pd.Timedelta(days=1)
+            flt = _and(ds.field(date_col) < pa.scalar(stop))
+    read = None if columns is None else list(dict.fromkeys(list(columns) + key + [IMPORTED]))
+    if read is not None:
+        read = [c for c in read if c in dataset.schema.names]
+    df = dataset.to_table(filter=flt, columns=read).to_pandas()
+    if key and IMPORTED in df.columns:
+        # même séance dans plusieurs classeurs : la dernière importée
+        df = (df.sort_values(IMPORTED, kind="stable").drop_duplicates(subset=key, keep="last")
+              .sort_index().reset_index(drop=True))
+    df = df.drop(columns=[c for c in ("month", IMPORTED) if c in df.columns])
+    return df if columns is None else df[[c for c in columns if c in df.columns]]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ajoute des classeurs GPS au dataset partitionné.")
+    parser.add_argument("files", nargs="+")
+    parser.add_argument("--team", help="équipe des fichiers sans colonne équipe (Pro, Réserve, U19…)")
+    parser.add_argument("--root", default=str(DATASET_DIR))
+    args = parser.parse_args(argv)
+    for f in args.files:
+        n = add_workbook(f, team=args.team, root=Path(args.root))
+        print(f"{f} : {n} lignes")
+    print(list_partitions(args.root).groupby(["season", "team"]).size().rename("partitions").to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""Pics d'intensité (« worst-case scenarios ») sur fenêtres glissantes.
+
+Pour chaque série échantillon par échantillon (distance, distance HSR,
+débuts d'accélération / décélération, voir qrm.traces.peak_series), on
+cherche la somme maximale sur 1, 3 et 5 minutes de jeu. Une somme cumulée
+donne la somme de n'importe quelle fenêtre en O(1) ; les fins de fenêtre
+sont trouvées d'un seul np.searchsorted sur le temps de jeu cumulé, ce qui
+reste juste avec un échantillonnage irrégulier ou des trous d'acquisition.
+Toutes les fenêtres et toutes les séries d'un joueur sont traitées sur les
+mêmes sommes cumulées.
+
+Les résultats sont rangés à côté de la table de séance, dans PEAKS_FILE
+(une ligne par joueur / date / séance / métrique / fenêtre).
+"""
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from qrm.ingest import CACHE_DIR
+
+WINDOWS_S = (60, 180, 300)
+PEAK_METRICS = {"distance": "Distance (m/min)", "hsr": "HSR (m/min)", "accdec": "Acc + Déc (/min)"}
+PEAKS_FILE = CACHE_DIR / "peaks.parquet"
+KEY = ["Session", "Date", "Player Display Name"]
+COLUMNS = KEY + ["metric", "window_s", "value", "rate", "start_s"]
+
+
+def rolling_max(cs, elapsed, total, window):
+    """(somme max, début en s) sur les fenêtres complètes de `window` secondes ; NaN si la trace est plus courte."""
+    if total < window:
+        return np.nan, np.nan
+    # fenêtre [elapsed[i], elapsed[i] + window) : échantillons i .. j-1
+    j = np.searchsorted(elapsed, elapsed + window, "left")
+    sums = cs[j] - cs[:-1]
+    sums[elapsed + window > total] = -np.inf
+    i = int(np.argmax(sums))
+    return float(sums[i]), float(elapsed[i])
+
+def peak_demands(dt, series, windows=WINDOWS_S):
+    """Lignes {metric, window_s, value, rate, start_s} pour chaque série et chaque fenêtre."""
+    dt = np.asarray(dt, dtype="float64")
+    elapsed = np.r_[0.0, np.cumsum(dt)]
+    total, elapsed = elapsed[-1], elapsed[:-1]
+    rows = []
+    for metric, values in series.items():
+        cs = np.r_[0.0, np.cumsum(values)]
+        for w in windows:
+            value, start = rolling_max(cs, elapsed, total, w)
+            rows.append({"metric": metric, "window_s": int(w), "value": value,
+                         "rate": value / (w / 60), "start_s": start})
+    return rows
+
+
+# =============================
+# STOCKAGE
+# =============================
+def load_peaks(path=PEAKS_FILE):
+    path = Path(path)
+    return pd.read_parquet(path) if path.exists() else pd.DataFrame(columns=COLUMNS)
+
+def peaks_version(path=PEAKS_FILE):
+    path = Path(path)
+    return path.stat().st_mtime_ns if path.exists() else 0
+
+def save_peaks(peaks, path=PEAKS_FILE):
+    """Ajoute / remplace les pics des séances contenues dans `peaks`."""
+    if peaks.empty:
+        return
+    path = Path(path)
+    old = load_peaks(path)
+    if not old.empty:
+        replaced = pd.MultiIndex.from_frame(old[KEY]).isin(pd.MultiIndex.from_frame(peaks[KEY]))
+        peaks = pd.concat([old[~replaced], peaks], ignore_index=True)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(f".{os.getpid()}.tmp")
+    peaks[COLUMNS].to_parquet(tmp, index=False)
+    os.replace(tmp, path)
+
+def best_peaks(peaks, players=None, start=None, end=None):
+    """Meilleur pic (intensité par minute) par joueur, métrique et fenêtre sur la période (bornes incluses)."""
+    if peaks.empty:
+        return peaks
+    mask = np.ones(len(peaks), dtype=bool)
+    if players is not None:
+        mask &= peaks["Player Display Name"].astype(str).isin([str(p) for p in players]).to_numpy()
+    dates = pd.to_datetime(peaks["Date"])
+    if start is not None:
+        mask &= (dates >= pd.Timestamp(start)).to_numpy()
+    if end is not None:
+        mask &= (dates < pd.Timestamp(end).normalize() + pd.Timedelta(days=1)).to_numpy()
+    sel = peaks[mask].dropna(subset=["rate"])
+    return sel.loc[sel.groupby(["Player Display Name", "metric", "window_s"])["rate"].idxmax()].reset_index(drop=True)
@@ -0,0 +1,271 @@
+# -*- coding: utf-8 -*-
+"""Repères par rapport aux pairs : centiles effectif / poste et joueurs au profil de charge proche.
+
+PercentileIndex : pour chaque indicateur, les valeurs de toutes les séances
+(une par joueur et par jour, lues dans le cube) sont triées une fois par
+version des données, effectif complet puis chaque poste bout à bout. Un
+centile est alors une paire de np.searchsorted (rang moyen des ex aequo),
+vectorisée sur autant de valeurs qu'on veut.
+
+LoadProfiles : charges hebdomadaires (distance, HID, HSR, accélérations…)
+de chaque joueur sur WINDOW_WEEKS semaines glissantes, chaque indicateur
+ramené à son écart-type sur l'effectif pour que les mètres n'écrasent pas
+les compteurs. Toutes les fenêtres de toutes les saisons forment une
+matrice ; « qui a eu les 4 dernières semaines de X ? » est une distance
+euclidienne calculée d'un coup sur toute la matrice.
+
+Les postes viennent de la clé "positions" du fichier de règles d'alerte
+(qrm.alerts), joueur -> poste ; sans postes, seul l'effectif sert de référence.
+
+    pct = percentile_index(cube, version)
+    pct.percentile("hsr", [350, 600])
+    load_profiles(cube, version).similar("DIALLO", k=5)
+"""
+import json
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from qrm.alerts import RULES_FILE
+from qrm.instrument import cache_event, stage
+
+SQUAD = "effectif"
+# indicateur -> statistique journalière du cube (somme, max ou moyenne des séances du jour)
+PERCENTILE_METRICS = {"distance": "sum", "hid": "sum", "hsr": "sum", "accel": "sum", "decel": "sum",
+                      "sprint": "sum", "vmax": "max", "rpe": "mean"}
+PROFILE_METRICS = ["distance", "hid", "hsr", "accel", "decel", "sprint"]
+WINDOW_WEEKS = 4
+
+_CACHE_SIZE = 8
+_indexes = OrderedDict()
+
+
+def load_positions(path=None):
+    """Postes des joueurs (clé "positions" du fichier de règles d'alerte) ; {} s'il n'y en a pas."""
+    path = Path(path or RULES_FILE)
+    if not path.exists():
+        return {}
+    return {str(p): str(pos) for p, pos in json.loads(path.read_text(encoding="utf-8")).get("positions", {}).items()}
+
+def session_values(daily, metric):
+    """Valeur journalière de `metric` (NaN les jours sans mesure), selon PERCENTILE_METRICS."""
+    how = PERCENTILE_METRICS.get(metric, "sum")
+    count = daily[f"{metric}_count"].to_numpy("float64", na_value=0)
+    if how == "max":
+        v = daily[f"{metric}_max"].to_numpy("float64", na_value=np.nan)
+    else:
+        v = daily[f"{metric}_sum"].to_numpy("float64", na_value=np.nan)
+        if how == "mean":
+            with np.errstate(invalid="ignore", divide="ignore"):
+                v = v / count
+    return np.where(count > 0, v, np.nan)
+
+
+class PercentileIndex:
+    def __init__(self, daily, measures, positions=None):
+        self.positions = dict(positions or {})
+        self.metrics = [m for m in PERCENTILE_METRICS if m in measures]
+        player = daily["player"].astype(str)
+        self.players = pd.Index(sorted(player.unique()))
+        self.player_code = self.players.get_indexer(player)
+        self.days = daily["day"].to_numpy("datetime64[ns]")
+        self.groups = [SQUAD] + sorted(set(self.positions.values()))
+        # groupe de chaque joueur (0 = aucun poste connu), puis de chaque ligne
+        of_player = np.array([self.groups.index(self.positions[p]) if p in self.positions else 0
+                              for p in self.players], dtype=np.int64)
+        group = of_player[self.player_code]
+
+        self.values, self.sorted, self.bounds = {}, {}, {}
+        for m in self.metrics:
+            v = session_values(daily, m)
+            ok = ~np.isnan(v)
+            # effectif entier, puis chaque poste : un seul tableau trié par (groupe, valeur)
+            squad = np.sort(v[ok])
+            pv, pg = v[ok & (group > 0)], group[ok & (group > 0)]
+            order = np.lexsort((pv, pg))
+            self.values[m] = v
+            self.sorted[m] = np.concatenate([squad, pv[order]])
+            self.bounds[m] = np.concatenate([[0], len(squad) + np.searchsorted(pg[order], np.arange(1, len(self.groups) + 1))])
+
+    def __len__(self):
+        return len(self.days)
+
+    def _slice(self, metric, group=SQUAD):
+        g = self.groups.index(group) if group in self.groups else None
+        if g is None:
+            return self.sorted[metric][:0]
+        return self.sorted[metric][self.bounds[metric][g]:self.bounds[metric][g + 1]]
+
+    def percentile(self, metric, values, group=SQUAD):
+        """Centile (0-100, ex aequo au rang moyen) de chaque valeur parmi les séances du groupe."""
+        ref = self._slice(metric, group)
+        values = np.asarray(values, dtype="float64")
+        if not len(ref):
+            return np.full(values.shape, np.nan)
+        below = np.searchsorted(ref, values, "left")
+        equal = np.searchsorted(ref, values, "right") - below
+        return np.where(np.isnan(values), np.nan, 100 * (below + 0.5 * equal) / len(ref))
+
+    def quantiles(self, metric, q=(0.1, 0.25, 0.5, 0.75, 0.9), group=SQUAD):
+        """Valeurs aux quantiles `q` (interpolation linéaire), lues directement dans le tableau trié."""
+        ref = self._slice(metric, group)
+        if not len(ref):
+            return pd.Series(np.nan, index=list(q))
+        pos = np.asarray(q, dtype="float64") * (len(ref) - 1)
+        lo = np.floor(pos).astype(np.int64)
+        hi = np.minimum(lo + 1, len(ref) - 1)
+        return pd.Series(ref[lo] + (ref[hi] - ref[lo]) * (pos - lo), index=list(q))
+
+    def means(self, players=None, start=None, end=None):
+        """Moyenne par séance de chaque joueur sur la période (index joueur, colonnes indicateurs)."""
+        mask = np.ones(len(self.days), dtype=bool)
+        if start is not None:
+            mask &= self.days >= np.datetime64(pd.Timestamp(start))
+        if end is not None:
+            mask &= self.days <= np.datetime64(pd.Timestamp(end))
+        code = self.player_code[mask]
+        n = len(self.players)
+        out = {}
+        for m in self.metrics:
+            v = self.values[m][mask]
+            ok = ~np.isnan(v)
+            count = np.bincount(code[ok], minlength=n)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                out[m] = np.bincount(code[ok], weights=v[ok], minlength=n) / count
+        means = pd.DataFrame(out, index=self.players).rename_axis("player")
+        means = means.dropna(how="all")
+        return means if players is None else means.reindex([str(p) for p in players]).dropna(how="all")
+
+    def table(self, players=None, start=None, end=None):
+        """Moyennes par séance de la période et leurs centiles dans l'effectif (et dans le poste)."""
+        means = self.means(players, start, end)
+        out = pd.DataFrame(index=means.index)
+        group = np.array([self.positions.get(p) for p in means.index], dtype=object)
+        if self.positions:
+            out["position"] = group
+        for m in self.metrics:
+            v = means[m].to_numpy()
+            out[m] = v
+            out[f"{m}_pct"] = self.percentile(m, v)
+            if self.positions:
+                pos = np.full(len(v), np.nan)
+                for g in set(group) - {None}:
+                    pos[group == g] = self.percentile(m, v[group == g], g)
+                out[f"{m}_pct_poste"] = pos
+        return out
+
+
+class LoadProfiles:
+    def __init__(self, daily, measures, weeks=WINDOW_WEEKS):
+        self.metrics = [m for m in PROFILE_METRICS if m in measures]
+        self.weeks = weeks
+        cols = [f"{m}_sum" for m in self.metrics]
+        weekly = daily.groupby([daily["player"].astype(str), "week"], sort=False)[cols].sum()
+        player = weekly.index.get_level_values(0)
+        week = weekly.index.get_level_values(1)
+        self.players = pd.Index(sorted(player.unique()))
+        self.week_starts = pd.date_range(week.min(), week.max(), freq="7D") if len(week) else pd.DatetimeIndex([])
+
+        # cube joueurs x semaines x indicateurs, semaines sans séance à 0
+        P, W, M = len(self.players), len(self.week_starts), len(self.metrics)
+        load = np.zeros((P, W, M), dtype="float64")
+        if len(weekly):
+            wi = ((week - self.week_starts[0]) // pd.Timedelta(days=7)).to_numpy()
+            load[self.players.get_indexer(player), wi] = weekly.to_numpy("float64", na_value=0)
+        self.load = load
+        active_weeks = load.sum(axis=2) > 0
+        scale = load[active_weeks].std(axis=0) if active_weeks.any() else np.ones(M)
+        self.scale = np.where(scale > 0, scale, 1.0)
+
+        # fenêtres glissantes de `weeks` semaines : (joueurs x fenêtres, semaines x indicateurs)
+        self.n_windows = max(W - weeks + 1, 0)
+        if self.n_windows:
+            win = np.lib.stride_tricks.sliding_window_view(load / self.scale, weeks, axis=1)
+            self.X = win.transpose(0, 1, 3, 2).reshape(P * self.n_windows, weeks * M).astype("float32")
+            self.active = active_weeks[:, weeks - 1:] & (
+                np.lib.stride_tricks.sliding_window_view(active_weeks, weeks, axis=1).sum(axis=2) >= weeks // 2)
+            self.active = self.active.ravel()
+        else:
+            self.X, self.active = np.empty((0, weeks * M), dtype="float32"), np.empty(0, dtype=bool)
+
+    def __len__(self):
+        return int(self.active.sum())
+
+    def _window(self, end=None):
+        """Indice de la fenêtre dont la dernière semaine contient `end` (dernière semaine des données par défaut)."""
+        if end is None:
+            return self.n_windows - 1
+        w = np.searchsorted(self.week_starts.to_numpy(), np.datetime64(pd.Timestamp(end)), "right") - 1
+        return int(np.clip(w - (self.weeks - 1), 0, self.n_windows - 1))
+
+    def window_end(self, w):
+        return self.week_starts[w + self.weeks - 1] + pd.Timedelta(days=6)
+
+    def similar(self, player, k=5, end=None, same_period=True):
+        """Les k joueurs dont les `weeks` semaines ressemblent le plus à celles de `player` finissant à `end`.
+
+        same_period=False cherche dans toutes les fenêtres de toutes les saisons (meilleure fenêtre par joueur).
+        Colonnes : player, end (fin de la fenêtre retenue), distance (écarts-types).
+        """
+        p = self.players.get_indexer([str(player)])[0]
+        if p < 0 or not self.n_windows:
+            return pd.DataFrame(columns=["player", "end", "distance"])
+        w = self._window(end)
+        query = self.X[p * self.n_windows + w]
+        if same_period:
+            rows = np.arange(len(self.players)) * self.n_windows + w
+        else:
+            rows = np.arange(len(self.X))
+        rows = rows[self.active[rows] & (rows // self.n_windows != p)]
+        if not rows.size:   # seul joueur actif sur la période
+            return pd.DataFrame(columns=["player", "end", "distance"])
+        dist = np.sqrt(((self.X[rows] - query) ** 2).sum(axis=1))
+        who = rows // self.n_windows
+        # meilleure fenêtre de chaque joueur, puis les k plus proches
+        order = np.lexsort((dist, who))
+        first = order[np.r_[True, who[order][1:] != who[order][:-1]]]
+        best = first[np.argsort(dist[first], kind="stable")[:k]]
+        return pd.DataFrame({"player": self.players[who[best]],
+                             "end": [self.window_end(r % self.n_windows) for r in rows[best]],
+                             "distance": dist[best]})
+
+    def weekly(self, players, end=None):
+        """Charges hebdomadaires des joueurs sur leur fenêtre (format long : player, week, metric, load)."""
+        w = self._window(end)
+        codes = self.players.get_indexer([str(p) for p in players])
+        codes = codes[codes >= 0]
+        part = self.load[codes, w:w + self.weeks]
+        P, W, M = part.shape
+        return pd.DataFrame({"player": np.repeat(self.players[codes], W * M),
+                             "week": np.tile(np.repeat(self.week_starts[w:w + self.weeks], M), P),
+                             "metric": np.tile(self.metrics, P * W),
+                             "load": part.ravel()})
+
+
+def _memo(kind, key, build, rows_in):
+    key = (kind,) + key
+    if key in _indexes:
+        _indexes.move_to_end(key)
+        cache_event(kind, True)
+        return _indexes[key]
+    cache_event(kind, False)
+    with stage(kind, rows_in=rows_in) as s:
+        index = build()
+        s["rows_out"] = len(index)
+    _indexes[key] = index
+    if len(_indexes) > _CACHE_SIZE:
+        _indexes.popitem(last=False)
+    return index
+
+def percentile_index(cube, version, positions=None):
+    """PercentileIndex du cube, mémorisé par (version des données, postes)."""
+    positions = load_positions() if positions is None else positions
+    return _memo("centiles", (version, tuple(sorted(positions.items()))),
+                 lambda: PercentileIndex(cube.daily, cube.measures, positions), len(cube.daily))
+
+def load_profiles(cube, version, weeks=WINDOW_WEEKS):
+    """LoadProfiles du cube, mémorisé par (version des données, fenêtre)."""
+    return _memo("profils de charge", (version, weeks),
+                 lambda: LoadProfiles(cube.daily, cube.measures, weeks), len(cube.daily))
@@ -0,0 +1,242 @@
+# -*- coding: utf-8 -*-
+"""Simulation de la semaine planifiée : totaux, ACWR et alertes projetés pour des centaines de plans à la fois.
+
+Un plan est une liste de séances futures (jour, séance, joueur — vide =
+tout l'effectif —, charges prévues : distance, HID, HSR, accélérations,
+décélérations). Les candidats sont des multiplicateurs par séance
+(K plans x S séances) : « la même semaine à 80 %, 90 %… », ou une séance
+allégée seulement.
+
+Tout ce qui est projeté est linéaire en charges, donc chaque séance planifiée
+est réduite une fois à une matrice séances x (joueurs x indicateurs) — poids
+EWMA, appartenance aux fenêtres 7 / 28 jours — et les K plans sont évalués par
+quelques produits matriciels :
+
+- totaux de la semaine par joueur ;
+- ACWR 7/28 j et ACWR EWMA au dernier jour du plan, repris de l'état de
+  qrm.workload au dernier jour de données (mêmes formules) ;
+- règles d'alerte de alertes.json applicables à une charge prévue : "acwr"
+  sur l'ACWR EWMA projeté, "relative" / "mean" (ex. HSR < 80 % de la moyenne
+  du joueur) et "threshold" sur chaque séance planifiée.
+
+Les règles "rolling" et "max" portent sur l'historique séance par séance et
+ne sont pas projetées.
+
+    planner = Planner(cube, compute_workload(cube))
+    proj = planner.project(repeat_last_week(cube), np.linspace(0.5, 1.5, 101))
+"""
+import threading
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from qrm.alerts import OPS, RULES_FILE, load_rules, thresholds
+from qrm.instrument import stage
+from qrm.schema import resolve
+from qrm.workload import ACUTE_DAYS, CHRONIC_DAYS, latest
+
+PLAN_METRICS = ["distance", "hid", "hsr", "accel", "decel"]
+
+
+def repeat_last_week(cube, metrics=PLAN_METRICS, days=7):
+    """Plan par défaut : les séances des `days` derniers jours de chaque joueur, décalées de `days` jours."""
+    d = cube.daily
+    last = d["day"].max()
+    week = d[d["day"] > last - pd.Timedelta(days=days)]
+    plan = pd.DataFrame({"day": week["day"] + pd.Timedelta(days=days),
+                         "session": (week["day"] + pd.Timedelta(days=days)).dt.strftime("%a %d/%m"),
+                         "player": week["player"].astype(str)})
+    for m in metrics:
+        if f"{m}_sum" in d:
+            plan[m] = week[f"{m}_sum"].astype("float64")
+    return plan.reset_index(drop=True)
+
+def read_plan(df):
+    """Plan saisi dans un tableur : en-têtes résolus comme les données (Date, Séance, Joueur, Distance, HSR…)."""
+    C = resolve(df.columns)
+    if "date" not in C:
+        raise KeyError("Colonne date introuvable dans le plan.")
+    plan = pd.DataFrame({"day": pd.to_datetime(df[C["date"]], errors="coerce").dt.normalize(),
+                         "session": df[C["session"]].astype(str) if "session" in C else "",
+                         "player": df[C["player"]] if "player" in C else None})
+    for m in PLAN_METRICS:
+        if m in C:
+            plan[m] = pd.to_numeric(df[C[m]], errors="coerce")
+    return plan.dropna(subset=["day"]).reset_index(drop=True)
+
+
+class Projection:
+    """Résultat de Planner.project : tableaux (plans x joueurs x indicateurs) et alertes par plan."""
+
+    def __init__(self, players, metrics, multipliers, totals, acwr, ewma_acwr, alerts, rules):
+        self.players, self.metrics, self.multipliers = players, metrics, multipliers
+        self.totals, self.acwr, self.ewma_acwr = totals, acwr, ewma_acwr
+        self.alerts = alerts    # (plans x joueurs x règles) : nombre de déclenchements
+        self.rules = rules
+
+    def __len__(self):
+        return len(self.multipliers)
+
+    def summary(self):
+        """Une ligne par plan : moyenne des totaux de l'effectif et nombre de joueurs touchés par chaque règle."""
+        out = pd.DataFrame({f"{m}_total": self.totals[:, :, j].mean(axis=1) for j, m in enumerate(self.metrics)})
+        for r, rule in enumerate(self.rules):
+            out[rule["id"]] = (self.alerts[:, :, r] > 0).sum(axis=1)
+        out["players_alerted"] = (self.alerts.sum(axis=2) > 0).sum(axis=1)
+        return out
+
+    def squad(self, k):
+        """Plan k, une ligne par (joueur, indicateur) : total de la semaine, ACWR, ACWR EWMA."""
+        P, M = len(self.players), len(self.metrics)
+        return pd.DataFrame({"player": np.repeat(self.players, M), "metric": np.tile(self.metrics, P),
+                             "total": self.totals[k].ravel(), "acwr": self.acwr[k].ravel(),
+                             "ewma_acwr": self.ewma_acwr[k].ravel()})
+
+    def player_alerts(self, k):
+        """Plan k : règles déclenchées par joueur (player, rule, label, severity, count)."""
+        p, r = np.nonzero(self.alerts[k])
+        return pd.DataFrame({"player": self.players[p], "rule": [self.rules[i]["id"] for i in r],
+                             "label": [self.rules[i]["label"] for i in r],
+                             "severity": [self.rules[i]["severity"] for i in r],
+                             "count": self.alerts[k][p, r]})
+
+
+class Planner:
+    def __init__(self, cube, workload, config=None, metrics=PLAN_METRICS):
+        self.config = config if config is not None else load_rules()
+        present = set(workload["metric"].unique())
+        self.metrics = [m for m in metrics if m in present]
+        self.last_day = workload["day"].max()
+        # seuls les CHRONIC_DAYS derniers jours servent (le dernier porte l'état EWMA)
+        recent = workload["day"] > self.last_day - pd.Timedelta(days=CHRONIC_DAYS)
+        wl = workload[recent & workload["metric"].isin(self.metrics)]
+        self.players = pd.Index(sorted(wl["player"].astype(str).unique()))
+        P, M = len(self.players), len(self.metrics)
+        p = self.players.get_indexer(wl["player"].astype(str))
+        j = pd.Index(self.metrics).get_indexer(wl["metric"])
+
+        # état EWMA au dernier jour de données (toutes les séries y arrivent : calendrier continu)
+        last = latest(wl)
+        lp, lj = self.players.get_indexer(last["player"].astype(str)), pd.Index(self.metrics).get_indexer(last["metric"])
+        self.ewma = {}
+        for col in ("ewma_acute", "ewma_chronic"):
+            a = np.zeros((P, M))
+            a[lp, lj] = last[col].to_numpy("float64", na_value=0)
+            self.ewma[col] = a
+        # charges des CHRONIC_DAYS derniers jours : offset 0 = dernier jour de données
+        self.recent = np.zeros((CHRONIC_DAYS, P, M))
+        age = ((self.last_day - wl["day"]) // pd.Timedelta(days=1)).to_numpy()
+        keep = age < CHRONIC_DAYS
+        self.recent[age[keep], p[keep], j[keep]] = wl["load"].to_numpy("float64", na_value=0)[keep]
+
+        # références "mean" des règles relatives : somme et nombre de séances du joueur
+        rollup = cube.rollup(["player"])
+        rollup.index = rollup.index.astype(str)
+        self.rules = [r for r in self.config["rules"]
+                      if r["field"] in self.metrics
+                      and (r["kind"] in ("acwr", "threshold") or r.get("baseline") == "mean")]
+        fields = sorted({r["field"] for r in self.rules if r["kind"] == "relative"})
+        self.hist_sum = {f: rollup[f"{f}_sum"].reindex(self.players).to_numpy("float64", na_value=0) for f in fields}
+        self.hist_count = {f: rollup[f"{f}_count"].reindex(self.players).to_numpy("float64", na_value=0)
+                           for f in fields}
+
+    def _rows(self, plan):
+        """Plan en lignes (joueur, séance) : lignes « tout l'effectif » répétées pour chaque joueur."""
+        plan = plan[plan["day"] > self.last_day]
+        squad = plan["player"].isna() | (plan["player"].astype(str).str.strip().isin(["", "nan", "None"]))
+        every = plan[squad].loc[lambda d: d.index.repeat(len(self.players))].assign(
+            player=np.tile(self.players.to_numpy(), int(squad.sum())))
+        rows = pd.concat([plan[~squad].assign(player=plan.loc[~squad, "player"].astype(str)), every])
+        rows = rows[rows["player"].isin(self.players)]
+        key = rows["day"].dt.strftime("%Y-%m-%d") + " " + rows["session"].astype(str)
+        sessions, s = np.unique(key.to_numpy(str), return_inverse=True)
+        return rows, sessions, s
+
+    def sessions(self, plan):
+        """Séances distinctes du plan (jour + libellé), dans l'ordre des colonnes de `multipliers`."""
+        return [str(k) for k in self._rows(plan)[1]]
+
+    def project(self, plan, multipliers):
+        """Projette `plan` sous K jeux de multiplicateurs ((K,) pour tout le plan, ou (K, séances))."""
+        rows, sessions, s = self._rows(plan)
+        mult = np.asarray(multipliers, dtype="float64")
+        mult = np.repeat(mult[:, None], len(sessions), axis=1) if mult.ndim == 1 else mult
+        K, S, P, M = len(mult), len(sessions), len(self.players), len(self.metrics)
+        with stage("planification", rows_in=len(rows) * K) as info:
+            p = self.players.get_indexer(rows["player"])
+            x = np.column_stack([rows[m].to_numpy("float64", na_value=np.nan) if m in rows else np.full(len(rows), np.nan)
+                                 for m in self.metrics]) if M else np.empty((len(rows), 0))
+            x0 = np.nan_to_num(x)
+            horizon = rows["day"].max() if len(rows) else self.last_day + pd.Timedelta(days=1)
+            gap = (horizon - self.last_day).days                          # jours simulés après les données
+            lag = ((horizon - rows["day"]) // pd.Timedelta(days=1)).to_numpy()   # 0 = dernier jour du plan
+
+            def reduce(weights):
+                # séances x (joueurs x indicateurs) : contribution d'un multiplicateur 1 de chaque séance
+                g = np.zeros((S, P, M))
+                np.add.at(g, (s, p), x0 * weights[:, None])
+                return mult @ g.reshape(S, P * M)
+
+            totals = reduce(np.ones(len(rows))).reshape(K, P, M)
+            # ACWR glissant : fenêtres ACUTE / CHRONIC finissant au dernier jour du plan
+            past = lambda days: self.recent[:max(days - gap, 0)].sum(axis=0)
+            acute = (reduce((lag < ACUTE_DAYS).astype(float)).reshape(K, P, M) + past(ACUTE_DAYS)) / ACUTE_DAYS
+            chronic = (reduce((lag < CHRONIC_DAYS).astype(float)).reshape(K, P, M) + past(CHRONIC_DAYS)) / CHRONIC_DAYS
+            # EWMA (adjust=False) : e_H = (1-a)^gap e_L + somme a (1-a)^lag x
+            ewma = {}
+            for col, n in (("ewma_acute", ACUTE_DAYS), ("ewma_chronic", CHRONIC_DAYS)):
+                a = 2 / (n + 1)
+                ewma[col] = (1 - a) ** gap * self.ewma[col] + reduce(a * (1 - a) ** lag).reshape(K, P, M)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                acwr = acute / np.where(chronic > 0, chronic, np.nan)
+                ewma_acwr = ewma["ewma_acute"] / np.where(ewma["ewma_chronic"] > 0, ewma["ewma_chronic"], np.nan)
+            # indicateur absent du plan : inconnu, pas une semaine à zéro
+            unplanned = np.isnan(x).all(axis=0)
+            for a in (totals, acwr, ewma_acwr):
+                a[:, :, unplanned] = np.nan
+            alerts = self._alerts(mult, s, p, x, totals, ewma_acwr)
+            info["rows_out"] = K * P
+        return Projection(self.players, self.metrics, mult, totals, acwr, ewma_acwr, alerts, self.rules)
+
+    def _alerts(self, mult, s, p, x, totals, ewma_acwr):
+        K, P = len(mult), len(self.players)
+        names = self.players.to_numpy(str)
+        # séances planifiées -> joueur : le nombre de déclenchements par joueur est un produit matriciel
+        owner = np.zeros((len(p), P))
+        owner[np.arange(len(p)), p] = 1
+        out = np.zeros((K, P, len(self.rules)), dtype=np.int32)
+        for r, rule in enumerate(self.rules):
+            j = self.metrics.index(rule["field"])
+            limit = thresholds(rule, names, self.config["positions"])
+            with np.errstate(invalid="ignore", divide="ignore"):
+                if rule["kind"] == "acwr":
+                    out[:, :, r] = OPS[rule["op"]](ewma_acwr[:, :, j], limit)
+                    continue
+                value = mult[:, s] * x[:, j]                              # plans x séances planifiées
+                if rule["kind"] == "relative":
+                    # moyenne du joueur séances planifiées comprises, comme AlertEngine
+                    planned = owner.T @ ~np.isnan(x[:, j])
+                    mean = (self.hist_sum[rule["field"]] + totals[:, :, j]) / (self.hist_count[rule["field"]] + planned)
+                    lim = limit[p] * mean[:, p]
+                else:
+                    lim = np.broadcast_to(limit[p], value.shape)
+                hit = OPS[rule["op"]](value, lim) & ~np.isnan(value) & ~np.isnan(lim)
+            out[:, :, r] = np.rint(hit @ owner).astype(np.int32)
+        return out
+
+
+_planners = {}
+_planners_lock = threading.Lock()
+
+
+def squad_planner(name, version, cube, workload, path=None):
+    """Planner partagé par le processus, reconstruit si les données ou le fichier de règles ont changé."""
+    path = Path(path or RULES_FILE)
+    key = (version, path.stat().st_mtime_ns if path.exists() else None)
+    with _planners_lock:
+        cached = _planners.get(name)
+        if cached is None or cached[0] != key:
+            with stage("planification : état initial", rows_in=len(workload)):
+                cached = _planners[name] = (key, Planner(cube, workload, load_rules(path)))
+        return cached[1]
@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+"""Contrôle qualité des séances, en un passage vectorisé, avant le typage (qrm.model.compact).
+
+Chaque contrôle est un masque numpy calculé sur toute la table : clés
+manquantes (joueur, date), dates illisibles, doublons (joueur, date,
+séance), valeurs non numériques, valeurs hors bornes (LIMITS), distances et
+vitesses impossibles. Deux sorties :
+
+- une ligne douteuse dans son ensemble (clé manquante, doublon, trace GPS
+  aberrante) est écartée (DROP) ;
+- une valeur isolée hors échelle (wellness 7/5, RPE 12…) est effacée
+  (CLEAR) : la séance reste, la case devient manquante.
+
+Les cas relevés forment la quarantaine (une ligne par problème, avec le
+motif et la valeur d'origine) ; report() la résume. Seules les lignes
+signalées sont parcourues pour construire la quarantaine : sur une table
+propre, le contrôle coûte quelques comparaisons vectorisées par colonne.
+
+    clean, quarantine = validate(df, resolve(df.columns))
+"""
+import numpy as np
+import pandas as pd
+
+from qrm.instrument import stage
+from qrm.model import compact
+from qrm.registry import shared
+
+DROP, CLEAR = "ligne écartée", "valeur effacée"
+COLUMNS = ["row", "player", "date", "session", "field", "column", "value", "reason", "action"]
+
+# champ logique -> (min, max, action hors bornes) ; unités du classeur (m, km/h, min, échelles)
+LIMITS = {
+    "distance":   (0, 20000, DROP),
+    "hid":        (0, 8000, CLEAR),
+    "hsr":        (0, 4000, CLEAR),
+    "vmax":       (0, 45, DROP),      # au-delà de 45 km/h : trace GPS aberrante
+    "duration":   (0, 300, CLEAR),
+    "accel":      (0, 500, CLEAR),
+    "decel":      (0, 500, CLEAR),
+    "sprint":     (0, 200, CLEAR),
+    "rpe":        (0, 10, CLEAR),
+    "sleep":      (1, 5, CLEAR),
+    "fatigue":    (1, 5, CLEAR),
+    "stress":     (1, 5, CLEAR),
+    "pain":       (1, 5, CLEAR),
+    "motivation": (1, 5, CLEAR),
+}
+MAX_MEAN_SPEED = 250   # m/min sur toute la séance (15 km/h de moyenne)
+KEY = {"player": "joueur", "date": "date", "session": "séance"}
+
+
+def _numeric(s):
+    """(valeurs float64, masque des valeurs présentes mais non numériques)."""
+    if pd.api.types.is_numeric_dtype(s) and not pd.api.types.is_bool_dtype(s):
+        return s.to_numpy("float64", na_value=np.nan), None
+    v = pd.to_numeric(s, errors="coerce").to_numpy("float64", na_value=np.nan)
+    return v, s.notna().to_numpy() & np.isnan(v)
+
+def _dates(s):
+    """(dates datetime64, masque des dates présentes mais illisibles)."""
+    if pd.api.types.is_datetime64_any_dtype(s):
+        return s, None
+    d = pd.to_datetime(s, errors="coerce")
+    return d, s.notna().to_numpy() & d.isna().to_numpy()
+
+def _missing(s):
+    if pd.api.types.is_numeric_dtype(s) or pd.api.types.is_datetime64_any_dtype(s):
+        return s.isna().to_numpy()
+    return (s.isna() | (s.astype(str).str.strip() == "")).to_numpy()
+
+
+def validate(df, columns):
+    """(table sans les lignes écartées ni les valeurs effacées, quarantaine) ; `columns` = mapping qrm.schema."""
+    col = {f: c for f, c in columns.items() if c in df.columns}
+    with stage("contrôle qualité", rows_in=len(df)) as s:
+        out = df.copy(deep=False)
+        checks = []   # (masque, champ, motif, action)
+
+        for f in ("player", "date"):
+            if f in col:
+                checks.append((_missing(df[col[f]]), f, "clé manquante", DROP))
+        if "date" in col:
+            out[col["date"]], bad = _dates(df[col["date"]])
+            if bad is not None:
+                checks.append((bad, "date", "date illisible", DROP))
+        key = [f for f in KEY if f in col]
+        if "player" in col and "date" in col:
+            # la dernière occurrence l'emporte, comme pour l'ingestion incrémentale
+            checks.append((out.duplicated(subset=[col[f] for f in key], keep="last").to_numpy(), "player",
+                           f"doublon ({', '.join(KEY[f] for f in key)})", DROP))
+
+        values = {}
+        for f, (lo, hi, action) in LIMITS.items():
+            if f not in col:
+                continue
+            v, bad = _numeric(df[col[f]])
+            if bad is not None:
+                checks.append((bad, f, "valeur non numérique", CLEAR))
+                out[col[f]] = v
+            with np.errstate(invalid="ignore"):
+                checks.append(((v < lo) | (v > hi), f, f"hors bornes [{lo}, {hi}]", action))
+            values[f] = v
+
+        if "distance" in values:
+            dist = values["distance"]
+            with np.errstate(invalid="ignore", divide="ignore"):
+                for f in ("hid", "hsr"):
+                    if f in values:
+                        checks.append((values[f] > dist + 1, f, "supérieure à la distance totale", DROP))
+                if "duration" in values:
+                    speed = dist / values["duration"]
+                    checks.append(((values["duration"] > 0) & (speed > MAX_MEAN_SPEED), "distance",
+                                   f"vitesse moyenne > {MAX_MEAN_SPEED} m/min", DROP))
+
+        drop = np.zeros(len(df), dtype=bool)
+        found = []
+        for mask, f, reason, action in checks:
+            pos = np.flatnonzero(mask)
+            if not pos.size:
+                continue
+            found.append((pos, f, reason, action))
+            if action == DROP:
+                drop[pos] = True
+            else:
+                c = col[f]
+                out[c] = out[c].mask(mask)
+        clean = out[~drop] if drop.any() else out
+        s["rows_out"] = len(clean)
+    return clean, _quarantine(df, out, col, found)
+
+def _quarantine(df, out, col, found):
+    if not found:
+        return pd.DataFrame(columns=COLUMNS)
+    pos = np.concatenate([p for p, *_ in found])
+    sizes = [len(p) for p, *_ in found]
+    ctx = lambda f, frame: frame[col[f]].to_numpy()[pos] if f in col else None
+    q = pd.DataFrame({
+        "row": df.index.to_numpy()[pos],
+        "player": ctx("player", df),
+        "date": ctx("date", out),
+        "session": ctx("session", df),
+        "field": np.repeat([f for _, f, _, _ in found], sizes),
+        "column": np.repeat([col[f] for _, f, _, _ in found], sizes),
+        "value": np.concatenate([df[col[f]].iloc[p].astype(str).to_numpy() for p, f, _, _ in found]),
+        "reason": np.repeat([r for _, _, r, _ in found], sizes),
+        "action": np.repeat([a for *_, a in found], sizes),
+    }, columns=COLUMNS)
+    return q.sort_values(["row", "field"], kind="stable").reset_index(drop=True)
+
+
+def report(quarantine):
+    """Une ligne par (motif, champ) : action, nombre de cas, joueurs concernés, exemple de valeur."""
+    if quarantine.empty:
+        return pd.DataFrame(columns=["reason", "field", "action", "count", "players", "example"])
+    g = quarantine.groupby(["reason", "field", "action"], sort=False)
+    return (g.agg(count=("row", "size"), players=("player", "nunique"), example=("value", "first"))
+            .reset_index().sort_values("count", ascending=False, kind="stable").reset_index(drop=True))
+
+def describe(quarantine, rows):
+    """Résumé d'une ligne, ex. « 3 lignes écartées, 2 valeurs effacées sur 9000 »."""
+    if quarantine.empty:
+        return f"Aucune anomalie sur {rows} lignes."
+    dropped = quarantine.loc[quarantine["action"] == DROP, "row"].nunique()
+    cleared = int((quarantine["action"] == CLEAR).sum())
+    return f"{dropped} ligne(s) écartée(s), {cleared} valeur(s) effacée(s) sur {rows} lignes."
+
+
+def checked(kind, version, build, columns):
+    """(table contrôlée puis compactée, quarantaine), partagées par (kind, version) comme qrm.registry.shared."""
+    found = {}
+    def table():
+        clean, found["quarantine"] = validate(build(), columns)
+        return compact(clean, columns)
+    df = shared(kind, version, table)
+    # la quarantaine accompagne la table ; recalculée seulement si le registre l'a évincée seule
+    quarantine = shared(f"{kind}:quarantaine", version,
+                        lambda: found["quarantine"] if found else validate(build(), columns)[1])
+    return df, quarantine
@@ -0,0 +1,209 @@
+# -*- coding: utf-8 -*-
+"""Wellness en z-scores par rapport à la référence de chaque joueur, et indice de forme.
+
+Un 2/5 en sommeil n'a pas le même sens pour tous : chaque réponse est
+comparée à la moyenne / l'écart-type du joueur sur les BASELINE_DAYS jours
+précédents (le jour même exclu). Les items « négatifs » (fatigue, stress,
+douleurs) sont retournés pour qu'un z positif signifie toujours « mieux que
+d'habitude » ; l'indice de forme est la moyenne des z disponibles, aussi
+exprimé en note T (50 = habituel, 40 = un écart-type en dessous).
+
+Deux chemins, mêmes résultats :
+
+- zscores() : tout l'historique, vectorisé (courbes dans le temps) ;
+- ReadinessEngine : références glissantes tenues à jour jour par jour
+  (sommes et sommes des carrés sur une fenêtre, O(1) par questionnaire),
+  pour le tableau de forme de l'effectif, rendu en quelques millisecondes.
+  Un moteur par source qui ne fait que grandir (le magasin de app.py) ; pour
+  un classeur importé, latest(zscores(...)) partagé par le registre suffit.
+"""
+import threading
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from qrm.instrument import stage
+
+# champ logique -> sens (+1 : plus haut = mieux)
+ITEMS = {"sleep": 1, "fatigue": -1, "stress": -1, "pain": -1, "motivation": 1}
+ITEM_LABELS = {"sleep": "Sommeil", "fatigue": "Fatigue", "stress": "Stress", "pain": "Douleurs",
+               "motivation": "Motivation"}
+BASELINE_DAYS = 28
+MIN_DAYS = 5        # en dessous, pas de référence fiable : z manquant
+SD_FLOOR = 0.5      # sur une échelle 1-5, un joueur qui répond toujours 3 n'a pas un écart-type nul « utile »
+ALERT_Z = -1.0
+
+_engines = {}
+_engines_lock = threading.Lock()
+
+
+def daily_wellness(df, columns):
+    """Moyenne par (joueur, jour) des items présents ; colonnes player, day + champs logiques."""
+    items = [f for f in ITEMS if columns.get(f) in df.columns]
+    out = pd.DataFrame({"player": df[columns["player"]].astype(str).to_numpy(),
+                        "day": pd.to_datetime(df[columns["date"]]).dt.normalize().to_numpy()})
+    for f in items:
+        out[f] = pd.to_numeric(df[columns[f]], errors="coerce").astype("float64").to_numpy()
+    out = out.dropna(subset=items, how="all") if items else out.iloc[:0]
+    return out.groupby(["player", "day"], as_index=False, sort=True)[items].mean()
+
+def _composite(z):
+    readiness = z.mean(axis=1, skipna=True)
+    return readiness, (50 + 10 * readiness).clip(0, 100)
+
+def _squad(out):
+    out["alerte"] = out["readiness"] < ALERT_Z
+    return out.sort_values("readiness", na_position="last").reset_index(drop=True)
+
+
+# =============================
+# HISTORIQUE COMPLET (vectorisé)
+# =============================
+def zscores(daily, window=BASELINE_DAYS, min_days=MIN_DAYS):
+    """z-score orienté de chaque item, chaque (joueur, jour), plus readiness et readiness_index."""
+    items = [f for f in ITEMS if f in daily.columns]
+    roll = daily.set_index("day").groupby("player", sort=False)[items].rolling(f"{window}D", closed="left")
+    mean, std, count = roll.mean(), roll.std(), roll.count()
+    values = daily.set_index(["player", "day"])[items]
+    mean, std, count = (x.reindex(values.index) for x in (mean, std, count))
+    z = (values - mean) / np.maximum(std.fillna(0), SD_FLOOR)
+    z = z.where(count >= min_days) * pd.Series(ITEMS)[items]
+    out = z.add_prefix("z_")
+    out["readiness"], out["readiness_index"] = _composite(z)
+    return values.join(out).reset_index()
+
+def latest(z):
+    """Tableau de forme (même format que ReadinessEngine.table) tiré de zscores() : dernier jour de chaque joueur."""
+    return _squad(z.sort_values("day").groupby("player", sort=False).tail(1).copy())
+
+
+# =============================
+# RÉFÉRENCES INCRÉMENTALES
+# =============================
+class _Baseline:
+    """Fenêtre glissante d'un joueur : jours présents, sommes, sommes des carrés et effectifs par item."""
+
+    def __init__(self, k):
+        self.days = deque()
+        self.s1, self.s2, self.n = np.zeros(k), np.zeros(k), np.zeros(k)
+        self.last_day = None
+
+    def evict(self, before):
+        while self.days and self.days[0][0] < before:
+            _, v = self.days.popleft()
+            ok = ~np.isnan(v)
+            self.s1[ok] -= v[ok]
+            self.s2[ok] -= v[ok] ** 2
+            self.n[ok] -= 1
+
+    def z(self, v, min_days):
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = self.s1 / self.n
+            var = (self.s2 - self.n * mean ** 2) / (self.n - 1)
+        sd = np.maximum(np.sqrt(np.clip(np.nan_to_num(var), 0, None)), SD_FLOOR)
+        return np.where(self.n >= min_days, (v - mean) / sd, np.nan)
+
+    def push(self, day, v):
+        ok = ~np.isnan(v)
+        self.s1[ok] += v[ok]
+        self.s2[ok] += v[ok] ** 2
+        self.n[ok] += 1
+        self.days.append((day, v))
+        self.last_day = day
+
+
+class ReadinessEngine:
+    def __init__(self, items=None, window=BASELINE_DAYS, min_days=MIN_DAYS):
+        self.items = list(items or ITEMS)
+        self.sign = np.array([ITEMS[f] for f in self.items], dtype="float64")
+        self.window = pd.Timedelta(days=window)
+        self.min_days = min_days
+        self._players = {}
+        self._latest = {}        # joueur -> (jour, valeurs, z orientés)
+        self._seen = set()       # hash des lignes (joueur, jour, valeurs) déjà intégrées
+        self.version = None      # version des données déjà intégrée (voir squad_readiness)
+        self.lock = threading.Lock()
+
+    def add(self, player, day, values):
+        """Intègre le questionnaire du jour (postérieur au dernier jour connu du joueur)."""
+        day = pd.Timestamp(day)
+        values = np.asarray(values, dtype="float64")
+        b = self._players.setdefault(player, _Baseline(len(self.items)))
+        if b.last_day is not None and day <= b.last_day:
+            raise ValueError(f"{player} : {day:%Y-%m-%d} n'est pas postérieur au {b.last_day:%Y-%m-%d}")
+        b.evict(day - self.window)
+        z = b.z(values, self.min_days) * self.sign
+        b.push(day, values)
+        self._latest[player] = (day, values, z)
+
+    def _replay(self, player, rows):
+        """(Re)construit un joueur à partir de ses seuls jours utiles au dernier z-score."""
+        self._players.pop(player, None)
+        last = rows["day"].max()
+        recent = rows[rows["day"] >= last - self.window]
+        for day, values in zip(recent["day"], recent[self.items].to_numpy("float64")):
+            self.add(player, day, values)
+
+    def update(self, daily):
+        """Intègre les lignes nouvelles de `daily` (daily_wellness) ; ne relit pas l'historique déjà vu.
+
+        Seules les lignes à partir du dernier jour intégré de chaque joueur (ou d'un joueur inconnu) sont
+        comparées à celles déjà vues : un jour plus ancien d'un joueur suivi est considéré comme connu.
+        """
+        if daily.empty:
+            return 0
+        daily = daily.reindex(columns=["player", "day"] + self.items)
+        with self.lock:
+            last = pd.to_datetime(daily["player"].map({p: b.last_day for p, b in self._players.items()})).to_numpy()
+            day = daily["day"].to_numpy()
+            recent = np.flatnonzero(np.isnat(last) | (day >= last))
+            keys = pd.util.hash_pandas_object(daily.iloc[recent], index=False).to_numpy()
+            new = np.fromiter((k not in self._seen for k in keys), dtype=bool, count=len(keys))
+            if not new.any():
+                return 0
+            fresh = daily.iloc[recent[new]]
+            # joueur inconnu ou dernier jour corrigé : reconstruit depuis ses BASELINE_DAYS derniers jours
+            known = last[recent[new]]
+            late = fresh["player"][np.isnat(known) | (fresh["day"].to_numpy() <= known)].unique()
+            for player in late:
+                self._replay(player, daily[daily["player"] == player])
+            ahead = fresh[~fresh["player"].isin(late)].sort_values("day", kind="stable")
+            for player, day, values in zip(ahead["player"], ahead["day"], ahead[self.items].to_numpy("float64")):
+                self.add(player, day, values)
+            self._seen.update(keys[new].tolist())
+        return int(new.sum())
+
+    def table(self):
+        """Dernier questionnaire de chaque joueur : valeurs, z orientés, readiness et note T."""
+        if not self._latest:
+            return pd.DataFrame(columns=["player", "day"] + self.items + [f"z_{f}" for f in self.items]
+                                + ["readiness", "readiness_index", "alerte"])
+        players = list(self._latest)
+        days = [self._latest[p][0] for p in players]
+        values = np.vstack([self._latest[p][1] for p in players])
+        z = pd.DataFrame(np.vstack([self._latest[p][2] for p in players]), columns=[f"z_{f}" for f in self.items])
+        out = pd.DataFrame(values, columns=self.items)
+        out.insert(0, "day", days)
+        out.insert(0, "player", players)
+        out = pd.concat([out, z], axis=1)
+        out["readiness"], out["readiness_index"] = _composite(z)
+        return _squad(out)
+
+
+def readiness_engine(name="app"):
+    """Moteur partagé par le processus (un par source de données)."""
+    with _engines_lock:
+        if name not in _engines:
+            _engines[name] = ReadinessEngine()
+        return _engines[name]
+
+def squad_readiness(name, version, daily):
+    """Tableau de forme de l'effectif ; `daily()` (daily_wellness) n'est appelé que si la version a changé."""
+    engine = readiness_engine(name)
+    if engine.version != version:
+        with stage("readiness : mise à jour") as s:
+            s["rows_out"] = engine.update(daily())
+        engine.version = version
+    with stage("readiness : tableau"):
+        return engine.table()
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""Registre de tables partagé par toutes les sessions Streamlit du processus.
+
+Chaque session qui importe (ou choisit) le même fichier obtient la même table :
+la clé est le hash du contenu (file_digest) plus ce qui a servi à la
+préparer (feuille, mapping). La table est construite une seule fois, même si
+plusieurs sessions la demandent en même temps (un verrou par clé), puis
+partagée en lecture seule : chaque appel reçoit une copie superficielle, et le
+copy-on-write de pandas recopie seulement les colonnes qu'une session modifie.
+
+La mémoire est bornée explicitement : au-delà de QRM_REGISTRY_MB (512 Mo par
+défaut) ou de QRM_REGISTRY_ENTRIES tables, les moins récemment utilisées sont
+évincées. Une table plus grosse que la limite est rendue sans être gardée.
+"""
+import os
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from qrm.ingest import file_digest, read_table
+from qrm.instrument import cache_event, stage
+
+MAX_BYTES = int(float(os.environ.get("QRM_REGISTRY_MB", 512)) * 2**20)
+MAX_ENTRIES = int(os.environ.get("QRM_REGISTRY_ENTRIES", 16))
+
+
+def frame_bytes(df):
+    return int(df.memory_usage(deep=True, index=True).sum())
+
+
+class Registry:
+    def __init__(self, max_bytes=MAX_BYTES, max_entries=MAX_ENTRIES):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._entries = OrderedDict()   # clé -> (table, octets)
+        self._lock = threading.Lock()
+        self._building = {}              # clé -> verrou de construction
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def nbytes(self):
+        return sum(n for _, n in self._entries.values())
+
+    def _lookup(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return self._entries[key][0]
+        return None
+
+    def get(self, key, build):
+        """Table de `key`, construite par `build()` au premier appel ; copie superficielle à ne pas muter en place."""
+        df = self._lookup(key)
+        if df is not None:
+            cache_event("registry", True)
+            return df.copy(deep=False)
+        with self._lock:
+            lock = self._building.setdefault(key, threading.Lock())
+        with lock:
+            # une autre session a pu construire la table pendant l'attente
+            df = self._lookup(key)
+            if df is None:
+                cache_event("registry", False)
+                with stage("registre : construction") as s:
+                    df = build()
+                    s["rows_out"] = len(df)
+                self._store(key, df)
+        with self._lock:
+            self._building.pop(key, None)
+        return df.copy(deep=False)
+
+    def _store(self, key, df):
+        n = frame_bytes(df)
+        with self._lock:
+            self.stats["misses"] += 1
+            if n > self.max_bytes:
+                return
+            self._entries[key] = (df, n)
+            total = self.nbytes
+            while len(self._entries) > 1 and (total > self.max_bytes or len(self._entries) > self.max_entries):
+                _, (_, freed) = self._entries.popitem(last=False)
+                total -= freed
+                self.stats["evictions"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def summary(self):
+        with self._lock:
+            return pd.DataFrame([{"clé": str(k[:2]), "lignes": len(df), "Mo": n / 2**20}
+                                 for k, (df, n) in self._entries.items()])
+
+
+_registry = Registry()
+
+def registry():
+    """Registre du processus (partagé par toutes les sessions)."""
+    return _registry
+
+def shared_table(src, sheet_name=0):
+    """read_table(src, sheet_name) partagé : un seul parse par contenu de fichier pour tout le processus."""
+    return _registry.get(("table", file_digest(src), str(sheet_name)),
+                         lambda: read_table(src, sheet_name=sheet_name))
+
+def shared(kind, version, build):
+    """Table dérivée (préparée, typée…) partagée par (type, version des données)."""
+    return _registry.get((kind, version), build)
@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+"""Rapports hebdomadaires par joueur, générés hors Streamlit.
+
+Reprend la préparation, les KPIs (qrm.dashboard) et les graphiques (qrm.charts)
+de app_qrm_dashboard_qrm.py, puis écrit un HTML par joueur et un récapitulatif
+d'équipe. Les joueurs sont rendus en parallèle (un processus par cœur) ; si
+kaleido (et Chrome) est disponible, les figures sont exportées en SVG statique
+(aucun JavaScript, pages autonomes et imprimables en PDF), sinon en Plotly
+interactif.
+
+    python -m qrm.report "DATA BRUTES.xlsx" --week 2025-10-20 --out rapports
+"""
+import argparse
+import html
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+import plotly.graph_objects as go
+
+from qrm.charts import (PRIMARY_GREY, QRM_GOLD, QRM_RED, detailed_distance_chart, donut, dual_bar,
+                        kpi_gauge, rpe_gauge, sprint_vmax_chart, wellness_bar)
+from qrm.cube import build_cube
+from qrm.dashboard import INTERNAL, WELLNESS_COLS, kpi_values, prepare
+from qrm.index import SessionIndex
+from qrm.ingest import read_table
+
+PAGE = """<!DOCTYPE html>
+<html lang="fr"><head><meta charset="utf-8"><title>{title}</title>{head}
+<style>
+body{{font-family:Arial,Helvetica,sans-serif;margin:24px;color:#111}}
+h1{{color:{red};margin-bottom:0}} .sub{{color:#555;margin-top:4px}}
+.grid{{display:grid;grid-template-columns:repeat(auto-fit,minmax(320px,1fr));gap:12px}}
+table{{border-collapse:collapse}} td,th{{border-bottom:1px solid {grey};padding:4px 10px;text-align:right}}
+th:first-child,td:first-child{{text-align:left}}
+</style></head>
+<body><h1>{title}</h1><p class="sub">{subtitle}</p>{body}</body></html>
+"""
+SUMMARY_LABELS = {"Distance_Totale": "Distance (m)", "Zone4_Dist": "HID (m)", "Zone5_Dist": "HSR (m)",
+                  "Sprints": "Sprints", "Accels": "Accélérations", "Decels": "Décélérations",
+                  "Vitesse_Max": "Vitesse max moy. (km/h)", "RPE 1-10": "RPE moyen"}
+PLOTLY_CDN = '<script src="https://cdn.plot.ly/plotly-2.35.2.min.js"></script>'
+
+
+def can_export_static():
+    """Vrai si Plotly sait exporter une image ici (kaleido + navigateur disponibles)."""
+    try:
+        go.Figure().to_image(format="svg")
+        return True
+    except Exception:
+        return False
+
+def slug(name):
+    return re.sub(r"[^0-9A-Za-z]+", "_", str(name)).strip("_") or "joueur"
+
+def week_bounds(dates, week=None):
+    """Lundi et dimanche de la semaine demandée (par défaut celle de la dernière séance)."""
+    day = pd.Timestamp(week) if week else pd.Timestamp(dates.max())
+    monday = day.normalize() - pd.Timedelta(days=day.dayofweek)
+    return monday, monday + pd.Timedelta(days=6)
+
+def _render(fig, static):
+    if static:
+        return fig.to_image(format="svg").decode("utf-8")
+    return fig.to_html(full_html=False, include_plotlyjs=False)
+
+
+# =============================
+# RAPPORT JOUEUR (exécuté dans un processus du pool)
+# =============================
+def player_figures(fdf, agg):
+    """Mêmes figures que le tableau de bord, dans le même ordre."""
+    hid_val, hsr_val = agg.get("Zone4_Dist", 0), agg.get("Zone5_Dist", 0)
+    rpe_val = agg.get("RPE 1-10", 0.0)
+    return [
+        donut(agg.get("Distance_Totale", 0), agg.get("Distance_Totale", 1), "Distance Totale (m)"),
+        kpi_gauge("HID (Zone 4)", hid_val, " m", 0, max(2000, hid_val * 1.2 if hid_val else 2000), QRM_GOLD),
+        kpi_gauge("HSR (Zone 5)", hsr_val, " m", 0, max(1200, hsr_val * 1.2 if hsr_val else 1200), QRM_RED),
+        sprint_vmax_chart(fdf),
+        dual_bar(fdf["Date"], fdf.get("Accels", 0), fdf.get("Decels", 0), title="Accélérations & Décélérations"),
+        detailed_distance_chart(fdf.sort_values("Date")),
+        wellness_bar({c: agg[c] for c in WELLNESS_COLS if c in agg}),
+        rpe_gauge(rpe_val if pd.notna(rpe_val) else 0.0),
+    ]
+
+def render_player(task):
+    player, fdf, agg, label, out_dir, static = task
+    body = '<div class="grid">' + "".join(f"<div>{_render(f, static)}</div>" for f in player_figures(fdf, agg))
+    body += "</div>"
+    page = PAGE.format(title=html.escape(f"Rapport hebdomadaire — {player}"), subtitle=label,
+                       head="" if static else PLOTLY_CDN, body=body, red=QRM_RED, grey=PRIMARY_GREY)
+    path = Path(out_dir) / f"{slug(player)}.html"
+    path.write_text(page, encoding="utf-8")
+    return str(path)
+
+
+# =============================
+# ÉQUIPE
+# =============================
+def build_reports(src, out_dir="rapports", week=None, sheet_name="DATA (2)", workers=None, static=None):
+    """Écrit un rapport par joueur de la semaine + summary.html ; retourne les chemins écrits."""
+    static = can_export_static() if static is None else static
+    df = prepare(read_table(src, sheet_name=sheet_name))
+    cube, index = build_cube(df, INTERNAL), SessionIndex(df, INTERNAL)
+    start, end = week_bounds(df["Date"].dropna(), week)
+    label = f"Semaine du {start:%d/%m/%Y} au {end:%d/%m/%Y}"
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+
+    players = index.players(start=start, end=end)
+    aggs = {p: kpi_values(cube, p, start, end) for p in players}
+    tasks = [(p, index.select(players=[p], start=start, end=end), aggs[p], label, str(out), static)
+             for p in players]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        paths = list(pool.map(render_player, tasks))
+
+    summary = pd.DataFrame(aggs).T.reindex(columns=[c for c in SUMMARY_LABELS
+                                                     if any(c in a for a in aggs.values())])
+    summary = summary.rename(columns=SUMMARY_LABELS)
+    links = [f'<a href="{Path(p).name}">{html.escape(str(pl))}</a>' for pl, p in zip(players, paths)]
+    summary.index = links
+    table = summary.round(1).to_html(escape=False, na_rep="—")
+    page = PAGE.format(title="Récapitulatif équipe", subtitle=label, head="", body=table,
+                       red=QRM_RED, grey=PRIMARY_GREY)
+    (out / "summary.html").write_text(page, encoding="utf-8")
+    return paths + [str(out / "summary.html")]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rapports hebdomadaires QRM pour tout l'effectif.")
+    parser.add_argument("file", help="classeur GPS (DATA BRUTES.xlsx) ou CSV")
+    parser.add_argument("--sheet", default="DATA (2)")
+    parser.add_argument("--week", help="un jour de la semaine voulue (AAAA-MM-JJ) ; défaut : dernière semaine")
+    parser.add_argument("--out", default="rapports")
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--interactive", action="store_true", help="figures Plotly interactives au lieu de SVG")
+    args = parser.parse_args(argv)
+    t0 = time.perf_counter()
+    paths = build_reports(args.file, args.out, args.week, args.sheet, args.workers,
+                          static=False if args.interactive else None)
+    print(f"{len(paths) - 1} rapports joueurs + summary.html dans {args.out} ({time.perf_counter() - t0:.1f} s)")
+
+
+if __name__ == "__main__":
+    main()
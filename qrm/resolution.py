@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""Résolution adaptative des séries temporelles envoyées au navigateur.
+
+Sur plusieurs saisons, une courbe par joueur et par jour fait des dizaines de
+milliers de points et des figures de plusieurs Mo. Deux réductions, côté
+serveur, avant de construire la figure :
+
+- agrégation par case de temps (resample) : jour pour une période courte,
+  sinon microcycle (du lendemain d'un match au match suivant) quand les
+  séances « MATCH » sont repérables, semaine sinon ; sommes pour les
+  volumes, max pour les pics, moyennes pour les scores ;
+- sous-échantillonnage LTTB (Largest-Triangle-Three-Buckets) des séries
+  encore trop longues : MAX_POINTS points par série au plus, en gardant la
+  forme de la courbe et toujours le maximum (les pics de charge).
+
+La taille des figures reste ainsi bornée quelle que soit la période.
+"""
+import numpy as np
+import pandas as pd
+
+RESOLUTIONS = {"auto": "Auto", "jour": "Jour", "semaine": "Semaine", "microcycle": "Microcycle"}
+UNITS = {"jour": "jour", "semaine": "semaine", "microcycle": "microcycle"}
+DAY_LIMIT = 120      # jours au-delà desquels « auto » quitte la résolution journalière
+MAX_POINTS = 400     # points par série après sous-échantillonnage
+
+
+def match_days(dates, sessions):
+    """Jours de match triés (séances dont le libellé contient « match »)."""
+    if sessions is None:
+        return np.array([], dtype="datetime64[ns]")
+    is_match = sessions.astype(str).str.contains("match", case=False, na=False).to_numpy()
+    days = pd.to_datetime(pd.Series(dates)[is_match]).dt.normalize().dropna().unique()
+    return np.sort(np.asarray(days, dtype="datetime64[ns]"))
+
+def choose(start, end, matches=()):
+    """Résolution « auto » : jour sur une période courte, microcycle si des matchs sont connus, semaine sinon."""
+    if start is None or end is None or (pd.Timestamp(end) - pd.Timestamp(start)).days <= DAY_LIMIT:
+        return "jour"
+    return "microcycle" if len(matches) >= 2 else "semaine"
+
+
+# =============================
+# AGRÉGATION PAR CASE DE TEMPS
+# =============================
+def bucket(dates, resolution, matches=()):
+    """Début de la case de chaque date (jour, lundi de la semaine, lendemain du match précédent)."""
+    day = pd.to_datetime(pd.Series(dates)).dt.normalize()
+    if resolution == "semaine":
+        return day - pd.to_timedelta(day.dt.dayofweek, unit="D")
+    if resolution == "microcycle" and len(matches):
+        m = np.asarray(matches, dtype="datetime64[ns]")
+        # le jour de match ferme son microcycle : premier match >= date
+        i = np.searchsorted(m, day.to_numpy(dtype="datetime64[ns]"), side="left")
+        start = np.where(i > 0, m[np.maximum(i - 1, 0)] + np.timedelta64(1, "D"), day.min().to_datetime64())
+        return pd.Series(start, index=day.index).dt.normalize()
+    return day
+
+def resample(df, x, how, resolution, by=None, matches=()):
+    """Agrège `df` par (by, case de x) ; `how` = {colonne: "sum" | "max" | "mean"}. x = début de la case."""
+    if resolution == "jour" and by is None and not df[x].duplicated().any():
+        return df[[x] + list(how)]
+    keys = [df[by]] if by else []
+    out = df[list(how)].groupby(keys + [bucket(df[x], resolution, matches).rename(x)],
+                                observed=True, sort=True).agg(how)
+    return out.reset_index()
+
+
+# =============================
+# SOUS-ÉCHANTILLONNAGE (LTTB)
+# =============================
+def _numeric(x):
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        return (x - x[0]).astype("timedelta64[s]").astype("float64") / 86400
+    return x.astype("float64")
+
+def lttb(x, y, n=MAX_POINTS):
+    """Positions des points retenus (au plus n + 1 : le maximum de y est toujours gardé) ; x croissant."""
+    size = len(y)
+    if size <= n or n < 3:
+        return np.arange(size)
+    x, y = _numeric(x), np.asarray(y, dtype="float64")
+    edges = np.linspace(1, size - 1, n - 1).astype(np.int64)   # n - 2 cases entre le premier et le dernier point
+    keep = np.empty(n, dtype=np.int64)
+    keep[0], keep[-1] = 0, size - 1
+    a = 0
+    for i in range(n - 2):
+        lo, hi = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            nx, ny = x[hi:edges[i + 2]].mean(), y[hi:edges[i + 2]].mean()
+        else:
+            nx, ny = x[-1], y[-1]
+        # aire du triangle (point retenu précédent, candidat, moyenne de la case suivante)
+        area = np.abs((x[a] - nx) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (ny - y[a]))
+        a = lo + int(np.argmax(area))
+        keep[i + 1] = a
+    return np.union1d(keep, [int(np.nanargmax(y))])
+
+def downsample(df, x, y, n=MAX_POINTS, by=None):
+    """Lignes de `df` retenues par LTTB sur (x, y), série par série (`by`) ; df trié par x dans chaque série."""
+    df = df.dropna(subset=[y])
+    if by is None:
+        return df.iloc[lttb(df[x].to_numpy(), df[y].to_numpy(), n)] if len(df) > n else df
+    parts = [g.iloc[lttb(g[x].to_numpy(), g[y].to_numpy(), n)] if len(g) > n else g
+             for _, g in df.groupby(by, observed=True, sort=False)]
+    return pd.concat(parts) if parts else df
+
+def reduce(df, x, how, resolution="auto", start=None, end=None, by=None, matches=(), n=MAX_POINTS):
+    """resample puis downsample (LTTB sur la première colonne de `how`) ; retourne (table, résolution effective)."""
+    if resolution == "auto":
+        resolution = choose(start if start is not None else df[x].min(),
+                            end if end is not None else df[x].max(), matches)
+    out = resample(df, x, how, resolution, by, matches)
+    if len(out) > n:
+        main = next(iter(how))
+        out = downsample(out.sort_values([by, x] if by else x), x, main, n, by)
+    return out, resolution
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""Résolution des colonnes logiques (joueur, date, distance, HID, HSR…) d'un fichier GPS.
+
+Toutes les colonnes sont résolues en un seul passage sur les en-têtes : chaque
+couple (champ, en-tête) reçoit un score (égalité > mot entier > sous-chaîne,
+candidats prioritaires d'abord, exclusions), puis l'affectation est gloutonne
+par score décroissant, une colonne ne servant qu'une fois. Le résultat est
+mémorisé par signature d'en-têtes ; un mapping confirmé peut être enregistré
+par fournisseur de données dans SCHEMA_FILE.
+"""
+import json
+import os
+import re
+import unicodedata
+from functools import lru_cache
+from pathlib import Path
+
+SCHEMA_FILE = Path(os.environ.get("QRM_SCHEMA_FILE", "schemas.json"))
+
+# champ logique -> (candidats par priorité, termes excluants)
+FIELDS = {
+    "player":     (["player display name", "joueur", "player", "athlete", "nom", "name"], []),
+    "team":       (["equipe", "team", "squad", "category", "groupe"], []),
+    "session":    (["session", "seance"], ["rpe", "duration", "duree"]),
+    "date":       (["date", "jour", "day"], []),
+    "duration":   (["duration", "duree", "minutes", "temps de jeu"], []),
+    "distance":   (["total distance", "distance totale", "distance", "km"], ["zone", "min", "sprint"]),
+    "hid":        (["hid", "zone 4", "z4", "high intensity distance"], ["time", "temps"]),
+    "hsr":        (["hsr", "zone 5", "z5", "high speed running"], ["time", "temps"]),
+    "vmax":       (["vmax", "vitesse max", "max speed"], []),
+    "accel":      (["accelerations", "accel"], ["max", "decel"]),
+    "decel":      (["decelerations", "decel"], ["max"]),
+    "sprint":     (["sprints", "sprint"], ["distance"]),
+    "sleep":      (["sommeil", "sleep"], []),
+    "fatigue":    (["fatigue"], []),
+    "pain":       (["douleurs", "douleur", "pain", "soreness"], []),
+    "motivation": (["motivation"], []),
+    "stress":     (["stress"], []),
+    "rpe":        (["rpe", "session rpe", "srpe"], []),
+}
+
+
+def normalize(text):
+    text = unicodedata.normalize("NFKD", str(text)).encode("ascii", "ignore").decode()
+    return " ".join(re.sub(r"[_\-/().]+", " ", text.lower()).split())
+
+def _score(header, cand):
+    if header == cand:
+        return 100
+    if re.search(rf"\b{re.escape(cand)}\b", header):
+        # bonus si l'en-tête commence par le candidat ("date of session" est une date)
+        return 65 if header.startswith(cand) else 60
+    # sous-chaîne : seulement pour les candidats assez longs ("hid" ne doit pas matcher "child")
+    if len(cand) > 3 and cand in header:
+        return 30
+    return 0
+
+
+@lru_cache(maxsize=64)
+def _resolve_headers(headers):
+    norm = [normalize(h) for h in headers]
+    scored = []
+    for field, (cands, excl) in FIELDS.items():
+        for j, h in enumerate(norm):
+            if any(e in h.split() or (len(e) > 3 and e in h) for e in excl):
+                continue
+            best = 0
+            for i, cand in enumerate(cands):
+                s = _score(h, normalize(cand))
+                if s:
+                    # priorité du candidat, puis préférence pour l'en-tête le plus court
+                    best = max(best, s - 2 * i - 0.1 * (len(h) - len(cand)))
+            if best > 0:
+                scored.append((best, field, j))
+    mapping, used = {}, set()
+    for best, field, j in sorted(scored, key=lambda t: -t[0]):
+        if field not in mapping and j not in used:
+            mapping[field] = headers[j]
+            used.add(j)
+    return mapping
+
+
+# =============================
+# MAPPINGS CONFIRMÉS PAR FOURNISSEUR
+# =============================
+def load_providers(path=None):
+    path = Path(path or SCHEMA_FILE)
+    return json.loads(path.read_text(encoding="utf-8")) if path.exists() else {}
+
+def confirm(provider, headers, mapping, path=None):
+    """Enregistre le mapping validé pour un fournisseur (ex. « Catapult »)."""
+    path = Path(path or SCHEMA_FILE)
+    providers = load_providers(path)
+    providers[provider] = {"headers": [str(h) for h in headers],
+                           "mapping": {k: v for k, v in mapping.items() if v is not None}}
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(providers, ensure_ascii=False, indent=2), encoding="utf-8")
+    os.replace(tmp, path)
+
+def resolve(headers, provider=None, path=None):
+    """Mapping champ logique -> en-tête réel. Les champs introuvables sont absents du dict.
+
+    Si un mapping confirmé existe (fournisseur donné, ou mêmes en-têtes), il
+    prime ; les champs qu'il ne couvre pas sont complétés par le score.
+    """
+    headers = tuple(str(h) for h in headers)
+    mapping = dict(_resolve_headers(headers))
+    providers = load_providers(path)
+    saved = providers.get(provider) if provider else None
+    if saved is None:
+        saved = next((p for p in providers.values() if set(p["headers"]) == set(headers)), None)
+    if saved:
+        present = set(headers)
+        confirmed = {k: v for k, v in saved["mapping"].items() if v in present}
+        mapping = {k: v for k, v in mapping.items() if v not in confirmed.values()}
+        mapping.update(confirmed)
+    return mapping
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""Effectif synthétique au format de « DATA BRUTES.xlsx » (mêmes colonnes, même ordre).
+
+Taille = joueurs × séances par saison × saisons. Les valeurs suivent des
+ordres de grandeur réalistes (distance 1-12 km, HID ≈ 2-15 % de la distance,
+HSR une fraction du HID…) et, comme dans le classeur réel, le wellness et
+le RPE ne sont renseignés que sur une partie des lignes.
+"""
+import numpy as np
+import pandas as pd
+
+SHEET = "DATA (2)"
+COLUMNS = ["Session", "Date", "Player Display Name", "Total Distance", "Distance Zone 4 (Absolute)",
+           "Distance Zone 5 (Absolute)", "Sprints", "Accelerations (Absolute)", "Decelerations (Absolute)",
+           "Max Speed", "Max Acceleration", "Max Deceleration", "Sommeil 1-5", "Fatigue 1-5", "Stress 1-5",
+           "Douleurs 1-5", "Motivation 1-5", "RPE 1-10"]
+MICROCYCLE = ["J+1", "J+2", "J-4", "J-3", "J-2", "J-1", "MATCH"]
+
+
+def season_dates(seasons, sessions, rng, first_season=2023):
+    """`sessions` jours distincts par saison, entre le 1er juillet et le 31 mai."""
+    out = []
+    for s in range(first_season, first_season + seasons):
+        days = pd.date_range(f"{s}-07-01", f"{s + 1}-05-31", freq="D")
+        out.append(np.sort(rng.choice(days.to_numpy(), size=min(sessions, len(days)), replace=False)))
+    return np.concatenate(out)
+
+def synthetic_squad(players=25, sessions=120, seasons=1, seed=0):
+    """Table joueurs × séances aux colonnes du classeur (un joueur présent à chaque séance)."""
+    rng = np.random.default_rng(seed)
+    dates = season_dates(seasons, sessions, rng)
+    names = np.array([f"JOUEUR_{i:03d}" for i in range(players)])
+    n = len(dates) * players
+
+    date = np.repeat(dates, players)
+    player = np.tile(names, len(dates))
+    session = np.array(MICROCYCLE)[np.repeat(np.arange(len(dates)) % len(MICROCYCLE), players)]
+    match = session == "MATCH"
+
+    dist = np.clip(rng.normal(5200, 1800, n) + 4000 * match, 800, 12500)
+    hid = dist * rng.uniform(0.02, 0.15, n)
+    hsr = hid * rng.uniform(0.0, 0.4, n)
+
+    def questionnaire(lo, hi, filled):
+        v = rng.integers(lo, hi + 1, n).astype("float64")
+        v[rng.random(n) > filled] = np.nan
+        return v
+
+    df = pd.DataFrame({
+        "Session": session,
+        "Date": pd.to_datetime(date),
+        "Player Display Name": player,
+        "Total Distance": dist.round(2),
+        "Distance Zone 4 (Absolute)": hid.round(2),
+        "Distance Zone 5 (Absolute)": hsr.round(2),
+        "Sprints": rng.poisson(hsr / 25),
+        "Accelerations (Absolute)": rng.poisson(dist / 110),
+        "Decelerations (Absolute)": rng.poisson(dist / 115),
+        "Max Speed": np.clip(rng.normal(27, 3, n), 10, 36).round(2),
+        "Max Acceleration": np.clip(rng.normal(4.5, 1.0, n), 2, 10).round(2),
+        "Max Deceleration": np.clip(rng.normal(5.0, 1.2, n), 2, 10).round(2),
+        "Sommeil 1-5": questionnaire(2, 5, 0.6),
+        "Fatigue 1-5": questionnaire(1, 4, 0.6),
+        "Stress 1-5": questionnaire(1, 3, 0.6),
+        "Douleurs 1-5": questionnaire(1, 3, 0.6),
+        "Motivation 1-5": questionnaire(3, 5, 0.6),
+        "RPE 1-10": questionnaire(2, 9, 0.5),
+    })
+    return df[COLUMNS]
+
+def write_workbook(df, path, sheet_name=SHEET):
+    """Écrit `df` en .xlsx (feuille du classeur réel) ou en .csv selon l'extension."""
+    if str(path).lower().endswith(".csv"):
+        df.to_csv(path, index=False)
+    else:
+        df.to_excel(path, sheet_name=sheet_name, index=False)
+    return path
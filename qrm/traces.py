@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+"""Ingestion des traces GPS brutes (10-18 Hz) et calcul des totaux de séance.
+
+Les applications ne lisent que les totaux exportés par le fournisseur. Ce
+module les recalcule depuis les échantillons bruts, un fichier par joueur :
+
+- `.npy` : tableau (n, 2) temps (s), vitesse (m/s), ouvert en mémoire mappée
+  (np.load(mmap_mode="r")) : seules les pages lues sont chargées ;
+- `.csv` : colonnes temps et vitesse (m/s, ou km/h si l'en-tête le dit).
+
+Tout est vectorisé NumPy : vitesse lissée (moyenne glissante), distance et
+temps par zone de vitesse, accélération, événements accélération /
+décélération / sprint tenus au moins une durée minimale, vitesse de pointe,
+et pics d'intensité sur 1, 3 et 5 minutes (qrm.peaks).
+Les joueurs sont traités en parallèle (un processus par cœur) et le résultat
+porte les noms de colonnes du classeur (Distance Zone 4 (Absolute), Max
+Speed…) : il s'ajoute tel quel au magasin incrémental lu par les tableaux de
+bord.
+
+    python -m qrm.traces --date 2025-10-25 --session MATCH traces/*.npy --store
+"""
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from qrm.peaks import WINDOWS_S, peak_demands, save_peaks
+
+# bornes basses des zones 1..5 en km/h (zone 4 = HID, zone 5 = HSR)
+ZONES_KMH = (0.0, 7.2, 14.4, 19.8, 25.2)
+PARAMS = {
+    "smooth_s": 0.5,        # fenêtre de lissage de la vitesse et de l'accélération
+    "max_speed": 12.5,      # m/s ; au-delà : artefact GPS, écrêté
+    "max_gap_s": 1.0,       # trou d'acquisition : l'intervalle ne compte ni en temps ni en distance
+    "sprint_kmh": 25.2,
+    "sprint_dwell_s": 1.0,
+    "accel_ms2": 3.0,
+    "accel_dwell_s": 0.5,
+}
+TIME_COLUMNS = ["time", "temps", "timestamp", "seconds", "t"]
+SPEED_COLUMNS = ["speed", "vitesse", "velocity", "v"]
+
+
+# =============================
+# LECTURE
+# =============================
+def _pick(headers, candidates):
+    low = {h.lower().split(" (")[0].strip(): h for h in headers}
+    return next((low[c] for c in candidates if c in low), None)
+
+def load_trace(path):
+    """(temps en s, vitesse en m/s) ; les .npy restent en mémoire mappée."""
+    path = Path(path)
+    if path.suffix == ".npy":
+        arr = np.load(path, mmap_mode="r")
+        return arr[:, 0], arr[:, 1]
+    headers = pd.read_csv(path, nrows=0).columns
+    tcol, vcol = _pick(headers, TIME_COLUMNS), _pick(headers, SPEED_COLUMNS)
+    if tcol is None or vcol is None:
+        raise KeyError(f"{path.name} : colonnes temps / vitesse introuvables ({list(headers)})")
+    df = pd.read_csv(path, usecols=[tcol, vcol], engine="pyarrow")
+    t = df[tcol]
+    if not pd.api.types.is_numeric_dtype(t):
+        t = pd.to_datetime(t)
+        t = (t - t.iloc[0]).dt.total_seconds()
+    v = df[vcol].to_numpy("float64")
+    if "km" in vcol.lower():
+        v = v / 3.6
+    return t.to_numpy("float64"), v
+
+
+# =============================
+# CALCUL VECTORISÉ
+# =============================
+def moving_average(x, window):
+    """Moyenne glissante centrée (somme cumulée), même longueur que `x`."""
+    if window <= 1 or len(x) < window:
+        return np.asarray(x, dtype="float64")
+    cs = np.cumsum(np.r_[0.0, x])
+    out = (cs[window:] - cs[:-window]) / window
+    pad = window - 1
+    return np.r_[np.full(pad // 2, out[0]), out, np.full(pad - pad // 2, out[-1])]
+
+def event_starts(mask, dt, dwell):
+    """Indicateur (même longueur que `mask`) du début des plages vraies tenues au moins `dwell` secondes."""
+    edges = np.diff(np.r_[0, mask.astype(np.int8), 0])
+    starts, ends = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+    elapsed = np.r_[0.0, np.cumsum(dt)]
+    out = np.zeros(len(mask), dtype=bool)
+    out[starts[(elapsed[ends] - elapsed[starts]) >= dwell]] = True
+    return out
+
+def count_events(mask, dt, dwell):
+    """Nombre de plages où `mask` est vrai pendant au moins `dwell` secondes."""
+    return int(event_starts(mask, dt, dwell).sum())
+
+def kinematics(t, v, **params):
+    """Durée par échantillon, vitesse lissée (m/s et km/h), accélération et distance par échantillon."""
+    p = {**PARAMS, **params}
+    t = np.asarray(t, dtype="float64")
+    v = np.clip(np.nan_to_num(np.asarray(v, dtype="float64")), 0.0, p["max_speed"])
+    # horodatages répétés ou en arrière (et manquants) écartés : le temps doit croître pour dériver la vitesse
+    ok = ~np.isnan(t)
+    t, v = t[ok], v[ok]
+    keep = np.r_[True, t[1:] > np.maximum.accumulate(t)[:-1]] if len(t) else np.zeros(0, dtype=bool)
+    t, v = t[keep], v[keep]
+    if len(t) < 2:
+        raise ValueError("Trace trop courte (moins de 2 horodatages distincts).")
+
+    step = np.diff(t)
+    hz = 1.0 / np.median(step)
+    # durée de chaque échantillon ; les trous d'acquisition ne comptent pas
+    dt = np.r_[step, np.median(step)]
+    dt[dt > p["max_gap_s"]] = 0.0
+
+    window = max(1, int(round(p["smooth_s"] * hz)))
+    speed = moving_average(v, window)
+    accel = moving_average(np.gradient(speed, t), window)
+    return {"dt": dt, "speed": speed, "kmh": speed * 3.6, "accel": accel, "dist": speed * dt}
+
+def session_metrics(t, v, zones=ZONES_KMH, **params):
+    """Totaux d'une trace, avec les noms de colonnes du classeur."""
+    return totals(kinematics(t, v, **params), zones, **params)
+
+def totals(k, zones=ZONES_KMH, **params):
+    p = {**PARAMS, **params}
+    dt, kmh, accel, dist = k["dt"], k["kmh"], k["accel"], k["dist"]
+
+    zone = np.searchsorted(np.asarray(zones), kmh, side="right") - 1
+    n = len(zones)
+    zone_dist = np.bincount(zone, weights=dist, minlength=n)
+    zone_time = np.bincount(zone, weights=dt, minlength=n)
+
+    out = {
+        "Duration (min)": dt.sum() / 60,
+        "Total Distance": dist.sum(),
+        "Sprints": count_events(kmh >= p["sprint_kmh"], dt, p["sprint_dwell_s"]),
+        "Accelerations (Absolute)": count_events(accel >= p["accel_ms2"], dt, p["accel_dwell_s"]),
+        "Decelerations (Absolute)": count_events(accel <= -p["accel_ms2"], dt, p["accel_dwell_s"]),
+        "Max Speed": kmh.max(),
+        "Max Acceleration": max(accel.max(), 0.0),
+        "Max Deceleration": max(-accel.min(), 0.0),
+    }
+    for i in range(n):
+        out[f"Distance Zone {i + 1} (Absolute)"] = zone_dist[i]
+        out[f"Time Zone {i + 1} (s)"] = zone_time[i]
+    return out
+
+
+# =============================
+# ÉQUIPE (pool de processus)
+# =============================
+def peak_series(k, zones=ZONES_KMH, **params):
+    """Séries échantillon par échantillon dont on cherche les pics (voir qrm.peaks)."""
+    p = {**PARAMS, **params}
+    hsr = k["kmh"] >= zones[4] if len(zones) > 4 else np.zeros(len(k["dt"]), dtype=bool)
+    accdec = (event_starts(k["accel"] >= p["accel_ms2"], k["dt"], p["accel_dwell_s"])
+              | event_starts(k["accel"] <= -p["accel_ms2"], k["dt"], p["accel_dwell_s"]))
+    return {"distance": k["dist"], "hsr": k["dist"] * hsr, "accdec": accdec.astype("float64")}
+
+def _player_row(task):
+    path, zones, windows, params = task
+    k = kinematics(*load_trace(path), **params)
+    return totals(k, zones, **params), peak_demands(k["dt"], peak_series(k, zones, **params), windows)
+
+def process_session(files, date, session, players=None, zones=ZONES_KMH, windows=WINDOWS_S, workers=None,
+                    **params):
+    """(totaux, pics) : une ligne de totaux par fichier (joueur = nom du fichier sauf `players`)
+    aux noms de colonnes du classeur, et les pics d'intensité par joueur / métrique / fenêtre."""
+    files = [Path(f) for f in files]
+    players = players or [f.stem for f in files]
+    tasks = [(str(f), tuple(zones), tuple(windows), params) for f in files]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(_player_row, tasks))
+    key = {"Session": session, "Date": pd.Timestamp(date)}
+    df = pd.DataFrame([r[0] for r in results]).round(2)
+    df.insert(0, "Player Display Name", players)
+    df.insert(0, "Date", key["Date"])
+    df.insert(0, "Session", session)
+    peaks = pd.DataFrame([{**key, "Player Display Name": pl, **row}
+                          for pl, (_, rows) in zip(players, results) for row in rows])
+    return df, peaks
+
+def session_table(files, date, session, players=None, zones=ZONES_KMH, workers=None, **params):
+    """Totaux seuls (voir process_session)."""
+    return process_session(files, date, session, players, zones, workers=workers, **params)[0]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Totaux de séance depuis les traces GPS brutes (un fichier par joueur).")
+    parser.add_argument("files", nargs="+", help="traces .npy (temps, vitesse m/s) ou .csv")
+    parser.add_argument("--date", required=True)
+    parser.add_argument("--session", required=True, help="libellé de séance (J-3, MATCH…)")
+    parser.add_argument("--out", help="écrit la table de séance dans ce CSV")
+    parser.add_argument("--store", action="store_true", help="ajoute les lignes au magasin incrémental")
+    parser.add_argument("--workers", type=int)
+    args = parser.parse_args(argv)
+    t0 = time.perf_counter()
+    df, peaks = process_session(args.files, args.date, args.session, workers=args.workers)
+    print(f"{len(df)} joueurs traités en {time.perf_counter() - t0:.1f} s")
+    if args.out:
+        df.to_csv(args.out, index=False)
+    if args.store:
+        from qrm.incremental import open_store
+        delta = open_store().ingest(df)
+        print(f"{len(delta)} lignes ajoutées ou mises à jour dans le magasin")
+        save_peaks(peaks)
+    if not args.out and not args.store:
+        print(df.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
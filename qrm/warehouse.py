@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+"""Entrepôt analytique local (SQLite, un fichier, sans serveur) pour la table des séances.
+
+Une ligne par (joueur, date, séance), colonnes logiques (player, team, day,
+session, distance, hid, hsr…). Les pages demandent des résultats déjà
+réduits : filtre joueur / équipe / période, sommes / moyennes / max par
+jour, semaine ou joueur, séries de wellness au format long. Le filtre et
+l'agrégation s'exécutent dans SQLite (index sur (player, day), (team, day)),
+Python ne reçoit que les lignes à tracer.
+
+sqlite3 est dans la bibliothèque standard ; DuckDB serait plus rapide sur
+des millions de lignes, mais n'apporte rien à l'échelle d'un effectif et
+ajouterait une dépendance. Le fichier est en mode WAL : les pages lisent
+pendant que le thread de surveillance (qrm.watcher) écrit.
+
+    wh = warehouse()
+    wh.aggregate(["day"], ["distance", "hsr"], players=["DIALLO"], start="2025-09-01")
+"""
+import os
+import sqlite3
+import threading
+from pathlib import Path
+
+import pandas as pd
+
+from qrm.ingest import CACHE_DIR
+from qrm.instrument import stage
+
+WAREHOUSE_FILE = Path(os.environ.get("QRM_WAREHOUSE_FILE", CACHE_DIR / "warehouse.sqlite"))
+TEXT = ["player", "team", "session"]
+MEASURES = ["distance", "hid", "hsr", "accel", "decel", "sprint", "vmax", "rpe", "duration",
+            "sleep", "fatigue", "stress", "pain", "motivation"]
+WELLNESS = ["sleep", "fatigue", "stress", "pain", "motivation"]
+STATS = {"sum": "SUM", "mean": "AVG", "max": "MAX", "min": "MIN", "count": "COUNT"}
+# expressions SQL des dimensions de regroupement (semaine = lundi)
+GROUPS = {"player": "player", "team": "team", "day": "day", "week": "date(day, '-6 days', 'weekday 1')"}
+
+_warehouses = {}
+_warehouses_lock = threading.Lock()
+
+
+def _day(value):
+    return None if value is None else pd.Timestamp(value).strftime("%Y-%m-%d")
+
+
+class Warehouse:
+    def __init__(self, path=WAREHOUSE_FILE):
+        self.path = Path(path)
+        self._local = threading.local()
+        self._write = threading.Lock()
+        with self._connect() as con:
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute(f"CREATE TABLE IF NOT EXISTS sessions (player TEXT NOT NULL, team TEXT, day TEXT NOT NULL, "
+                        f"date TEXT NOT NULL, session TEXT NOT NULL DEFAULT '', "
+                        f"{', '.join(f'{m} REAL' for m in MEASURES)}, PRIMARY KEY (player, date, session))")
+            con.execute("CREATE INDEX IF NOT EXISTS sessions_player_day ON sessions (player, day)")
+            con.execute("CREATE INDEX IF NOT EXISTS sessions_team_day ON sessions (team, day)")
+            con.execute("CREATE INDEX IF NOT EXISTS sessions_day ON sessions (day)")
+            con.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+
+    def _connect(self):
+        # une connexion par thread (sqlite3 ne partage pas une connexion entre threads)
+        con = getattr(self._local, "con", None)
+        if con is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            con = self._local.con = sqlite3.connect(self.path, timeout=30)
+        return con
+
+    # ---------- écriture ----------
+    @property
+    def version(self):
+        row = self._connect().execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        return row[0] if row else None
+
+    def upsert(self, df, columns, replace=False):
+        """Ajoute / remplace les séances de `df` (colonnes du classeur, `columns` = mapping qrm.schema).
+
+        replace=True vide d'abord la table, dans la même transaction : l'entrepôt reflète exactement `df`.
+        """
+        fields = ["player", "team", "date", "session"] + [m for m in MEASURES if columns.get(m) in df.columns]
+        out = pd.DataFrame(index=df.index)
+        for f in fields:
+            if f == "date":
+                d = pd.to_datetime(df[columns["date"]], errors="coerce")
+                out["day"], out["date"] = d.dt.strftime("%Y-%m-%d"), d.dt.strftime("%Y-%m-%d %H:%M:%S")
+            elif f in TEXT:
+                out[f] = df[columns[f]].astype(str).to_numpy() if columns.get(f) in df.columns else ""
+            else:
+                out[f] = pd.to_numeric(df[columns[f]], errors="coerce").astype("float64").to_numpy()
+        out = out.dropna(subset=["day"])
+        out = out.astype(object).where(out.notna(), None)
+        sql = f"INSERT OR REPLACE INTO sessions ({', '.join(out.columns)}) VALUES ({', '.join('?' * out.shape[1])})"
+        with self._write, self._connect() as con:
+            if replace:
+                con.execute("DELETE FROM sessions")
+            con.executemany(sql, out.itertuples(index=False, name=None))
+        return len(out)
+
+    def sync(self, df, columns, version):
+        """Remplace le contenu par la table entière si `version` (celle des données) n'est pas déjà chargée.
+
+        Les séances absentes de `df` (retirées du classeur, mises en quarantaine) disparaissent de l'entrepôt.
+        """
+        version = repr(version)
+        if self.version == version:
+            return 0
+        with stage("entrepôt : synchronisation", rows_in=len(df)) as s:
+            s["rows_out"] = n = self.upsert(df, columns, replace=True)
+            with self._write, self._connect() as con:
+                con.execute("INSERT OR REPLACE INTO meta VALUES ('version', ?)", (version,))
+        return n
+
+    # ---------- lecture ----------
+    def query(self, sql, params=()):
+        with stage("entrepôt : requête") as s:
+            out = pd.read_sql_query(sql, self._connect(), params=params)
+            for c in ("day", "date", "week"):
+                if c in out:
+                    out[c] = pd.to_datetime(out[c])
+            s["rows_out"] = len(out)
+        return out
+
+    @staticmethod
+    def _where(players=None, teams=None, start=None, end=None):
+        clauses, params = [], []
+        if players is not None:
+            clauses.append(f"player IN ({', '.join('?' * len(players))})")
+            params += [str(p) for p in players]
+        if teams:
+            clauses.append(f"team IN ({', '.join('?' * len(teams))})")
+            params += [str(t) for t in teams]
+        if start is not None:
+            clauses.append("day >= ?")
+            params.append(_day(start))
+        if end is not None:
+            clauses.append("day <= ?")
+            params.append(_day(end))
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    @staticmethod
+    def _check(names, allowed):
+        # les noms de colonnes ne peuvent pas être des paramètres SQL : liste blanche
+        unknown = [n for n in names if n not in allowed]
+        if unknown:
+            raise KeyError(f"Colonnes inconnues de l'entrepôt : {unknown}")
+        return list(names)
+
+    def select(self, fields, players=None, teams=None, start=None, end=None):
+        """Séances filtrées, colonnes `fields` (player, team, day, date, session ou mesures), triées par date."""
+        fields = self._check(fields, TEXT + ["day", "date"] + MEASURES)
+        where, params = self._where(players, teams, start, end)
+        return self.query(f"SELECT {', '.join(fields)} FROM sessions{where} ORDER BY date, player", params)
+
+    def aggregate(self, by, measures, stats=("sum", "mean", "max"), players=None, teams=None, start=None, end=None):
+        """Agrégats <mesure>_<stat> par `by` (player, team, day, week), calculés dans SQLite."""
+        by = self._check(by, GROUPS)
+        measures = self._check(measures, MEASURES)
+        cols = [f"{GROUPS[b]} AS {b}" for b in by]
+        cols += [f"{STATS[s]}({m}) AS {m}_{s}" for m in measures for s in self._check(stats, STATS)]
+        where, params = self._where(players, teams, start, end)
+        group = f" GROUP BY {', '.join(by)} ORDER BY {', '.join(by)}" if by else ""
+        return self.query(f"SELECT {', '.join(cols)} FROM sessions{where}{group}", params)
+
+    def wellness_series(self, fields=WELLNESS, players=None, teams=None, start=None, end=None):
+        """Wellness au format long (player, date, item, score), sans les réponses manquantes."""
+        fields = self._check(fields, WELLNESS)
+        if not fields:
+            return pd.DataFrame(columns=["player", "date", "item", "score"])
+        where, params = self._where(players, teams, start, end)
+        cond = " AND " if where else " WHERE "
+        union = " UNION ALL ".join(f"SELECT player, date, '{f}' AS item, {f} AS score FROM sessions{where}"
+                                   f"{cond}{f} IS NOT NULL" for f in fields)
+        return self.query(f"{union} ORDER BY date, player", params * len(fields))
+
+    def players(self, teams=None, start=None, end=None):
+        where, params = self._where(None, teams, start, end)
+        return self.query(f"SELECT DISTINCT player FROM sessions{where} ORDER BY player", params)["player"].tolist()
+
+    def date_range(self, teams=None):
+        where, params = self._where(None, teams)
+        lo, hi = self._connect().execute(f"SELECT MIN(day), MAX(day) FROM sessions{where}", params).fetchone()
+        return (pd.Timestamp(lo), pd.Timestamp(hi)) if lo else (None, None)
+
+    def count(self, column, players=None, teams=None, start=None, end=None):
+        """Nombre de valeurs distinctes de `column` (séances, joueurs, jours) dans la sélection."""
+        column = self._check([column], TEXT + ["day", "date"])[0]
+        where, params = self._where(players, teams, start, end)
+        return self._connect().execute(f"SELECT COUNT(DISTINCT {column}) FROM sessions{where}", params).fetchone()[0]
+
+
+def warehouse(path=WAREHOUSE_FILE):
+    """Entrepôt partagé par le processus (un par fichier)."""
+    path = Path(path)
+    with _warehouses_lock:
+        if path not in _warehouses:
+            _warehouses[path] = Warehouse(path)
+        return _warehouses[path]
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""Préparation des données en arrière-plan : un thread surveille la source et reconstruit hors requête.
+
+Quand le classeur (ou le répertoire) change, le thread relit, valide et
+précalcule tout ce que les pages utilisent (fonction `build`), puis remplace
+la version servie d'une seule affectation. Les requêtes lisent toujours la
+dernière version prête : elles n'attendent que la toute première
+préparation du processus. Si la préparation échoue (fichier en cours de
+copie, colonnes manquantes…), la version précédente reste servie et
+l'erreur est exposée dans `status` ; on réessaie au prochain changement.
+
+La surveillance est un simple sondage (mtime, taille) toutes les INTERVAL
+secondes : pas de dépendance, fonctionne aussi sur les volumes montés.
+Une préparation qui modifie elle-même ce que surveille la signature
+(ingestion dans le magasin) donne, via `seen`, la signature qu'elle a
+intégrée : le sondage suivant ne relance pas une seconde préparation.
+
+    python -m qrm.watcher "DATA BRUTES.xlsx"   # préchauffe le cache Parquet et le magasin
+"""
+import argparse
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+
+INTERVAL = float(os.environ.get("QRM_WATCH_INTERVAL", 2))
+
+log = logging.getLogger(__name__)
+_watchers = {}
+_watchers_lock = threading.Lock()
+
+
+def file_signature(path):
+    """(mtime, taille) d'un fichier, ou de chaque fichier d'un répertoire ; None s'il n'existe pas."""
+    p = Path(path)
+    if p.is_dir():
+        return tuple(sorted((f.name, f.stat().st_mtime_ns, f.stat().st_size) for f in p.iterdir() if f.is_file()))
+    if not p.exists():
+        return None
+    st_ = p.stat()
+    return st_.st_mtime_ns, st_.st_size
+
+
+class Watcher:
+    def __init__(self, build, signature, interval=INTERVAL, name="qrm-watcher", seen=None):
+        self.build = build
+        self.signature = signature
+        self.seen = seen              # valeur préparée -> signature qu'elle couvre (défaut : celle d'avant)
+        self.interval = interval
+        self._current = None          # dernière valeur prête
+        self._seen = object()         # signature de la dernière préparation (réussie ou non)
+        self._ready = threading.Event()
+        self._wake = threading.Event()
+        self.status = {"state": "démarrage", "error": None, "built_at": None, "seconds": None, "builds": 0}
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while True:
+            try:
+                sig = self.signature()
+            except OSError as e:
+                sig = ("erreur", str(e))
+            if sig != self._seen:
+                self._seen = sig
+                self._rebuild()
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def _rebuild(self):
+        self.status["state"] = "mise à jour"
+        t0 = time.perf_counter()
+        try:
+            value = self.build()
+        except Exception as e:   # la version précédente reste servie
+            log.exception("Préparation des données impossible")
+            self.status.update(state="erreur", error=f"{type(e).__name__}: {e}")
+        else:
+            self._current = value   # remplacement atomique : une requête voit l'ancienne ou la nouvelle version
+            if self.seen is not None:
+                self._seen = self.seen(value)
+            self.status.update(state="à jour", error=None, built_at=time.time(),
+                               seconds=time.perf_counter() - t0, builds=self.status["builds"] + 1)
+        self._ready.set()
+
+    def current(self, timeout=None):
+        """Dernière version prête ; n'attend que si aucune préparation n'a encore abouti ou échoué."""
+        self._ready.wait(timeout)
+        return self._current
+
+    def poke(self):
+        """Vérifie la source sans attendre la fin de l'intervalle."""
+        self._wake.set()
+
+
+def watch(name, build, signature, interval=INTERVAL, seen=None):
+    """Watcher du processus pour `name`, démarré au premier appel (un seul thread par nom)."""
+    with _watchers_lock:
+        if name not in _watchers:
+            _watchers[name] = Watcher(build, signature, interval, name=f"qrm-watcher:{name}", seen=seen).start()
+        return _watchers[name]
+
+
+def main(argv=None):
+    from qrm.incremental import open_store
+    from qrm.ingest import DATA_FILE, ensure_cached
+
+    parser = argparse.ArgumentParser(description="Surveille un classeur et préchauffe le cache Parquet et le magasin.")
+    parser.add_argument("path", nargs="?", default=DATA_FILE)
+    parser.add_argument("--interval", type=float, default=INTERVAL)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+
+    def build():
+        ensure_cached(args.path, sheet_name=0)
+        return len(open_store().ingest(args.path))
+
+    w = watch("cli", build, lambda: file_signature(args.path), args.interval)
+    last = None
+    while True:
+        w.current()
+        state = (w.status["builds"], w.status["error"])
+        if state != last:
+            last = state
+            log.info("%s : %s (%s lignes nouvelles)", args.path, w.status["error"] or w.status["state"], w.current())
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
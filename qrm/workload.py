@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""Moteur de charge : ACWR 7/28 j, EWMA aiguë/chronique, monotonie et strain.
+
+Toutes les séries (joueur x métrique) sont mises côte à côte dans une seule
+matrice jours x colonnes sur un calendrier continu (jours sans séance = 0),
+puis chaque indicateur est un unique rolling / ewm pandas sur cette matrice.
+La série d'un joueur commence à sa première séance : un joueur arrivé en
+cours de saison n'a pas de charge chronique « diluée » par des zéros
+d'avant son arrivée. Les sommes journalières viennent du cube d'agrégats
+(qrm.cube).
+
+sRPE (RPE x durée) n'existe que si le classeur a une colonne de durée
+(Duration, Durée, Minutes, Temps de jeu : champ "duration" de qrm.schema).
+"""
+import numpy as np
+import pandas as pd
+
+METRICS = ["distance", "hid", "hsr", "srpe", "accel", "decel"]
+METRIC_LABELS = {"distance": "Distance totale", "hid": "HID (Zone 4)", "hsr": "HSR (Zone 5)",
+                 "srpe": "sRPE (RPE x durée)", "accel": "Accélérations", "decel": "Décélérations"}
+ACUTE_DAYS = 7
+CHRONIC_DAYS = 28
+SWEET_SPOT = (0.8, 1.3)
+
+
+def _daily_matrix(cube, metrics):
+    cols = [f"{m}_sum" for m in metrics]
+    # float64 : les compteurs Int16 donnent des colonnes Int64 nullables que reindex(fill_value=0.0) refuse
+    wide = cube.daily.pivot_table(index="day", columns="player", values=cols, aggfunc="sum").astype("float64")
+    days = pd.date_range(wide.index.min(), wide.index.max(), freq="D")
+    return wide.reindex(days, fill_value=0.0).fillna(0.0)
+
+
+def compute_workload(cube, metrics=METRICS, acute=ACUTE_DAYS, chronic=CHRONIC_DAYS):
+    """Indicateurs de charge pour chaque (joueur, jour, métrique), en format long.
+
+    Colonnes : load, acute, chronic, acwr, ewma_acute, ewma_chronic, ewma_acwr,
+    monotony, strain. Lignes triées par jour ; les jours antérieurs à la
+    première séance d'un joueur sont exclus.
+    """
+    metrics = [m for m in metrics if m in cube.measures]
+    if not metrics or cube.daily.empty:
+        return pd.DataFrame(columns=["player", "day", "metric"])
+    load = _daily_matrix(cube, metrics)
+    players = load.columns.get_level_values("player")
+    first = cube.daily.groupby("player")["day"].min().reindex(players).to_numpy()
+    active = load.index.to_numpy()[:, None] >= first[None, :]
+    # avant la première séance : pas de série (NaN), rolling et ewm démarrent à l'arrivée du joueur
+    load = load.where(active)
+
+    # ACWR glissant indéfini tant que la fenêtre chronique n'est pas pleine
+    acute_sum = load.rolling(acute, min_periods=acute).sum()
+    chronic_mean = load.rolling(chronic, min_periods=chronic).mean()
+    acute_mean = acute_sum / acute
+    acute_std = load.rolling(acute, min_periods=2).std()
+    # λ = 2 / (N + 1) (Williams et al., 2017)
+    ewma_a = load.ewm(alpha=2 / (acute + 1), adjust=False).mean()
+    ewma_c = load.ewm(alpha=2 / (chronic + 1), adjust=False).mean()
+    monotony = acute_mean / acute_std.where(acute_std > 0)
+
+    frames = {
+        "load": load,
+        "acute": acute_sum,
+        "chronic": chronic_mean * acute,   # charge chronique ramenée à 7 jours
+        "acwr": acute_mean / chronic_mean.where(chronic_mean > 0),
+        "ewma_acute": ewma_a,
+        "ewma_chronic": ewma_c,
+        "ewma_acwr": ewma_a / ewma_c.where(ewma_c > 0),
+        "monotony": monotony,
+        "strain": acute_sum * monotony,
+    }
+    n_days, n_cols = load.shape
+    active = active.ravel()
+    out = pd.DataFrame({
+        "player": np.tile(players.to_numpy(), n_days),
+        "day": np.repeat(load.index.to_numpy(), n_cols),
+        "metric": np.tile(load.columns.get_level_values(0).str.removesuffix("_sum").to_numpy(), n_days),
+        **{k: v.to_numpy().ravel() for k, v in frames.items()},
+    })
+    # ordre jour par jour conservé : latest() peut prendre la dernière ligne de chaque groupe
+    return out[active].reset_index(drop=True)
+
+
+def latest(workload):
+    """Dernière valeur par (joueur, métrique)."""
+    return workload.groupby(["player", "metric"], sort=True).tail(1).reset_index(drop=True)
+
+
+def flag_acwr(workload, column="ewma_acwr", bounds=SWEET_SPOT):
+    """Dernières valeurs hors de la zone [bas, haut] de l'ACWR."""
+    last = latest(workload)
+    lo, hi = bounds
+    return last[(last[column] < lo) | (last[column] > hi)]
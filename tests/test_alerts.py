@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""AlertEngine incrémental contre un recalcul complet (pandas, règle par règle)."""
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from qrm.alerts import OPS, AlertEngine, load_rules
+from qrm.schema import resolve
+from qrm.synthetic import synthetic_squad
+
+RULES = Path(__file__).resolve().parents[1] / "alertes.json"
+
+
+@pytest.fixture(scope="module")
+def squad():
+    df = synthetic_squad(players=8, sessions=120, seed=3)
+    return df, resolve(df.columns)
+
+
+def keys(alerts):
+    return set(zip(alerts["player"], pd.to_datetime(alerts["date"]), alerts["rule"]))
+
+
+def reference(df, columns, rules):
+    """Toutes les séances d'un coup : références du joueur sur tout l'historique, fenêtres par rolling."""
+    t = pd.DataFrame({"player": df[columns["player"]].astype(str), "date": pd.to_datetime(df[columns["date"]]),
+                      **{r["field"]: df[columns[r["field"]]].astype("float64") for r in rules}})
+    t = t.sort_values(["player", "date"])
+    g = t.groupby("player")
+    out = set()
+    for r in rules:
+        v = t[r["field"]]
+        limit = pd.Series(float(r["threshold"]), index=t.index)
+        if r["kind"] == "relative":
+            if r["baseline"] == "rolling":
+                base = g[r["field"]].transform(lambda s: s.shift(1).rolling(r["window"]).mean())
+            else:
+                base = g[r["field"]].transform(r["baseline"])
+            limit = limit * base
+        hit = OPS[r["op"]](v, limit) & v.notna() & limit.notna()
+        out |= {(p, d, r["id"]) for p, d in zip(t.loc[hit, "player"], t.loc[hit, "date"])}
+    return out
+
+
+def test_full_update_matches_reference(squad):
+    df, columns = squad
+    engine = AlertEngine(load_rules(RULES))
+    assert engine.update(df, columns) == len(df)
+    assert keys(engine.alerts) == reference(df, columns, engine.rules)
+
+
+def sorted_alerts(alerts):
+    return alerts.sort_values(["date", "player", "rule"]).reset_index(drop=True)
+
+
+def test_chronological_batches_match_full_recompute(squad):
+    """Lots successifs = un seul calcul, y compris pour les moyennes et records (hsr_bas, vmax_baisse)."""
+    df, columns = squad
+    full = AlertEngine(load_rules(RULES))
+    full.update(df, columns)
+    assert {"hsr_bas", "vmax_baisse"} <= set(full.alerts["rule"])
+
+    engine = AlertEngine(load_rules(RULES))
+    dates = np.sort(df[columns["date"]].unique())
+    for cut in dates[[10, 45, 46, 90]].tolist() + [dates[-1] + np.timedelta64(1, "D")]:
+        engine.update(df[df[columns["date"]] < cut], columns)
+    pd.testing.assert_frame_equal(sorted_alerts(engine.alerts), sorted_alerts(full.alerts))
+
+
+def test_mean_and_max_rules_ignore_arrival_order(squad):
+    """Références sur tout l'historique : des lots dans le désordre donnent le même verdict."""
+    df, columns = squad
+    config = load_rules(RULES)
+    config["rules"] = [r for r in config["rules"] if r["id"] in ("hsr_bas", "vmax_baisse")]
+    full = AlertEngine(config)
+    full.update(df, columns)
+
+    engine = AlertEngine(config)
+    for batch in np.array_split(np.random.default_rng(0).permutation(len(df)), 4):
+        engine.update(df.iloc[np.sort(batch)], columns)
+    pd.testing.assert_frame_equal(sorted_alerts(engine.alerts), sorted_alerts(full.alerts))
+    assert keys(engine.alerts) == reference(df, columns, engine.rules)
+
+
+def test_known_sessions_are_skipped_and_edits_reevaluated(squad):
+    df, columns = squad
+    engine = AlertEngine(load_rules(RULES))
+    engine.update(df, columns)
+    assert engine.update(df, columns) == 0
+
+    edited = df.copy()
+    row = edited.index[-1]
+    edited.loc[row, columns["pain"]] = 5
+    assert engine.update(edited, columns) == 1
+    player, date = edited.loc[row, columns["player"]], edited.loc[row, columns["date"]]
+    assert (player, date, "douleurs") in keys(engine.alerts)
+    assert keys(engine.alerts) == reference(edited, columns, engine.rules)
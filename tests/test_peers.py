@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""PercentileIndex (tableaux triés + searchsorted) contre les rangs pandas ; LoadProfiles en cas limites."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from qrm.cube import build_cube
+from qrm.peers import LoadProfiles, PercentileIndex, session_values
+from qrm.schema import resolve
+from qrm.synthetic import synthetic_squad
+
+
+@pytest.fixture(scope="module")
+def cube():
+    df = synthetic_squad(players=10, sessions=100, seed=4)
+    return build_cube(df, resolve(df.columns))
+
+
+@pytest.fixture(scope="module")
+def positions():
+    return {f"JOUEUR_{i:03d}": "DEF" if i < 4 else "MIL" for i in range(9)}   # JOUEUR_009 sans poste
+
+
+@pytest.mark.parametrize("metric", ["distance", "hsr", "vmax", "rpe"])
+def test_percentiles_match_average_rank(cube, positions, metric):
+    index = PercentileIndex(cube.daily, cube.measures, positions)
+    t = pd.DataFrame({"player": cube.daily["player"].astype(str), "v": session_values(cube.daily, metric)}).dropna()
+    t["group"] = t["player"].map(positions)
+
+    # une valeur de la référence : centile = 100 * (rang moyen - 0,5) / n
+    squad = 100 * (t["v"].rank(method="average") - 0.5) / len(t)
+    np.testing.assert_allclose(index.percentile(metric, t["v"]), squad)
+    for g, part in t.dropna(subset=["group"]).groupby("group"):
+        expected = 100 * (part["v"].rank(method="average") - 0.5) / len(part)
+        np.testing.assert_allclose(index.percentile(metric, part["v"], g), expected)
+
+
+def test_percentile_of_arbitrary_values(cube):
+    index = PercentileIndex(cube.daily, cube.measures)
+    ref = session_values(cube.daily, "hsr")
+    ref = ref[~np.isnan(ref)]
+    values = np.r_[np.quantile(ref, [0, 0.3, 0.77, 1]), -1.0, 1e9, np.nan]
+    expected = [100 * ((ref < v).sum() + 0.5 * (ref == v).sum()) / len(ref) for v in values[:-1]] + [np.nan]
+    np.testing.assert_allclose(index.percentile("hsr", values), expected)
+    q = (0.1, 0.5, 0.9)
+    np.testing.assert_allclose(index.quantiles("hsr", q), pd.Series(ref).quantile(list(q)))
+    assert np.isnan(index.percentile("hsr", [1.0], "GARDIEN")).all()
+
+
+def test_means_match_groupby(cube):
+    index = PercentileIndex(cube.daily, cube.measures)
+    start, end = cube.daily["day"].quantile([0.25, 0.75])
+    d = cube.daily[cube.daily["day"].between(start, end)]
+    expected = (d.assign(v=session_values(d, "distance")).groupby(d["player"].astype(str))["v"].mean())
+    got = index.means(start=start, end=end)["distance"]
+    pd.testing.assert_series_equal(got, expected, check_names=False, check_index_type=False)
+
+
+def test_similar_without_other_active_player():
+    df = synthetic_squad(players=1, sessions=80, seed=5)
+    c = build_cube(df, resolve(df.columns))
+    out = LoadProfiles(c.daily, c.measures).similar("JOUEUR_000")
+    assert out.empty and list(out.columns) == ["player", "end", "distance"]
+
+
+def test_similar_is_nearest_window(cube):
+    profiles = LoadProfiles(cube.daily, cube.measures)
+    out = profiles.similar("JOUEUR_000", k=3)
+    w = profiles.n_windows - 1
+    rows = np.arange(len(profiles.players)) * profiles.n_windows + w
+    dist = np.sqrt(((profiles.X[rows] - profiles.X[rows[0]]) ** 2).sum(axis=1))
+    dist[0] = np.inf
+    dist[~profiles.active[rows]] = np.inf
+    assert list(out["player"]) == list(profiles.players[np.argsort(dist, kind="stable")[:3]])
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""Planner.project (produits matriciels sur K plans) contre une simulation jour par jour d'un seul plan."""
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from qrm.alerts import AlertEngine, load_rules
+from qrm.cube import build_cube
+from qrm.planning import PLAN_METRICS, Planner, repeat_last_week
+from qrm.schema import resolve
+from qrm.synthetic import synthetic_squad
+from qrm.workload import ACUTE_DAYS, CHRONIC_DAYS, compute_workload, latest
+
+RULES = Path(__file__).resolve().parents[1] / "alertes.json"
+SCALES = np.array([0.5, 0.8, 1.0, 1.3])
+
+
+@pytest.fixture(scope="module")
+def squad():
+    df = synthetic_squad(players=8, sessions=120, seed=6)
+    columns = resolve(df.columns)
+    cube = build_cube(df, columns)
+    wl = compute_workload(cube)
+    config = {"positions": {}, "rules": [r for r in load_rules(RULES)["rules"] if r["id"] in ("hsr_bas", "acwr_haut")]}
+    return df, columns, cube, wl, Planner(cube, wl, config)
+
+
+def simulate(planner, wl, rows):
+    """Un plan, un jour après l'autre : EWMA (adjust=False) et fenêtres 7 / 28 j depuis le dernier jour de données."""
+    P, M = len(planner.players), len(planner.metrics)
+    index = pd.MultiIndex.from_product([planner.players, planner.metrics])
+    last = latest(wl).assign(player=lambda d: d["player"].astype(str)).set_index(["player", "metric"])
+    state = {c: last[c].reindex(index).to_numpy("float64").reshape(P, M) for c in ("ewma_acute", "ewma_chronic")}
+    history = (wl.assign(player=wl["player"].astype(str)).pivot_table(index="day", columns=["player", "metric"],
+                                                                      values="load", aggfunc="sum")
+               .reindex(columns=index).fillna(0.0))
+    loads = [history.loc[d].to_numpy().reshape(P, M) for d in history.index[-CHRONIC_DAYS:]]
+    p = planner.players.get_indexer(rows["player"])
+    for day in pd.date_range(planner.last_day + pd.Timedelta(days=1), rows["day"].max(), freq="D"):
+        x = np.zeros((P, M))
+        today = (rows["day"] == day).to_numpy()
+        np.add.at(x, p[today], rows.loc[today, planner.metrics].to_numpy("float64"))
+        for col, n in (("ewma_acute", ACUTE_DAYS), ("ewma_chronic", CHRONIC_DAYS)):
+            a = 2 / (n + 1)
+            state[col] = a * x + (1 - a) * state[col]
+        loads.append(x)
+    acute = np.sum(loads[-ACUTE_DAYS:], axis=0) / ACUTE_DAYS
+    chronic = np.sum(loads[-CHRONIC_DAYS:], axis=0) / CHRONIC_DAYS
+    totals = np.zeros((P, M))
+    np.add.at(totals, p, rows[planner.metrics].to_numpy("float64"))
+    return totals, acute / chronic, state["ewma_acute"] / state["ewma_chronic"]
+
+
+def scaled(plan, factors):
+    """Plan dont chaque séance (jour + libellé) est multipliée par factors[séance]."""
+    key = plan["day"].dt.strftime("%Y-%m-%d") + " " + plan["session"].astype(str)
+    out = plan.copy()
+    out[PLAN_METRICS] = plan[PLAN_METRICS].mul(key.map(factors), axis=0)
+    return out
+
+
+@pytest.mark.parametrize("delay", [0, 3])
+def test_scaled_plans_match_day_by_day(squad, delay):
+    _, _, cube, wl, planner = squad
+    plan = repeat_last_week(cube).assign(day=lambda d: d["day"] + pd.Timedelta(days=delay))
+    proj = planner.project(plan, SCALES)
+    sessions = planner.sessions(plan)
+    for k, scale in enumerate(SCALES):
+        totals, acwr, ewma_acwr = simulate(planner, wl, scaled(plan, dict.fromkeys(sessions, scale)))
+        np.testing.assert_allclose(proj.totals[k], totals, rtol=1e-9)
+        np.testing.assert_allclose(proj.acwr[k], acwr, rtol=1e-9)
+        np.testing.assert_allclose(proj.ewma_acwr[k], ewma_acwr, rtol=1e-9)
+
+
+def test_single_session_multiplier(squad):
+    _, _, cube, wl, planner = squad
+    plan = repeat_last_week(cube)
+    sessions = planner.sessions(plan)
+    mult = np.ones((2, len(sessions)))
+    mult[1, 2] = 0.4
+    proj = planner.project(plan, mult)
+    factors = dict.fromkeys(sessions, 1.0) | {sessions[2]: 0.4}
+    totals, acwr, ewma_acwr = simulate(planner, wl, scaled(plan, factors))
+    np.testing.assert_allclose(proj.totals[1], totals, rtol=1e-9)
+    np.testing.assert_allclose(proj.ewma_acwr[1], ewma_acwr, rtol=1e-9)
+
+
+def test_plan_appended_to_history(squad):
+    """Même plan ajouté au classeur : compute_workload et AlertEngine donnent les valeurs projetées."""
+    df, columns, cube, _, planner = squad
+    plan = repeat_last_week(cube)
+    proj = planner.project(plan, [1.0])
+    future = pd.DataFrame({columns["player"]: plan["player"], columns["date"]: plan["day"],
+                           columns["session"]: plan["session"],
+                           **{columns[m]: plan[m] for m in planner.metrics}})
+    full = pd.concat([df, future], ignore_index=True)
+    wl = compute_workload(build_cube(full, columns), metrics=planner.metrics)
+    last = wl[wl["day"] == wl["day"].max()].assign(player=lambda d: d["player"].astype(str))
+    got = proj.squad(0).merge(last, on=["player", "metric"], suffixes=("", "_ref"))
+    assert len(got) == len(planner.players) * len(planner.metrics)
+    np.testing.assert_allclose(got["acwr"], got["acwr_ref"], rtol=1e-9)
+    np.testing.assert_allclose(got["ewma_acwr"], got["ewma_acwr_ref"], rtol=1e-9)
+
+    engine = AlertEngine(planner.config)
+    engine.update(full, columns)
+    planned = engine.alerts[(engine.alerts["rule"] == "hsr_bas") & (engine.alerts["date"] > planner.last_day)]
+    expected = planned.groupby("player").size()
+    assert len(expected)
+    got = proj.player_alerts(0).query("rule == 'hsr_bas'").set_index("player")["count"]
+    pd.testing.assert_series_equal(got.sort_index(), expected.sort_index(), check_names=False, check_dtype=False)
+
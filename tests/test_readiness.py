@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+"""ReadinessEngine (références glissantes, mises à jour par lots) contre zscores() recalculé en entier."""
+import pandas as pd
+import pytest
+
+from qrm.readiness import ITEMS, ReadinessEngine, daily_wellness, latest, zscores
+from qrm.schema import resolve
+from qrm.synthetic import synthetic_squad
+
+COLUMNS = ["player", "day"] + list(ITEMS) + [f"z_{f}" for f in ITEMS] + ["readiness", "readiness_index", "alerte"]
+
+
+@pytest.fixture(scope="module")
+def daily():
+    df = synthetic_squad(players=8, sessions=150, seed=2)
+    return daily_wellness(df, resolve(df.columns))
+
+
+def by_player(table):
+    return table[COLUMNS].sort_values("player").reset_index(drop=True)
+
+
+def test_batches_match_full_recompute(daily):
+    engine = ReadinessEngine()
+    days = daily["day"].sort_values().unique()
+    for cut in days[[20, 60, 61, 110]].tolist() + [days[-1] + pd.Timedelta(days=1)]:
+        seen = daily[daily["day"] < cut]
+        engine.update(seen)
+        pd.testing.assert_frame_equal(by_player(engine.table()), by_player(latest(zscores(seen))),
+                                      check_dtype=False, rtol=1e-9)
+
+
+def test_known_rows_are_not_counted_again(daily):
+    engine = ReadinessEngine()
+    assert engine.update(daily) == len(daily)
+    assert engine.update(daily) == 0
+
+
+def test_new_player_and_corrected_last_day(daily):
+    engine = ReadinessEngine()
+    engine.update(daily[daily["player"] != "JOUEUR_007"])
+    edited = daily.copy()
+    last = edited.groupby("player")["day"].transform("max") == edited["day"]
+    edited.loc[last & (edited["player"] == "JOUEUR_000"), "sleep"] = 1.0
+    engine.update(edited)
+    pd.testing.assert_frame_equal(by_player(engine.table()), by_player(latest(zscores(edited))),
+                                  check_dtype=False, rtol=1e-9)
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""Pages de app.py, importées seulement quand elles sont sélectionnées.
+
+Le dossier ne s'appelle pas `pages/` : Streamlit en ferait une navigation
+multipage automatique. Chaque module expose render(data) et importe lui-même
+ses dépendances lourdes (Plotly, export, charge…). `data` (SquadData) donne
+des projections en lecture seule de la table partagée : view(...) ne renvoie
+que les colonnes demandées, dans un nouveau DataFrame (copy-on-write), donc
+une page ne peut pas modifier la table des autres sessions.
+"""
+import importlib
+
+from qrm import instrument
+from qrm.ingest import DATA_FILE, file_digest
+from qrm.incremental import open_store
+from qrm.quality import checked
+from qrm.registry import shared
+from qrm.schema import resolve
+from qrm.warehouse import warehouse
+from qrm.watcher import file_signature, watch
+
+# libellé du menu -> module de views/
+PAGES = {"Accueil": "accueil", "Données GPS": "gps", "Bien-être": "bien_etre", "RPE": "rpe",
+         "Alertes": "alertes", "Comparaisons": "comparaisons", "Planification": "planification",
+         "Export": "export"}
+WELLNESS_FIELDS = ("sleep", "fatigue", "stress", "pain", "motivation")
+
+
+class SquadData:
+    """Table de l'effectif (classeur + magasin incrémental), partagée par toutes les sessions."""
+
+    def __init__(self, src=DATA_FILE):
+        signature = file_signature(src)   # relevée avant la lecture : une modification pendant la préparation se verra
+        store = open_store()
+        with instrument.stage("ingestion"):
+            store.ingest(src)   # sans effet si ce classeur est déjà connu du magasin
+        # le classeur et le magasin (séances ajoutées par python -m qrm.traces --store) font la version
+        self.version = (file_digest(src), store.version)
+        # même forme que _signature, magasin pris après notre propre ingestion
+        self.signature = (signature, store.version)
+        self.store = store
+        # lignes douteuses (clé manquante, doublon, valeurs impossibles) écartées avant le typage
+        table = store.table()
+        self._frame, self.quarantine = checked("app", self.version, lambda: table, resolve(table.columns))
+        self.C = resolve(self._frame.columns)   # champ logique -> colonne du classeur
+        self.wellness = [self.C[f] for f in WELLNESS_FIELDS if f in self.C]
+
+    def __len__(self):
+        return len(self._frame)
+
+    @property
+    def columns(self):
+        return list(self._frame.columns)
+
+    def view(self, *fields, columns=None):
+        """Projection sur des champs logiques (ou des colonnes) ; sans argument : toutes les colonnes."""
+        cols = [self.C[f] for f in fields if f in self.C] + list(columns or [])
+        return self._frame[cols or self.columns]
+
+    @property
+    def warehouse(self):
+        """Entrepôt SQLite de la table (synchronisé par warm()) : filtres et agrégats calculés hors de pandas."""
+        return warehouse()
+
+    def cube(self):
+        from qrm.cube import get_cube
+        return get_cube(self._frame, self.version, self.C)
+
+    def workload(self):
+        from qrm.workload import compute_workload
+        return shared("app:workload", self.version, lambda: compute_workload(self.cube()))
+
+    def peers(self):
+        """(centiles effectif / poste, profils de charge) construits une fois par version (qrm.peers)."""
+        from qrm.peers import load_profiles, percentile_index
+        cube = self.cube()
+        return percentile_index(cube, self.version), load_profiles(cube, self.version)
+
+
+def _signature(src=DATA_FILE):
+    # le classeur, et le magasin (séances ajoutées par un autre processus)
+    return file_signature(src), open_store().version
+
+def warm(src=DATA_FILE):
+    """Prépare une version complète : table, charge, repères, forme du jour, alertes (dans le thread de surveillance)."""
+    from qrm.alerts import squad_alerts
+    from qrm.readiness import daily_wellness, squad_readiness
+
+    data = SquadData(src)
+    missing = [f for f in ("player", "date") if f not in data.C]
+    if missing:
+        raise KeyError(f"Colonnes introuvables dans {src} : {', '.join(missing)}")
+    data.workload()
+    data.peers()
+    warehouse().sync(data.view(), data.C, data.version)
+    wellness = data.view("player", "date", columns=data.wellness)
+    squad_readiness("app", data.version, lambda: daily_wellness(wellness, data.C))
+    try:
+        squad_alerts("app", data.version, data.view(), data.C)
+    except ValueError:
+        pass   # alertes.json invalide : signalé par la page Alertes, la table reste servie
+    return data
+
+def data_feed(src=DATA_FILE):
+    """Versions de SquadData préparées en arrière-plan ; .current() donne la dernière prête."""
+    return watch(f"app:{src}", lambda: warm(src), lambda: _signature(src), seen=lambda data: data.signature)
+
+
+def render(label, data):
+    with instrument.stage(f"import page:{PAGES[label]}"):
+        module = importlib.import_module(f"views.{PAGES[label]}")
+    module.render(data)
@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+import streamlit as st
+
+from qrm.quality import describe, report
+
+
+def render(data):
+    st.title("⚽ Tableau de bord GPS & Bien-être – QRM Staff")
+    st.write("Ce tableau de bord permet de suivre les indicateurs GPS, HID, HSR et bien-être des joueurs du QRM.")
+    wh = data.warehouse
+    st.metric("Nombre de joueurs", wh.count("player"))
+    st.metric("Nombre de séances", wh.count("session"))
+    last = wh.date_range()[1]
+    st.metric("Dernière date enregistrée", f"{last:%Y-%m-%d}" if last is not None else "—")
+    if last is None:
+        st.info("Aucune séance dans l'entrepôt (données absentes ou toutes écartées par le contrôle qualité).")
+
+    # lignes écartées / valeurs effacées par le contrôle qualité à la préparation (qrm.quality)
+    st.subheader("🧪 Qualité des données")
+    st.caption(describe(data.quarantine, len(data.store.table())))
+    if not data.quarantine.empty:
+        st.dataframe(report(data.quarantine), width="stretch", hide_index=True)
+        with st.expander("Quarantaine (détail)"):
+            st.dataframe(data.quarantine, width="stretch", hide_index=True)
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+import pandas as pd
+import plotly.express as px
+import streamlit as st
+
+from qrm import instrument
+from qrm.alerts import RULES_FILE, SEVERITIES, squad_alerts
+from qrm.workload import METRIC_LABELS, SWEET_SPOT
+
+PERIODS = {"7 derniers jours": 7, "30 derniers jours": 30, "Tout l'historique": None}
+
+
+def render(data):
+    st.header("⚠️ Alertes automatiques")
+    # règles de alertes.json ; seules les séances arrivées depuis le dernier passage sont évaluées
+    try:
+        engine = squad_alerts("app", data.version, data.view(), data.C)
+    except ValueError as e:
+        st.error(f"{RULES_FILE} : {e}")
+        return
+    with instrument.stage("charge (ACWR)"):
+        wl = data.workload()
+    with instrument.stage("alertes : ACWR"):
+        alerts = pd.concat([engine.alerts, engine.workload_alerts(wl)], ignore_index=True)
+    if engine.skipped:
+        st.caption(f"Règles ignorées (colonne absente) : {', '.join(engine.skipped)}")
+
+    c1, c2 = st.columns(2)
+    period = c1.selectbox("Période", list(PERIODS))
+    severities = c2.multiselect("Gravité", SEVERITIES, default=list(SEVERITIES[:2]))
+    shown = alerts[alerts["severity"].isin(severities)]
+    if PERIODS[period] and not shown.empty:
+        shown = shown[shown["date"] >= shown["date"].max() - pd.Timedelta(days=PERIODS[period])]
+    st.write(f"{len(shown)} alerte(s), {shown['player'].nunique()} joueur(s) :")
+    st.dataframe(shown.rename(columns={"date": "Date", "player": "Joueur", "session": "Séance", "label": "Règle",
+                                       "severity": "Gravité", "value": "Valeur", "limit": "Seuil"})
+                 .drop(columns="rule").round({"Valeur": 2, "Seuil": 2}),
+                 width="stretch", hide_index=True)
+
+    st.subheader("Charge aiguë : chronique (ACWR)")
+    lo, hi = SWEET_SPOT
+    metrics = [m for m in METRIC_LABELS if m in set(wl["metric"])]
+    if "srpe" not in metrics:
+        st.caption("sRPE (RPE x durée) indisponible : le classeur n'a pas de colonne de durée "
+                   "(Duration, Durée, Minutes ou Temps de jeu).")
+    metric = st.selectbox("Indicateur", metrics, format_func=METRIC_LABELS.get)
+    joueurs = st.multiselect("Joueur(s)", sorted(wl["player"].unique()))
+    trend = wl[(wl["metric"] == metric) & (wl["player"].isin(joueurs) if joueurs else True)]
+    with instrument.stage("figure:acwr", rows_in=len(trend)):
+        fig = px.line(trend, x="day", y="ewma_acwr", color="player", title=f"ACWR EWMA – {METRIC_LABELS[metric]}")
+        fig.add_hrect(y0=lo, y1=hi, fillcolor="green", opacity=0.1, line_width=0)
+        st.plotly_chart(fig, width="stretch")
@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+import plotly.express as px
+import streamlit as st
+
+from qrm import instrument
+from qrm.readiness import BASELINE_DAYS, ITEM_LABELS, daily_wellness, squad_readiness
+from views import WELLNESS_FIELDS
+
+
+def render(data):
+    st.header("🧠 Bien-être (1-5)")
+    C = data.C
+    df = data.view("player", "date", columns=data.wellness)
+
+    # références par joueur tenues à jour au fil des questionnaires (seuls les nouveaux jours sont intégrés)
+    squad = squad_readiness("app", data.version, lambda: daily_wellness(df, C))
+    st.subheader(f"Forme du jour (écarts à la référence de {BASELINE_DAYS} jours de chaque joueur)")
+    if squad.empty:
+        st.info("Pas encore de questionnaire.")
+    else:
+        alerts = int(squad["alerte"].sum())
+        st.caption(f"{alerts} joueur(s) nettement en dessous de leur habitude (indice < 40)." if alerts
+                   else "Aucun joueur nettement en dessous de son habitude.")
+        labels = {"player": "Joueur", "day": "Date", "readiness_index": "Indice de forme", "alerte": "Alerte",
+                  **{f"z_{f}": f"z {lbl}" for f, lbl in ITEM_LABELS.items()}}
+        z = [c for c in squad if c.startswith("z_")]
+        shown = squad[["player", "day"] + z + ["readiness_index", "alerte"]].round(dict.fromkeys(z + ["readiness_index"], 2))
+        st.dataframe(shown.rename(columns=labels), width="stretch", hide_index=True)
+
+    # format long calculé par l'entrepôt (une requête UNION ALL, réponses manquantes exclues)
+    long = data.warehouse.wellness_series([f for f in WELLNESS_FIELDS if f in C])
+    long = long.assign(item=long["item"].map(C)).rename(columns={"player": C["player"], "date": C["date"],
+                                                                  "item": "Variable", "score": "Score"})
+    with instrument.stage("figure:bien-être"):
+        fig = px.bar(long, x=C["date"], y="Score", color="Variable", barmode="group", title="Scores de bien-être")
+        st.plotly_chart(fig, width="stretch")
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+import pandas as pd
+import plotly.express as px
+import streamlit as st
+
+from qrm import instrument
+from qrm.peers import WINDOW_WEEKS
+
+PERIODS = {"4 dernières semaines": 28, "12 dernières semaines": 84, "Tout l'historique": None}
+LABELS = {"distance": "Distance", "hid": "HID", "hsr": "HSR", "accel": "Accél.", "decel": "Décél.",
+          "sprint": "Sprints", "vmax": "Vitesse max", "rpe": "RPE"}
+
+
+def render(data):
+    st.header("📈 Comparaisons entre joueurs")
+    C = data.C
+    # deux colonnes lues dans l'entrepôt, pas la table complète
+    df = data.warehouse.select(["player", "hsr"]).rename(columns={"player": C["player"], "hsr": C["hsr"]})
+    with instrument.stage("figure:comparaison", rows_in=len(df)):
+        fig = px.box(df, x=C["player"], y=C["hsr"], title="Distribution du HSR par joueur")
+        st.plotly_chart(fig, width="stretch")
+
+    pct, profiles = data.peers()
+    st.subheader("Centiles dans l'effectif")
+    # moyenne par séance de la période, placée parmi toutes les séances de l'effectif (et du poste)
+    period = st.selectbox("Période", list(PERIODS))
+    end = pd.Timestamp(pct.days.max()) if len(pct) else None
+    start = end - pd.Timedelta(days=PERIODS[period] - 1) if PERIODS[period] and end is not None else None
+    with instrument.stage("centiles", rows_in=len(pct)) as s:
+        table = pct.table(start=start, end=end)
+        s["rows_out"] = len(table)
+    shown = table[[c for c in table.columns if c.endswith("_pct") or c.endswith("_pct_poste") or c == "position"]]
+    shown = shown.rename(columns={**{f"{m}_pct": f"{l} (%)" for m, l in LABELS.items()},
+                                  **{f"{m}_pct_poste": f"{l} (% poste)" for m, l in LABELS.items()},
+                                  "position": "Poste"})
+    st.dataframe(shown.rename_axis("Joueur").round(0), width="stretch")
+    st.caption("Centile 50 = séance médiane de l'effectif (toutes saisons). Postes : clé « positions » de alertes.json.")
+
+    st.subheader(f"Profils de charge proches ({WINDOW_WEEKS} semaines)")
+    if not len(profiles):
+        st.info(f"Pas assez d'historique pour des fenêtres de {WINDOW_WEEKS} semaines.")
+        return
+    c1, c2 = st.columns(2)
+    player = c1.selectbox("Joueur", list(profiles.players))
+    history = c2.toggle("Chercher dans toutes les saisons", value=False)
+    with instrument.stage("profils proches", rows_in=len(profiles)):
+        near = profiles.similar(player, k=5, same_period=not history)
+    st.dataframe(near.rename(columns={"player": "Joueur", "end": "Fin de la fenêtre", "distance": "Écart"})
+                 .round({"Écart": 2}), width="stretch", hide_index=True)
+    if not history and not near.empty:
+        weekly = profiles.weekly([player] + list(near["player"]))
+        weekly = weekly[weekly["metric"] == "hsr"] if "hsr" in profiles.metrics else weekly
+        with instrument.stage("figure:profils", rows_in=len(weekly)):
+            fig = px.line(weekly, x="week", y="load", color="player", markers=True,
+                          title=f"{LABELS.get(weekly['metric'].iloc[0], '')} par semaine : {player} et profils proches")
+            st.plotly_chart(fig, width="stretch")
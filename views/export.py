@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from qrm import instrument
+from qrm.export import FORMATS, export_file, page_count, page_rows
+from qrm.model import code_mask
+
+
+def render(data):
+    st.header("⬇️ Export des données")
+    C = data.C
+    df = data.view()
+    c1, c2 = st.columns(2)
+    joueurs = c1.multiselect("Joueur(s) (vide = tous)", df[C["player"]].cat.categories)
+    dmin, dmax = df[C["date"]].min().date(), df[C["date"]].max().date()
+    periode = c2.date_input("Période", value=(dmin, dmax), min_value=dmin, max_value=dmax)
+    colonnes = st.multiselect("Colonnes exportées", list(df.columns), default=list(df.columns))
+
+    # filtres actifs -> positions des lignes (aucune copie de la table)
+    with instrument.stage("filtres export", rows_in=len(df)) as s:
+        mask = code_mask(df[C["player"]], joueurs) if joueurs else np.ones(len(df), dtype=bool)
+        if isinstance(periode, tuple) and len(periode) == 2:
+            dates = df[C["date"]]
+            mask &= ((dates >= pd.Timestamp(periode[0]))
+                     & (dates < pd.Timestamp(periode[1]) + pd.Timedelta(days=1))).to_numpy()
+        rows = np.flatnonzero(mask)
+        s["rows_out"] = len(rows)
+
+    # tableau paginé : seule la page affichée est envoyée au navigateur
+    p1, p2 = st.columns([1, 3])
+    taille = p1.selectbox("Lignes par page", [50, 100, 500], index=1)
+    pages = page_count(len(rows), taille)
+    num = p2.number_input(f"Page (sur {pages})", min_value=1, max_value=pages, value=1, step=1)
+    st.caption(f"{len(rows)} lignes sélectionnées")
+    st.dataframe(page_rows(df, int(num), taille, rows, colonnes), width="stretch")
+
+    # le fichier n'est produit qu'au clic, par blocs
+    fmt = st.selectbox("Format", list(FORMATS))
+    ext, mime = FORMATS[fmt]
+    st.download_button(f"Télécharger les données ({fmt})", data=lambda: export_file(df, fmt, rows, colonnes),
+                       file_name=f"donnees_qrm.{ext}", mime=mime, disabled=not colonnes)
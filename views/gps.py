@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+import plotly.express as px
+import streamlit as st
+
+from qrm import instrument
+from qrm.charts import peak_demands_chart
+from qrm.peaks import PEAK_METRICS, best_peaks, load_peaks, peaks_version
+from qrm.registry import shared
+
+
+def render(data):
+    st.header("📊 Données GPS")
+    C = data.C
+    wh = data.warehouse
+    joueurs = st.multiselect("Sélectionnez le(s) joueur(s)", wh.players())
+    if not joueurs:
+        return
+    # filtre exécuté par l'entrepôt (index joueur, date) : seules les séances des joueurs choisis remontent
+    fields = [f for f in ("player", "session", "distance", "hid", "hsr") if f in C]
+    sel = wh.select(fields, players=joueurs).rename(columns={f: C[f] for f in fields})
+    with instrument.stage("figure:distances"):
+        fig = px.bar(sel, x=C["session"], y=[C[f] for f in ("distance", "hid", "hsr") if f in C],
+                     barmode="group", title="Distances Totales / HID / HSR")
+        st.plotly_chart(fig, width="stretch")
+    # pics d'intensité 1/3/5 min des séances importées depuis les traces brutes
+    pv = peaks_version()
+    if pv:
+        best = best_peaks(shared("peaks", pv, load_peaks), joueurs)
+        if not best.empty:
+            with instrument.stage("figure:pics"):
+                st.plotly_chart(peak_demands_chart(best, PEAK_METRICS), width="stretch")
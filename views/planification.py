@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import streamlit as st
+
+from qrm import instrument
+from qrm.planning import read_plan, repeat_last_week, squad_planner
+from qrm.workload import METRIC_LABELS, SWEET_SPOT
+
+SCALES = np.arange(50, 151)   # intensités simulées (% du plan), toutes évaluées en un seul calcul
+ALL = "Toutes les séances"
+
+
+def render(data):
+    st.header("🗓️ Planification de la semaine")
+    cube = data.cube()
+    planner = squad_planner("app", data.version, cube, data.workload())
+
+    up = st.file_uploader("Plan de la semaine (Date, Séance, Joueur — vide = tout l'effectif —, Distance, HID, HSR…)",
+                          type=["csv", "xlsx"])
+    if up is None:
+        plan = repeat_last_week(cube)
+        st.caption("Sans fichier, la dernière semaine de chaque joueur est reprise à l'identique.")
+    else:
+        raw = pd.read_csv(up) if up.name.lower().endswith(".csv") else pd.read_excel(up)
+        try:
+            plan = read_plan(raw)
+        except KeyError as e:
+            st.error(e.args[0])
+            return
+    st.download_button("Télécharger ce plan (modèle à modifier)", plan.to_csv(index=False).encode("utf-8"),
+                       file_name="plan_semaine.csv", mime="text/csv")
+    sessions = planner.sessions(plan)
+    if not sessions:
+        st.warning(f"Aucune séance du plan après le {planner.last_day:%d/%m/%Y} (dernier jour de données).")
+        return
+
+    c1, c2 = st.columns(2)
+    target = c1.selectbox("Séance ajustée", [ALL] + sessions)
+    pct = c2.slider("Intensité (% du plan)", int(SCALES[0]), int(SCALES[-1]), 100, step=1)
+    # un plan par intensité : seule la séance choisie (ou toutes) est multipliée
+    mult = np.ones((len(SCALES), len(sessions)))
+    if target == ALL:
+        mult[:] = SCALES[:, None] / 100
+    else:
+        mult[:, sessions.index(target)] = SCALES / 100
+    with instrument.stage("projection des plans", rows_in=len(plan)):
+        proj = planner.project(plan, mult)
+    k = int(pct - SCALES[0])
+
+    summary = proj.summary()
+    rules = [r["id"] for r in proj.rules]
+    curve = summary[rules].assign(intensity=SCALES).melt(id_vars="intensity", var_name="Règle", value_name="Joueurs")
+    labels = {r["id"]: r["label"] for r in proj.rules}
+    with instrument.stage("figure:plans", rows_in=len(curve)):
+        fig = px.line(curve.assign(Règle=curve["Règle"].map(labels)), x="intensity", y="Joueurs", color="Règle",
+                      title="Joueurs en alerte selon l'intensité du plan")
+        fig.add_vline(x=pct, line_dash="dash")
+        fig.update_layout(xaxis_title="Intensité (% du plan)")
+        st.plotly_chart(fig, width="stretch")
+
+    st.subheader(f"Effectif à {pct} %")
+    metric = st.selectbox("Indicateur", proj.metrics, format_func=lambda m: METRIC_LABELS.get(m, m),
+                          index=proj.metrics.index("hsr") if "hsr" in proj.metrics else 0)
+    squad = proj.squad(k)
+    squad = squad[squad["metric"] == metric].drop(columns="metric")
+    alerts = proj.player_alerts(k).groupby("player")["label"].agg(", ".join)
+    squad["alertes"] = squad["player"].map(alerts).fillna("")
+    lo, hi = SWEET_SPOT
+    st.caption(f"Totaux de la semaine planifiée ; ACWR au dernier jour du plan (zone {lo}–{hi}).")
+    st.dataframe(squad.rename(columns={"player": "Joueur", "total": "Total semaine", "acwr": "ACWR 7/28",
+                                       "ewma_acwr": "ACWR EWMA", "alertes": "Alertes"})
+                 .round({"Total semaine": 0, "ACWR 7/28": 2, "ACWR EWMA": 2}),
+                 width="stretch", hide_index=True)
@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+import plotly.express as px
+import streamlit as st
+
+from qrm import instrument
+from qrm.resolution import RESOLUTIONS, UNITS, match_days, reduce
+
+
+def render(data):
+    st.header("💪 RPE individuel (1-10)")
+    C = data.C
+    df = data.view("date", "rpe", "player", "session")
+    resolution = st.selectbox("Résolution", list(RESOLUTIONS), format_func=RESOLUTIONS.get)
+    # une valeur par joueur et par case (jour / semaine / microcycle), LTTB au-delà de MAX_POINTS
+    with instrument.stage("résolution RPE", rows_in=len(df)) as s:
+        matches = match_days(df[C["date"]], df[C["session"]]) if "session" in C else ()
+        series, res = reduce(df.dropna(subset=[C["rpe"]]), C["date"], {C["rpe"]: "mean"}, resolution,
+                             by=C["player"], matches=matches)
+        s["rows_out"] = len(series)
+    with instrument.stage("figure:rpe", rows_in=len(series)):
+        fig = px.line(series, x=C["date"], y=C["rpe"], color=C["player"], title=f"Évolution du RPE (moyenne par {UNITS[res]})")
+        st.plotly_chart(fig, width="stretch")